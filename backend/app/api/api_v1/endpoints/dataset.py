@@ -1,27 +1,44 @@
+import asyncio
+import contextlib
+import copy
+import functools
 import json
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
 
 import requests
 from app import constants as c
 from app import utils
-from app.core import security
+from app.core import (
+    incremental,
+    partitions,
+    rollups,
+    samples,
+    sampling,
+    security,
+    validation_indices,
+    validation_jobs,
+)
 from app.core.dataset import split_dataset_resource
 from app.core.expectations import supported_unsupported_expectations
+from app.core.response_cache import DATASETS, EXPECTATIONS, VALIDATIONS, response_cache
+from app.core.result_sink import result_sink
 from app.core.runner import Runner
+from app.core.semaphore import DistributedSemaphore
 from app.core.users import current_active_user
-from app.db.client import client
+from app.db import engines, repository
+from app.db.client import client, redis_client
 from app.models.dataset import Dataset, ResponseDataset, Sample
-from app.models.datasource import engine_types, get_datasource
+from app.models.datasource import engine_types, fetch_datasource
 from app.models.users import UserDB
 from app.settings import settings
-from app.utils import get_sample_query
-from fastapi import APIRouter, HTTPException, Request, status
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.encoders import jsonable_encoder
 from fastapi.params import Depends
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from opensearchpy import NotFoundError, RequestError
-from opensearchpy.helpers import bulk
 
 router = APIRouter(dependencies=[Depends(current_active_user)])
 
@@ -33,26 +50,25 @@ def get_json_schema():
 
 
 @router.get("", response_model=List[Dataset])
-def list_datasets(
+@response_cache.cached(ttl=30, tags=[DATASETS])
+async def list_datasets(
     datasource_id: Optional[str] = None,
     sort_by_key: Optional[str] = "dataset_name",
     asc: Optional[bool] = True,
+    limit: Optional[int] = Query(default=None, ge=1, le=repository.PAGE_SIZE),
+    cursor: Optional[str] = None,
 ):
-    # TODO implement scrolling
     direction = "asc" if asc else "desc"
 
     if datasource_id is None:
-        query = {"query": {"match_all": {}}, "sort": [{sort_by_key: direction}]}
+        query = {"query": {"match_all": {}}}
     else:
-        query = {
-            "query": {"match": {"datasource_id": datasource_id}},
-            "sort": [{sort_by_key: direction}],
-        }
+        query = {"query": {"match": {"datasource_id": datasource_id}}}
 
     try:
-        docs = client.search(index=settings.DATASET_INDEX, size=1000, body=query)[
-            "hits"
-        ]["hits"]
+        docs, next_cursor = await repository.datasets.paginate(
+            query, [{sort_by_key: direction}], limit, cursor
+        )
     except RequestError:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
@@ -63,13 +79,17 @@ def list_datasets(
     for doc in docs:
         doc["_source"]["key"] = doc["_id"]
         docs_response.append(doc["_source"])
-    return JSONResponse(status_code=status.HTTP_200_OK, content=docs_response)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=docs_response,
+        headers={c.NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None,
+    )
 
 
 @router.get("/{key}", response_model=Dataset)
-def get_dataset(key: str):
+async def get_dataset(key: str):
     try:
-        doc = _get_dataset(key, as_dict=True)
+        doc = await _get_dataset(key, as_dict=True)
     except NotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -84,16 +104,19 @@ def get_dataset(key: str):
 
 
 @router.post("", response_model=Dataset)
-def create_dataset(
+@response_cache.invalidates(DATASETS)
+async def create_dataset(
     dataset: Dataset,
     test_query: bool = True,
     user: UserDB = Depends(current_active_user),
 ):
-    datasource = _check_datasource_exists(dataset.datasource_id)
-    _check_dataset_does_not_exists(dataset)
+    datasource, __ = await asyncio.gather(
+        _check_datasource_exists(dataset.datasource_id),
+        _check_dataset_does_not_exists(dataset),
+    )
 
     if test_query:
-        response = sample(dataset, False)
+        response = await sample(dataset, False)
 
         if response.get("exception"):
             raise HTTPException(
@@ -111,11 +134,8 @@ def create_dataset(
     dataset.create_date = utils.current_time()
     dataset.modified_date = utils.current_time()
 
-    insert_dataset = client.index(
-        index=settings.DATASET_INDEX,
-        id=str(uuid.uuid4()),
-        body=dataset.dict(by_alias=True),
-        refresh="wait_for",
+    insert_dataset = await repository.datasets.put(
+        str(uuid.uuid4()), dataset.dict(by_alias=True), refresh="wait_for"
     )
 
     dataset_as_dict = dataset.dict(by_alias=True)
@@ -125,10 +145,9 @@ def create_dataset(
 
 
 @router.put("/{key}", response_model=ResponseDataset)
-def update_dataset(dataset: Dataset, key: str):
-    original_dataset: Dataset = Dataset(
-        **client.get(index=settings.DATASET_INDEX, id=key)["_source"]
-    )
+@response_cache.invalidates(DATASETS)
+async def update_dataset(dataset: Dataset, key: str):
+    original_dataset: Dataset = await _get_dataset(key)
 
     if original_dataset == dataset:
         return ResponseDataset(key=key, **dataset.dict(by_alias=True))
@@ -139,13 +158,13 @@ def update_dataset(dataset: Dataset, key: str):
             detail="updates to dataset datasource_id are not supported",
         )
 
-    datasource = _check_datasource_exists(dataset.datasource_id)
+    datasource = await _check_datasource_exists(dataset.datasource_id)
 
     if original_dataset.dataset_name != dataset.dataset_name:
-        _check_dataset_does_not_exists(dataset)
+        await _check_dataset_does_not_exists(dataset)
         # means it is a physical table.
         if not dataset.runtime_parameters:
-            response = sample(dataset, False)
+            response = await sample(dataset, False)
 
             if response.get("exception"):
                 raise HTTPException(
@@ -164,7 +183,7 @@ def update_dataset(dataset: Dataset, key: str):
         and original_dataset.runtime_parameters.query
         != dataset.runtime_parameters.query
     ):
-        response = sample(dataset, False)
+        response = await sample(dataset, False)
 
         if response.get("exception"):
             raise HTTPException(
@@ -176,35 +195,51 @@ def update_dataset(dataset: Dataset, key: str):
             columns=response["columns"],
             rows=json.dumps(jsonable_encoder(response["rows"])),
         )
+    if (
+        original_dataset.watermark_column != dataset.watermark_column
+        or original_dataset.dataset_name != dataset.dataset_name
+        or original_dataset.runtime_parameters != dataset.runtime_parameters
+    ):
+        await asyncio.gather(
+            run_in_threadpool(incremental.reset, key),
+            run_in_threadpool(partitions.reset, key),
+        )
+    elif original_dataset.partitioning != dataset.partitioning:
+        await run_in_threadpool(partitions.reset, key)
+
     dataset.engine = datasource.engine
     dataset.modified_date = utils.current_time()
     dataset.create_date = original_dataset.create_date
     dataset.created_by = original_dataset.created_by
 
-    response = client.update(
-        index=settings.DATASET_INDEX,
-        id=key,
-        body={"doc": dataset.dict(by_alias=True)},
-        refresh="wait_for",
+    await repository.datasets.update(
+        key, dataset.dict(by_alias=True), refresh="wait_for"
     )
     dataset.key = key
     return ResponseDataset(**dataset.dict(by_alias=True))
 
 
 @router.delete("/{key}")
-def delete_dataset(key: str, request: Request):
+@response_cache.invalidates(DATASETS, EXPECTATIONS, VALIDATIONS)
+async def delete_dataset(key: str, request: Request):
     try:
         body = {"query": {"match": {"dataset_id": key}}}
 
-        client.delete_by_query(index=settings.VALIDATION_INDEX, body=body)
-        client.delete_by_query(index=settings.EXPECTATION_INDEX, body=body)
-        requests.delete(
-            url=f"{settings.SCHEDULER_API_URL}/api/v1/schedules",
-            params={"dataset_id": key},
-            headers=request.headers,
-            cookies=request.cookies,
+        await asyncio.gather(
+            repository.validations.delete_by_query(body),
+            repository.expectations.delete_by_query(body),
+            repository.rollups.delete_by_query(body),
+            run_in_threadpool(incremental.reset, key),
+            run_in_threadpool(partitions.reset, key),
+            run_in_threadpool(
+                requests.delete,
+                url=f"{settings.SCHEDULER_API_URL}/api/v1/schedules",
+                params={"dataset_id": key},
+                headers=request.headers,
+                cookies=request.cookies,
+            ),
         )
-        client.delete(index=settings.DATASET_INDEX, id=key, refresh="wait_for")
+        await repository.datasets.delete(key, refresh="wait_for")
     except NotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -214,22 +249,26 @@ def delete_dataset(key: str, request: Request):
 
 
 @router.post("/sample")
-def sample(dataset: Dataset, response_format: bool = True):
-    datasource = get_datasource(
+async def sample(dataset: Dataset, response_format: bool = True, stream: bool = False):
+    datasource = await fetch_datasource(
         key=dataset.datasource_id,
         decrypt_pw=True,
     )
 
+    engine = engines.get_engine(datasource)
+
     if dataset.runtime_parameters:
-        response = get_sample_query(
-            query=dataset.runtime_parameters.query, url=datasource.connection_string()
-        )
+        query = dataset.runtime_parameters.query
     else:
-        response = get_sample_query(
-            query=f"select * from {dataset.dataset_name}",
-            url=datasource.connection_string(),
+        query = f"select * from {dataset.dataset_name}"
+
+    if stream:
+        return StreamingResponse(
+            samples.stream_sample(query, engine), media_type="application/x-ndjson"
         )
 
+    response = await run_in_threadpool(samples.get_sample, query, engine)
+
     if not response_format:
         return response
 
@@ -245,10 +284,11 @@ def sample(dataset: Dataset, response_format: bool = True):
 
 
 @router.put("/{key}/sample")
-def update_sample(key: str):
-    dataset = _get_dataset(key=key)
+@response_cache.invalidates(DATASETS)
+async def update_sample(key: str):
+    dataset = await _get_dataset(key=key)
 
-    response = sample(dataset, False)
+    response = await sample(dataset, False)
 
     if response.get("exception"):
         raise HTTPException(
@@ -261,17 +301,37 @@ def update_sample(key: str):
         rows=json.dumps(jsonable_encoder(response["rows"])),
     )
 
-    client.update(
-        index=settings.DATASET_INDEX,
-        id=key,
-        body={"doc": dataset.dict(by_alias=True)},
-        refresh="wait_for",
+    await repository.datasets.update(
+        key, dataset.dict(by_alias=True), refresh="wait_for"
     )
     return JSONResponse(status_code=status.HTTP_200_OK)
 
 
-@router.post("/{dataset_id}/validate")
-def validate_dataset(dataset_id):
+@router.post("/{dataset_id}/validate", status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_validation(dataset_id: str):
+    if not await repository.datasets.exists(dataset_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"dataset with id '{dataset_id}' does not exist",
+        )
+
+    job = await run_in_threadpool(
+        validation_jobs.submit,
+        dataset_id,
+        functools.partial(validate_dataset, refresh=True),
+    )
+
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=job)
+
+
+def validate_dataset(dataset_id, refresh: bool = False):
+    """
+    Validates a dataset's enabled expectations and stores the results. Used by
+    validation jobs and by the scheduler.
+
+    Results are indexed in batches with other validations' results. With
+    ``refresh`` they're searchable by the time this returns.
+    """
     try:
         dataset = client.get(
             index=settings.DATASET_INDEX,
@@ -283,26 +343,33 @@ def validate_dataset(dataset_id):
             detail=f"dataset with id '{dataset_id}' does not exist",
         )
 
-    datasource = client.get(
-        index=settings.DATASOURCE_INDEX,
-        id=dataset["_source"]["datasource_id"],
-    )
-    datasource["_source"]["datasource_id"] = datasource["_id"]
-
-    expectations_response = client.search(
-        index=settings.EXPECTATION_INDEX,
-        size=1000,
-        body={
-            "query": {
-                "bool": {
-                    "must": [
-                        {"match": {"dataset_id": dataset["_id"]}},
-                        {"match": {"enabled": True}},
-                    ]
+    # Validations run on worker threads rather than the event loop, so the
+    # datasource and expectations are fetched concurrently with the sync client.
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        datasource_future = pool.submit(
+            client.get,
+            index=settings.DATASOURCE_INDEX,
+            id=dataset["_source"]["datasource_id"],
+        )
+        expectations_future = pool.submit(
+            client.search,
+            index=settings.EXPECTATION_INDEX,
+            size=1000,
+            body={
+                "query": {
+                    "bool": {
+                        "must": [
+                            {"match": {"dataset_id": dataset["_id"]}},
+                            {"match": {"enabled": True}},
+                        ]
+                    }
                 }
-            }
-        },
-    )["hits"]["hits"]
+            },
+        )
+        datasource = datasource_future.result()
+        expectations_response = expectations_future.result()["hits"]["hits"]
+
+    datasource["_source"]["datasource_id"] = datasource["_id"]
 
     expectations = []
 
@@ -329,45 +396,110 @@ def validate_dataset(dataset_id):
     }
 
     for doc in expectations_response:
-        doc["_source"]["kwargs"] = json.loads(doc["_source"]["kwargs"])
         doc["_source"]["key"] = doc["_id"]
         doc["_source"]["meta"] = {}
         doc["_source"]["meta"]["expectation_id"] = doc["_id"]
         expectations.append(doc["_source"])
 
-    results = Runner(
-        datasource=datasource,
-        batch=dataset,
-        meta=meta,
-        expectations=expectations,
-        identifiers=identifiers,
-    ).validate()
+    engine = engines.get_engine(datasource)
+
+    def validate_batch(partition, batch):
+        batch_identifiers = {**identifiers}
+        if partition is not None:
+            batch_identifiers["partition"] = partition
+
+        runner = Runner(
+            datasource=datasource,
+            batch=batch,
+            meta=meta,
+            # the runner rewrites expectation kwargs in place
+            expectations=copy.deepcopy(expectations),
+            identifiers=batch_identifiers,
+        )
+        return runner.validate()
+
+    if datasource.max_concurrent_validations:
+        slot = DistributedSemaphore(
+            redis=redis_client,
+            name=f"validations:{identifiers['datasource_id']}",
+            limit=datasource.max_concurrent_validations,
+            lease_seconds=settings.VALIDATION_SLOT_LEASE_SECONDS,
+            poll_interval_seconds=settings.VALIDATION_SLOT_POLL_SECONDS,
+        )
+    else:
+        slot = contextlib.nullcontext()
+
+    # The window and partition queries count against the datasource's limit too.
+    with slot:
+        window = incremental.open_window(
+            dataset_id=identifiers["dataset_id"],
+            dataset=dataset,
+            engine=engine,
+        )
+        if window and window.is_empty():
+            # Without new rows the results of the last run still hold, while
+            # non-additive expectations over an empty window would only fail.
+            print(f"Dataset '{identifiers['dataset_id']}' has no new rows to validate")
+            return []
+
+        partition_plan = partitions.plan(
+            dataset_id=identifiers["dataset_id"],
+            dataset=dataset,
+            engine=engine,
+            expectations=expectations,
+        )
+
+        if partition_plan:
+            batches = partition_plan.batches
+        else:
+            batches = {None: window.batch() if window else dataset}
+
+        if dataset.sampling:
+            batches = {
+                partition: sampling.sample_batch(datasource, batch, engine)
+                for partition, batch in batches.items()
+            }
+
+        results = []
+        if len(batches) > 1:
+            max_workers = min(settings.PARTITION_VALIDATION_WORKERS, len(batches))
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                for batch_results in pool.map(validate_batch, *zip(*batches.items())):
+                    results.extend(batch_results)
+        else:
+            for partition, batch in batches.items():
+                results.extend(validate_batch(partition, batch))
+
+    if window:
+        results = window.commit(results)
+
+    if dataset.sampling:
+        results = sampling.annotate(results, dataset)
 
     _insert_results(results)
+    rollups.record(results)
 
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
-        content=jsonable_encoder(results),
-    )
+    if refresh:
+        result_sink.flush(refresh=True)
+
+    if partition_plan:
+        partition_plan.commit(results)
+
+    return results
 
 
 @router.post("/{dataset_id}/suggest")
-def create_suggestions(dataset_id):
+@response_cache.invalidates(EXPECTATIONS)
+async def create_suggestions(dataset_id):
     try:
-        dataset = client.get(
-            index=settings.DATASET_INDEX,
-            id=dataset_id,
-        )
+        dataset = await repository.datasets.get(dataset_id)
     except NotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"dataset with id '{dataset_id}' does not exist",
         )
 
-    datasource = client.get(
-        index=settings.DATASOURCE_INDEX,
-        id=dataset["_source"]["datasource_id"],
-    )
+    datasource = await repository.datasources.get(dataset["_source"]["datasource_id"])
     datasource["_source"]["datasource_id"] = datasource["_id"]
 
     identifiers = {
@@ -397,7 +529,7 @@ def create_suggestions(dataset_id):
     ]
     excluded_expectations.append(c.EXPECT_COLUMN_VALUES_TO_BE_BETWEEN)
 
-    results = Runner(
+    runner = Runner(
         datasource=datasource,
         batch=dataset,
         meta=meta,
@@ -405,11 +537,11 @@ def create_suggestions(dataset_id):
         datasource_id=dataset.datasource_id,
         dataset_id=dataset_id,
         excluded_expectations=excluded_expectations,
-    ).profile()
+    )
+    results = await run_in_threadpool(runner.profile)
 
-    client.delete_by_query(
-        index=settings.EXPECTATION_INDEX,
-        body={
+    await repository.expectations.delete_by_query(
+        {
             "query": {
                 "bool": {
                     "must": [
@@ -422,7 +554,7 @@ def create_suggestions(dataset_id):
         },
     )
 
-    _insert_results(results, settings.EXPECTATION_INDEX)
+    await repository.expectations.bulk(results, refresh="wait_for")
 
     return JSONResponse(
         status_code=status.HTTP_200_OK,
@@ -438,18 +570,13 @@ def not_found_response(resource_name: str, key=None):
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=msg)
 
 
-def _insert_results(results, index: str = settings.VALIDATION_INDEX):
-    bulk(
-        client,
-        results,
-        index=index,
-        refresh="wait_for",
-    )
+def _insert_results(results):
+    result_sink.add(validation_indices.route(results))
 
 
-def _check_datasource_exists(datasource_id: str):
+async def _check_datasource_exists(datasource_id: str):
     try:
-        return get_datasource(key=datasource_id)
+        return await fetch_datasource(key=datasource_id)
     except NotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -457,7 +584,7 @@ def _check_datasource_exists(datasource_id: str):
         )
 
 
-def _check_dataset_does_not_exists(dataset: Dataset):
+async def _check_dataset_does_not_exists(dataset: Dataset):
     dataset_schema, dataset_name, is_virtual = split_dataset_resource(dataset)
 
     query = {
@@ -502,7 +629,7 @@ def _check_dataset_does_not_exists(dataset: Dataset):
         }
     }
 
-    response = client.search(index=settings.DATASET_INDEX, body=query)
+    response = await repository.datasets.search(query)
 
     if response["hits"]["total"]["value"] > 0:
         raise HTTPException(
@@ -511,8 +638,8 @@ def _check_dataset_does_not_exists(dataset: Dataset):
         )
 
 
-def _get_dataset(key: str, as_dict=False):
-    dataset = client.get(index=settings.DATASET_INDEX, id=key)["_source"]
+async def _get_dataset(key: str, as_dict=False):
+    dataset = (await repository.datasets.get(key))["_source"]
 
     if as_dict:
         return dataset
@@ -1,24 +1,34 @@
+import asyncio
 import uuid
 from copy import deepcopy
 from typing import Optional
 
 import requests
 import sqlalchemy.exc
+from app import constants as c
 from app import utils
-from app.core import security
+from app.core import catalog, security
+from app.core.context_cache import context_cache
+from app.core.response_cache import (
+    DATASETS,
+    DATASOURCES,
+    EXPECTATIONS,
+    VALIDATIONS,
+    response_cache,
+)
 from app.core.users import current_active_user
-from app.db.client import client
+from app.db import engines, repository
 from app.models import datasource as datasourcee
 from app.models.datasource import Datasource, engine_types
 from app.models.users import UserDB
 from app.settings import settings
-from fastapi import APIRouter, HTTPException, Request, status
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.encoders import jsonable_encoder
 from fastapi.param_functions import Depends
 from fastapi.responses import JSONResponse
 from opensearchpy import RequestError
 from pydantic import ValidationError
-from sqlalchemy import create_engine
 from sqlalchemy.exc import DBAPIError
 
 router = APIRouter(dependencies=[Depends(current_active_user)])
@@ -37,19 +47,18 @@ def get_json_schema():
 
 
 @router.get("")
-def list_datasources(
+async def list_datasources(
     sort_by_key: Optional[str] = "datasource_name",
     asc: Optional[bool] = True,
+    limit: Optional[int] = Query(default=None, ge=1, le=repository.PAGE_SIZE),
+    cursor: Optional[str] = None,
 ):
-    # TODO implement scrolling
     direction = "asc" if asc else "desc"
 
     try:
-        docs = client.search(
-            index=settings.DATASOURCE_INDEX,
-            size=1000,
-            body={"query": {"match_all": {}}, "sort": [{sort_by_key: direction}]},
-        )["hits"]["hits"]
+        docs, next_cursor = await repository.datasources.paginate(
+            {"query": {"match_all": {}}}, [{sort_by_key: direction}], limit, cursor
+        )
     except RequestError:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
@@ -63,19 +72,24 @@ def list_datasources(
 
         doc["_source"]["key"] = doc["_id"]
         docs_response.append(dict(**doc["_source"]))
-    return JSONResponse(status_code=status.HTTP_200_OK, content=docs_response)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=docs_response,
+        headers={c.NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None,
+    )
 
 
 @router.get("/{key}")
-def get_datasource(
+async def get_datasource(
     key: str,
 ):
-    doc = datasourcee.get_datasource(key=key).dict(by_alias=True)
+    doc = (await datasourcee.fetch_datasource(key=key)).dict(by_alias=True)
     return JSONResponse(status_code=status.HTTP_200_OK, content=doc)
 
 
 @router.post("")
-def create_datasource(
+@response_cache.invalidates(DATASOURCES)
+async def create_datasource(
     datasource: Datasource,
     test: Optional[bool] = False,
     user: UserDB = Depends(current_active_user),
@@ -95,11 +109,12 @@ def create_datasource(
             content=jsonable_encoder({"detail": exc.errors(), "body": datasource}),
         )
 
-    return _create_datasource(datasource, test, user)
+    return await _create_datasource(datasource, test, user)
 
 
 @router.put("/{key}")
-def update_datasource(
+@response_cache.invalidates(DATASOURCES)
+async def update_datasource(
     datasource: Datasource,
     key: str,
     test: Optional[bool] = False,
@@ -118,22 +133,24 @@ def update_datasource(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             content=jsonable_encoder({"detail": exc.errors(), "body": datasource}),
         )
-    return _update_datasource(datasource, key, test)
+    return await _update_datasource(datasource, key, test)
 
 
 @router.delete("/{datasource_id}")
-def delete_datasource(
+@response_cache.invalidates(DATASOURCES, DATASETS, EXPECTATIONS, VALIDATIONS)
+async def delete_datasource(
     datasource_id: str,
     request: Request,
 ):
-    return _delete_datasource(datasource_id, request)
+    return await _delete_datasource(datasource_id, request)
 
 
 def _test_datasource(datasource: Datasource):
     try:
-        engine = create_engine(datasource.connection_string())
+        engine = engines.get_engine(datasource)
         connection = engine.connect()
     except DBAPIError as ex:
+        engines.dispose_engine(engine)
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail=str(ex.orig),
@@ -154,42 +171,56 @@ def _test_datasource(datasource: Datasource):
         )
 
     connection.close()
-    engine.dispose()
+
+    if not datasource.key:
+        # The pool of an unsaved datasource would never be reused.
+        engines.dispose_engine(engine)
 
     return JSONResponse(
         status_code=status.HTTP_200_OK, content="Successfully connected"
     )
 
 
-def _delete_datasource(
+async def _delete_datasource(
     key: str,
     request: Request,
 ):
     body = {"query": {"match": {"datasource_id": key}}}
-    client.delete_by_query(index=settings.VALIDATION_INDEX, body=body)
-    client.delete_by_query(index=settings.EXPECTATION_INDEX, body=body)
-    client.delete_by_query(index=settings.DATASET_INDEX, body=body)
-    requests.delete(
-        url=f"{settings.SCHEDULER_API_URL}/api/v1/schedules",
-        params={"datasource_id": key},
-        headers=request.headers,
-        cookies=request.cookies,
+    await asyncio.gather(
+        repository.validations.delete_by_query(body),
+        repository.expectations.delete_by_query(body),
+        repository.datasets.delete_by_query(body),
+        repository.rollups.delete_by_query(body),
+        run_in_threadpool(
+            requests.delete,
+            url=f"{settings.SCHEDULER_API_URL}/api/v1/schedules",
+            params={"datasource_id": key},
+            headers=request.headers,
+            cookies=request.cookies,
+        ),
     )
-    client.delete(index=settings.DATASOURCE_INDEX, id=key, refresh="wait_for")
+    await repository.datasources.delete(key, refresh="wait_for")
+    await run_in_threadpool(_release_datasource, key)
     return JSONResponse(status_code=status.HTTP_200_OK, content="datasource deleted")
 
 
-def _update_datasource(datasource, key: str, test: bool):
-    original_datasource = datasourcee.get_datasource(key=key, decrypt_pw=True)
+def _release_datasource(key: str):
+    """Drops the cached contexts, engines and catalog of a changed datasource."""
+    context_cache.invalidate(key)
+    engines.dispose(key)
+    catalog.invalidate(key)
+
+
+async def _update_datasource(datasource, key: str, test: bool):
+    original_datasource = await datasourcee.fetch_datasource(key=key, decrypt_pw=True)
 
     if original_datasource.datasource_name != datasource.datasource_name:
-        response = client.search(
-            index=settings.DATASOURCE_INDEX,
-            body={
+        response = await repository.datasources.search(
+            {
                 "query": {
                     "match": {"datasource_name.keyword": datasource.datasource_name}
                 }
-            },
+            }
         )
 
         if response["hits"]["total"]["value"] > 0:
@@ -201,6 +232,9 @@ def _update_datasource(datasource, key: str, test: bool):
     datasource.create_date = original_datasource.create_date
     datasource.created_by = original_datasource.created_by
     datasource_as_dict = datasource.dict(by_alias=True, exclude_none=True)
+    # Limits left empty are written as null, so clearing a limit removes it.
+    for field in datasourcee.OPTIONAL_LIMITS:
+        datasource_as_dict[field] = getattr(datasource, field)
     if test:
         datasource_for_test = deepcopy(datasource)
 
@@ -216,14 +250,10 @@ def _update_datasource(datasource, key: str, test: bool):
                     datasource.password
                 )
 
-        _test_datasource(datasource_for_test)
+        await run_in_threadpool(_test_datasource, datasource_for_test)
 
-    client.update(
-        index=settings.DATASOURCE_INDEX,
-        id=key,
-        body={"doc": datasource_as_dict},
-        refresh="wait_for",
-    )
+    await repository.datasources.update(key, datasource_as_dict, refresh="wait_for")
+    await run_in_threadpool(_release_datasource, key)
 
     datasource_as_dict["key"] = key
     datasource_as_dict["password"] = "*****"
@@ -244,9 +274,8 @@ def _update_datasource(datasource, key: str, test: bool):
         )
 
     if update_by_query_string != "":
-        client.update_by_query(
-            index=settings.DATASET_INDEX,
-            body={
+        await repository.datasets.update_by_query(
+            {
                 "query": {"match": {"datasource_id": key}},
                 "script": {"source": update_by_query_string, "lang": "painless"},
             },
@@ -255,15 +284,12 @@ def _update_datasource(datasource, key: str, test: bool):
     return JSONResponse(status_code=status.HTTP_200_OK, content=datasource_as_dict)
 
 
-def _create_datasource(datasource, test: bool, user: UserDB):
+async def _create_datasource(datasource, test: bool, user: UserDB):
     if test:
-        _test_datasource(datasource)
+        await run_in_threadpool(_test_datasource, datasource)
 
-    response = client.search(
-        index=settings.DATASOURCE_INDEX,
-        body={
-            "query": {"match": {"datasource_name.keyword": datasource.datasource_name}}
-        },
+    response = await repository.datasources.search(
+        {"query": {"match": {"datasource_name.keyword": datasource.datasource_name}}}
     )
 
     if response["hits"]["total"]["value"] > 0:
@@ -281,11 +307,8 @@ def _create_datasource(datasource, test: bool, user: UserDB):
 
     datasource_as_dict = datasource.dict(by_alias=True, exclude_none=True)
 
-    insert_response = client.index(
-        index=settings.DATASOURCE_INDEX,
-        id=str(uuid.uuid4()),
-        body=datasource_as_dict,
-        refresh="wait_for",
+    insert_response = await repository.datasources.put(
+        str(uuid.uuid4()), datasource_as_dict, refresh="wait_for"
     )
 
     datasource_as_dict["key"] = insert_response["_id"]
@@ -1,23 +1,27 @@
-import json
+import asyncio
 import uuid
-from copy import deepcopy
 from typing import Optional
 
+from app import constants as c
 from app import utils
 from app.api.api_v1.endpoints import validation
-from app.core.expectations import supported_unsupported_expectations
+from app.core import rollups
+from app.core.expectations import (
+    expectation_schemas,
+    supported_unsupported_expectations,
+)
+from app.core.response_cache import EXPECTATIONS, VALIDATIONS, response_cache
 from app.core.users import current_active_user
-from app.db.client import client
+from app.db import repository
 from app.models import expectation as exp
 from app.models.expectation import Expectation
 from app.settings import settings
-from app.utils import json_schema_to_single_doc
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.encoders import jsonable_encoder
 from fastapi.param_functions import Depends
 from fastapi.responses import JSONResponse
 from opensearchpy import NotFoundError, RequestError
-from opensearchpy.helpers import bulk
 from pydantic.error_wrappers import ValidationError
 
 router = APIRouter(dependencies=[Depends(current_active_user)])
@@ -25,12 +29,9 @@ router = APIRouter(dependencies=[Depends(current_active_user)])
 
 @router.get("/json-schema")
 def get_json_schema():
-    expectations = []
-    for expectation in exp.type_map.values():
-        json_schema = json_schema_to_single_doc(expectation.schema())
-        expectations.append(json_schema)
-
-    return JSONResponse(status_code=status.HTTP_200_OK, content=expectations)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK, content=list(expectation_schemas())
+    )
 
 
 @router.get("/supported")
@@ -40,23 +41,18 @@ def list_supported_expectations():
 
 
 @router.put("/{expectation_id}/enable", response_model=Expectation)
-def enable_expectation(
+@response_cache.invalidates(EXPECTATIONS)
+async def enable_expectation(
     expectation_id: str,
 ):
     try:
-        response = client.update(
-            index=settings.EXPECTATION_INDEX,
-            id=expectation_id,
-            body={
-                "doc": {
-                    "enabled": True,
-                }
-            },
+        response = await repository.expectations.update(
+            expectation_id,
+            {"enabled": True},
             refresh="wait_for",
             _source=True,
         )
         source = response["get"]["_source"]
-        source["kwargs"] = json.loads(source["kwargs"])
     except NotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -66,23 +62,18 @@ def enable_expectation(
 
 
 @router.put("/{expectation_id}/disable", response_model=Expectation)
-def disable_expectation(
+@response_cache.invalidates(EXPECTATIONS)
+async def disable_expectation(
     expectation_id: str,
 ):
     try:
-        response = client.update(
-            index=settings.EXPECTATION_INDEX,
-            id=expectation_id,
-            body={
-                "doc": {
-                    "enabled": False,
-                }
-            },
+        response = await repository.expectations.update(
+            expectation_id,
+            {"enabled": False},
             refresh="wait_for",
             _source=True,
         )
         source = response["get"]["_source"]
-        source["kwargs"] = json.loads(source["kwargs"])
     except NotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -92,18 +83,22 @@ def disable_expectation(
 
 
 @router.get("")
-def list_expectations(
+@response_cache.cached(ttl=30, tags=[EXPECTATIONS, VALIDATIONS])
+async def list_expectations(
     datasource_id: Optional[str] = None,
     dataset_id: Optional[str] = None,
+    column: Optional[str] = None,
     include_history: Optional[bool] = False,
     suggested: Optional[bool] = None,
     enabled: Optional[bool] = True,
     asc: Optional[bool] = False,
+    limit: Optional[int] = Query(default=None, ge=1, le=repository.PAGE_SIZE),
+    cursor: Optional[str] = None,
 ):
     direction = "asc" if asc else "desc"
     sort_by_key: str = "expectation_type"
 
-    query = {"query": {"bool": {"must": []}}, "sort": [{sort_by_key: direction}]}
+    query = {"query": {"bool": {"must": []}}}
 
     query["query"]["bool"]["must"].append({"match": {"enabled": enabled}})
 
@@ -118,28 +113,20 @@ def list_expectations(
     if dataset_id is not None:
         query["query"]["bool"]["must"].append({"match": {"dataset_id": dataset_id}})
 
+    if column is not None:
+        query["query"]["bool"]["must"].append(
+            {
+                "multi_match": {
+                    "query": column,
+                    "fields": [f"kwargs.{key}" for key in exp.COLUMN_KWARGS],
+                }
+            }
+        )
+
     try:
-        if include_history:
-            body = [
-                {"index": settings.EXPECTATION_INDEX},
-                {**{"size": 1000}, **query},
-                {"index": settings.VALIDATION_INDEX},
-                validation.validations_query_body(datasource_id, dataset_id),
-            ]
-
-            results = client.msearch(body=body)
-
-            expectations = results["responses"][0]["hits"]["hits"]
-            validations = results["responses"][1]["hits"]["hits"]
-
-            return JSONResponse(
-                status_code=status.HTTP_200_OK,
-                content=zip_expectations_and_validations(expectations, validations),
-            )
-
-        results = client.search(
-            index=settings.EXPECTATION_INDEX, size=1000, body=query
-        )["hits"]["hits"]
+        results, next_cursor = await repository.expectations.paginate(
+            query, [{sort_by_key: direction}], limit, cursor
+        )
     except RequestError as ex:
         print(ex)
         raise HTTPException(
@@ -147,20 +134,66 @@ def list_expectations(
             detail=f"invalid sort_by_key",
         )
 
+    headers = {c.NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+
+    if include_history:
+        validations, validations_query = validation.validations_search(
+            datasource_id, dataset_id
+        )
+        # only the latest validations of the expectations on this page
+        expectation_ids = [result["_id"] for result in results]
+        validations_query["query"]["bool"]["must"].append(
+            {"terms": {"expectation_id.keyword": expectation_ids}}
+        )
+        response = await validations.search(
+            {
+                **validations_query,
+                "size": 0,
+                "aggs": {
+                    "expectations": {
+                        "terms": {
+                            "field": "expectation_id.keyword",
+                            "size": max(len(expectation_ids), 1),
+                        },
+                        "aggs": {
+                            "history": {
+                                "top_hits": {
+                                    "size": settings.EXPECTATION_HISTORY_SIZE,
+                                    "sort": [{"run_date": "desc"}],
+                                }
+                            }
+                        },
+                    }
+                },
+            }
+        )
+        history = [
+            hit
+            for bucket in response["aggregations"]["expectations"]["buckets"]
+            for hit in reversed(bucket["history"]["hits"]["hits"])
+        ]
+
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content=zip_expectations_and_validations(results, history),
+            headers=headers,
+        )
+
     result_response = []
     for result in results:
         source = result["_source"]
         expectation_type = source["expectation_type"]
-        source["kwargs"] = json.loads(source["kwargs"])
         expectation = exp.type_map[expectation_type](**source)
         source["documentation"] = expectation.documentation()
         result_response.append(dict(**{"key": result["_id"]}, **source))
-    return JSONResponse(status_code=status.HTTP_200_OK, content=result_response)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK, content=result_response, headers=headers
+    )
 
 
 @router.get("/{expectation_id}")
-def get_expectation(expectation_id: str):
-    doc = client.get(index=settings.EXPECTATION_INDEX, id=expectation_id)["_source"]
+async def get_expectation(expectation_id: str):
+    doc = (await repository.expectations.get(expectation_id))["_source"]
 
     doc["key"] = expectation_id
 
@@ -168,7 +201,8 @@ def get_expectation(expectation_id: str):
 
 
 @router.post("")
-def create_expectation(expectation: Expectation):
+@response_cache.invalidates(EXPECTATIONS)
+async def create_expectation(expectation: Expectation):
     # TODO validation, don't allow datasource_id, dataset_id, expectation_id in "meta" field. We add this fields to meta in Runner.run
     try:
         expectation.create_date = utils.current_time()
@@ -187,13 +221,13 @@ def create_expectation(expectation: Expectation):
             content=jsonable_encoder({"detail": exc.errors(), "body": expectation}),
         )
 
-    _resource_exists(
-        expectation["datasource_id"], settings.DATASOURCE_INDEX, "datasource"
+    __, dataset = await asyncio.gather(
+        _resource_exists(
+            expectation["datasource_id"], repository.datasources, "datasource"
+        ),
+        _resource_exists(expectation["dataset_id"], repository.datasets, "dataset_id"),
     )
-
-    dataset = _resource_exists(
-        expectation["dataset_id"], settings.DATASET_INDEX, "dataset_id"
-    )["_source"]
+    dataset = dataset["_source"]
 
     if dataset.get("datasource_id") != expectation["datasource_id"]:
         raise HTTPException(
@@ -201,22 +235,16 @@ def create_expectation(expectation: Expectation):
             detail="expectation datasource_id does not match dataset datasource_id",
         )
 
-    expectation_copy = deepcopy(expectation)
-    expectation_copy["kwargs"] = json.dumps(expectation_copy["kwargs"])
-
-    response = client.index(
-        index=settings.EXPECTATION_INDEX,
-        id=str(uuid.uuid4()),
-        body=expectation_copy,
-        refresh="wait_for",
+    response = await repository.expectations.put(
+        str(uuid.uuid4()), expectation, refresh="wait_for"
     )
-    expectation_copy["key"] = response["_id"]
-    expectation_copy["kwargs"] = json.loads(expectation_copy["kwargs"])
-    return JSONResponse(status_code=status.HTTP_200_OK, content=expectation_copy)
+    expectation["key"] = response["_id"]
+    return JSONResponse(status_code=status.HTTP_200_OK, content=expectation)
 
 
 @router.put("/{expectation_id}")
-def update_expectation(expectation: Expectation, expectation_id: str):
+@response_cache.invalidates(EXPECTATIONS, VALIDATIONS)
+async def update_expectation(expectation: Expectation, expectation_id: str):
     try:
         expectation.modified_date = utils.current_time()
         expectation = exp.type_map[expectation.expectation_type](
@@ -234,9 +262,9 @@ def update_expectation(expectation: Expectation, expectation_id: str):
         )
 
     try:
-        original_expectation = client.get(
-            index=settings.EXPECTATION_INDEX, id=expectation_id
-        )["_source"]
+        original_expectation = (await repository.expectations.get(expectation_id))[
+            "_source"
+        ]
 
         expectation["create_date"] = original_expectation["create_date"]
     except NotFoundError:
@@ -245,20 +273,17 @@ def update_expectation(expectation: Expectation, expectation_id: str):
             detail=f"expectation '{expectation_id}' does not exist",
         )
 
-    expectation_copy = deepcopy(expectation)
-    expectation_copy["kwargs"] = json.dumps(expectation_copy["kwargs"])
-
-    if original_expectation == expectation_copy:
+    if original_expectation == expectation:
         expectation["key"] = expectation_id
         return JSONResponse(status_code=status.HTTP_200_OK, content=expectation)
 
-    if original_expectation["datasource_id"] != expectation_copy["datasource_id"]:
+    if original_expectation["datasource_id"] != expectation["datasource_id"]:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="updates to expectation datasource_id are not supported",
         )
 
-    if original_expectation["dataset_id"] != expectation_copy["dataset_id"]:
+    if original_expectation["dataset_id"] != expectation["dataset_id"]:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="updates to expectation dataset_id are not supported",
@@ -271,45 +296,39 @@ def update_expectation(expectation: Expectation, expectation_id: str):
     # decide to run aggregations on validations that have been
     # run. We can't have an expectation with the same id but
     # with different expectation types
-    if original_expectation["expectation_type"] != expectation_copy["expectation_type"]:
-        response = client.index(
-            index=settings.EXPECTATION_INDEX,
-            id=str(uuid.uuid4()),
-            body=expectation_copy,
-            refresh="wait_for",
+    if original_expectation["expectation_type"] != expectation["expectation_type"]:
+        response = await repository.expectations.put(
+            str(uuid.uuid4()), expectation, refresh="wait_for"
         )
         expectation["key"] = response["_id"]
 
-        client.delete(
-            index=settings.EXPECTATION_INDEX, id=expectation_id, refresh="wait_for"
-        )
-        client.delete_by_query(
-            index=settings.VALIDATION_INDEX,
-            body={"query": {"match": {"expectation_id": expectation_id}}},
+        await asyncio.gather(
+            repository.expectations.delete(expectation_id, refresh="wait_for"),
+            repository.validations.delete_by_query(
+                {"query": {"match": {"expectation_id": expectation_id}}}
+            ),
+            run_in_threadpool(rollups.forget_expectation, expectation_id),
         )
         return JSONResponse(status_code=status.HTTP_200_OK, content=expectation)
 
-    response = client.update(
-        index=settings.EXPECTATION_INDEX,
-        id=expectation_id,
-        body={"doc": expectation_copy},
-        refresh="wait_for",
+    # indexed whole, as a partial update would merge kwargs that were removed
+    response = await repository.expectations.put(
+        expectation_id, expectation, refresh="wait_for"
     )
     expectation["key"] = response["_id"]
     return JSONResponse(status_code=status.HTTP_200_OK, content=expectation)
 
 
 @router.delete("/{expectation_id}")
-def delete_expectation(expectation_id: str):
+@response_cache.invalidates(EXPECTATIONS, VALIDATIONS)
+async def delete_expectation(expectation_id: str):
     try:
-        client.delete_by_query(
-            index=settings.VALIDATION_INDEX,
-            body={"query": {"match": {"expectation_id": expectation_id}}},
-        )
-        client.delete(
-            index=settings.EXPECTATION_INDEX,
-            id=expectation_id,
-            refresh="wait_for",
+        await asyncio.gather(
+            repository.validations.delete_by_query(
+                {"query": {"match": {"expectation_id": expectation_id}}}
+            ),
+            run_in_threadpool(rollups.forget_expectation, expectation_id),
+            repository.expectations.delete(expectation_id, refresh="wait_for"),
         )
     except NotFoundError:
         raise HTTPException(
@@ -319,9 +338,11 @@ def delete_expectation(expectation_id: str):
     return JSONResponse(status_code=status.HTTP_200_OK, content="expectation deleted")
 
 
-def _resource_exists(expectation_id: str, index: str, resource_type: str):
+async def _resource_exists(
+    expectation_id: str, resources: repository.Repository, resource_type: str
+):
     try:
-        return client.get(index=index, id=expectation_id)
+        return await resources.get(expectation_id)
     except NotFoundError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -336,7 +357,6 @@ def zip_expectations_and_validations(expectations, validations):
     for expectation in expectations:
         source = expectation["_source"]
         expectation_type = source["expectation_type"]
-        source["kwargs"] = json.loads(source["kwargs"])
         expectation_obj = exp.type_map[expectation_type](**source)
         source["documentation"] = expectation_obj.documentation()
         source["result_type"] = expectation_obj.result_type
@@ -351,16 +371,3 @@ def zip_expectations_and_validations(expectations, validations):
         expectations_as_dict[source["expectation_id"]]["validations"].append(source)
 
     return list(expectations_as_dict.values())
-
-
-def _insert_results(results, index: str = settings.VALIDATION_INDEX):
-    for result in results:
-        result["enabled"] = False
-        result["suggested"] = True
-
-    bulk(
-        client,
-        results,
-        index=index,
-        refresh="wait_for",
-    )
@@ -1,7 +1,9 @@
-import sqlalchemy as sa
+from typing import Optional
+
+from app.core import catalog
 from app.core.users import current_active_user
 from app.models.datasource import get_datasource
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, status
 from fastapi.param_functions import Depends
 from fastapi.responses import JSONResponse
 from sqlalchemy.exc import DBAPIError
@@ -10,41 +12,57 @@ router = APIRouter(dependencies=[Depends(current_active_user)])
 
 
 @router.get("/schema")
-def list_schemas(datasource_id: str):
+def list_schemas(
+    datasource_id: str,
+    refresh: bool = False,
+    prefix: Optional[str] = None,
+    offset: int = Query(default=0, ge=0),
+    limit: Optional[int] = Query(default=None, ge=1),
+):
     datasource = get_datasource(key=datasource_id, decrypt_pw=True)
     try:
-        engine = sa.create_engine(datasource.connection_string())
-        inspect = sa.inspect(engine)
-        schema_list = inspect.get_schema_names()
+        schema_list = catalog.list_schemas(datasource, refresh=refresh)
     except DBAPIError as ex:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(ex),
         )
+    schema_list = catalog.paginate(schema_list, prefix, offset, limit)
     return JSONResponse(status_code=status.HTTP_200_OK, content=schema_list)
 
 
 @router.get("/table")
-def list_tables(datasource_id: str, schema: str):
+def list_tables(
+    datasource_id: str,
+    schema: str,
+    refresh: bool = False,
+    prefix: Optional[str] = None,
+    offset: int = Query(default=0, ge=0),
+    limit: Optional[int] = Query(default=None, ge=1),
+):
     datasource = get_datasource(key=datasource_id, decrypt_pw=True)
 
-    engine = sa.create_engine(datasource.connection_string())
-    inspect = sa.inspect(engine)
-    schema_list = inspect.get_table_names(schema=schema)
+    table_list = catalog.list_tables(datasource, schema, refresh=refresh)
+    table_list = catalog.paginate(table_list, prefix, offset, limit)
 
-    return JSONResponse(status_code=status.HTTP_200_OK, content=schema_list)
+    return JSONResponse(status_code=status.HTTP_200_OK, content=table_list)
 
 
 @router.get("/column")
-def list_columns(datasource_id: str, schema: str, table: str):
+def list_columns(
+    datasource_id: str,
+    schema: str,
+    table: str,
+    refresh: bool = False,
+    prefix: Optional[str] = None,
+    offset: int = Query(default=0, ge=0),
+    limit: Optional[int] = Query(default=None, ge=1),
+):
     datasource = get_datasource(key=datasource_id, decrypt_pw=True)
-    engine = sa.create_engine(datasource.connection_string())
-    inspect = sa.inspect(engine)
-    sa_column_list = inspect.get_columns(schema=schema, table_name=table)
-
-    column_list = []
 
-    for column in sa_column_list:
-        column_list.append({"name": column["name"], "type": str(column["type"])})
+    column_list = catalog.list_columns(datasource, schema, table, refresh=refresh)
+    column_list = catalog.paginate(
+        column_list, prefix, offset, limit, key=lambda column: column["name"]
+    )
 
     return JSONResponse(status_code=status.HTTP_200_OK, content=column_list)
@@ -1,6 +1,15 @@
+import asyncio
+
+from app.core import rollups
+from app.core.response_cache import (
+    DATASETS,
+    DATASOURCES,
+    EXPECTATIONS,
+    VALIDATIONS,
+    response_cache,
+)
 from app.core.users import current_active_user
-from app.db.client import client
-from app.settings import settings
+from app.db import repository
 from fastapi import APIRouter, status
 from fastapi.params import Depends
 from fastapi.responses import JSONResponse
@@ -9,44 +18,42 @@ router = APIRouter(dependencies=[Depends(current_active_user)])
 
 
 @router.get("/resource-counts")
-def resource_counts():
-    datasource_count = client.count(
-        index=settings.DATASOURCE_INDEX, body={"query": {"match_all": {}}}
-    )
-
+@response_cache.cached(ttl=60, tags=[DATASOURCES, DATASETS, EXPECTATIONS, VALIDATIONS])
+async def resource_counts():
     # schema_count = client.search(
     #     index=settings.DATASET_INDEX,
     #     body={"size": 0, "aggs": {"item": {"cardinality": {"field": "runtime_parameters.schema"}}}}
     # )["aggregations"]["item"]["value"]
 
-    dataset_count = client.count(
-        index=settings.DATASET_INDEX, body={"query": {"match_all": {}}}
+    (
+        datasource_count,
+        dataset_count,
+        expectation_count,
+        validation_count,
+        points,
+    ) = await asyncio.gather(
+        repository.datasources.count({"query": {"match_all": {}}}),
+        repository.datasets.count({"query": {"match_all": {}}}),
+        repository.expectations.count({"query": {"match": {"enabled": True}}}),
+        repository.validations.count({"query": {"match_all": {}}}),
+        get_histogram_points(),
     )
 
-    expectation_count = client.count(
-        index=settings.EXPECTATION_INDEX, body={"query": {"match": {"enabled": True}}}
-    )
-
-    validation_count = client.count(
-        index=settings.VALIDATION_INDEX, body={"query": {"match_all": {}}}
-    )
-
-    points = get_histogram_points()
     response = {
         "datasource": {
-            "count": datasource_count["count"],
+            "count": datasource_count,
             "points": points["datasource"],
         },
         "dataset": {
-            "count": dataset_count["count"],
+            "count": dataset_count,
             "points": points["dataset"],
         },
         "expectation": {
-            "count": expectation_count["count"],
+            "count": expectation_count,
             "points": points["expectation"],
         },
         "validation": {
-            "count": validation_count["count"],
+            "count": validation_count,
             "points": points["validation"],
         },
     }
@@ -54,31 +61,39 @@ def resource_counts():
 
 
 @router.get("/top-issues")
-def top_issues():
-    issues_response = client.search(
-        index=settings.VALIDATION_INDEX,
+async def top_issues():
+    issues_response = await repository.rollups.search(
         body={
             "size": 0,
             "query": {
                 "bool": {
-                    "must": [
-                        {"range": {"run_date": {"gte": "now-1d", "lte": "now"}}},
-                        {"match": {"exception_info.raised_exception": "false"}},
-                    ]
+                    "filter": [
+                        {"term": {"scope": rollups.DATASET}},
+                        {"term": {"interval": rollups.HOURLY}},
+                        {"range": {"bucket": {"gte": "now-1d/h", "lte": "now"}}},
+                    ],
+                    # skips rollups of expectations that only raised
+                    # exceptions, which have neither successes nor failures
+                    "should": [
+                        {"range": {"success_count": {"gt": 0}}},
+                        {"range": {"failure_count": {"gt": 0}}},
+                    ],
+                    "minimum_should_match": 1,
                 }
             },
             "aggs": {
                 "dataset_agg": {
-                    "terms": {"field": "dataset_id.keyword"},
+                    "terms": {"field": "dataset_id", "size": 1000},
                     "aggs": {
-                        "passed_agg": {"filter": {"term": {"success": "true"}}},
+                        "pass_count": {"sum": {"field": "success_count"}},
+                        "fail_count": {"sum": {"field": "failure_count"}},
                         "success_rate": {
                             "bucket_script": {
                                 "buckets_path": {
-                                    "doc_count": "_count",
-                                    "passed": "passed_agg._count",
+                                    "passed": "pass_count",
+                                    "failed": "fail_count",
                                 },
-                                "script": "params.passed / params.doc_count * 100",
+                                "script": "params.passed / (params.passed + params.failed) * 100",
                             }
                         },
                         "success_rate_bucket_sort": {
@@ -101,18 +116,17 @@ def top_issues():
     for bucket in buckets:
         dataset_id_terms.append(bucket["key"])
 
-        pass_count = bucket["passed_agg"]["doc_count"]
-        fail_count = bucket["doc_count"] - bucket["passed_agg"]["doc_count"]
+        pass_count = int(bucket["pass_count"]["value"])
+        fail_count = int(bucket["fail_count"]["value"])
         dataset_ids[bucket["key"]] = {
             "rate": f'{bucket["success_rate"]["value"]} %',
-            "#_failures": f'{fail_count} of {bucket["doc_count"]}',
+            "#_failures": f"{fail_count} of {pass_count + fail_count}",
             "pass_count": pass_count,
             "fail_count": fail_count,
             "dataset_id": bucket["key"],
         }
 
-    datasets_response = client.search(
-        index=settings.DATASET_INDEX,
+    datasets_response = await repository.datasets.search(
         body={
             "_source": [
                 "datasource_name",
@@ -134,29 +148,28 @@ def top_issues():
     )
 
 
-def get_histogram_points():
-    points_response = client.msearch(
-        body=[
-            {"index": settings.DATASOURCE_INDEX},
-            histogram_query("create_date"),
-            {"index": settings.DATASET_INDEX},
-            histogram_query("create_date"),
-            {"index": settings.EXPECTATION_INDEX},
-            {
-                "size": 0,
-                "query": {"match": {"enabled": True}},
-                "aggregations": {
-                    "histogram": {
-                        "date_histogram": {
-                            "field": "create_date",
-                            "min_doc_count": 0,
-                            "interval": "1d",
+async def get_histogram_points():
+    responses = await repository.msearch(
+        [
+            (repository.datasources, histogram_query("create_date")),
+            (repository.datasets, histogram_query("create_date")),
+            (
+                repository.expectations,
+                {
+                    "size": 0,
+                    "query": {"match": {"enabled": True}},
+                    "aggregations": {
+                        "histogram": {
+                            "date_histogram": {
+                                "field": "create_date",
+                                "min_doc_count": 0,
+                                "interval": "1d",
+                            }
                         }
-                    }
+                    },
                 },
-            },
-            {"index": settings.VALIDATION_INDEX},
-            histogram_query("run_date"),
+            ),
+            (repository.validations, histogram_query("run_date")),
         ]
     )
     # order of list should be the same as order of indices in "body" above
@@ -165,9 +178,7 @@ def get_histogram_points():
 
     for i in range(len(indices)):
         temp = []
-        for point in points_response["responses"][i]["aggregations"]["histogram"][
-            "buckets"
-        ]:
+        for point in responses[i]["aggregations"]["histogram"]["buckets"]:
             temp.append([point["key_as_string"], point["doc_count"]])
         points[indices[i]] = temp
     return points
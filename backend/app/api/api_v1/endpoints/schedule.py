@@ -2,10 +2,13 @@ import json
 from typing import Optional
 
 import requests
+from app import constants as c
+from app.core import schedule_runs
 from app.core.schedulers.scheduler import Schedule
 from app.core.users import current_active_user
+from app.db import repository
 from app.settings import settings
-from fastapi import APIRouter, HTTPException, Request, status
+from fastapi import APIRouter, HTTPException, Query, Request, status
 from fastapi.encoders import jsonable_encoder
 from fastapi.params import Depends
 from fastapi.responses import JSONResponse
@@ -66,6 +69,113 @@ def create_schedule(
     )
 
 
+@router.get("/runs")
+async def list_schedule_runs(
+    datasource_id: Optional[str] = None,
+    dataset_id: Optional[str] = None,
+    schedule_id: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1, le=repository.PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    query = {"query": {"bool": {"filter": _run_filters(datasource_id, dataset_id)}}}
+    if schedule_id:
+        query["query"]["bool"]["filter"].append({"term": {"schedule_id": schedule_id}})
+
+    runs, next_cursor = await repository.schedule_runs.paginate(
+        query, [{"scheduled_time": "desc"}], limit, cursor
+    )
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=[{"key": run["_id"], **run["_source"]} for run in runs],
+        headers={c.NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None,
+    )
+
+
+@router.get("/runs/statistics")
+async def schedule_run_statistics(
+    datasource_id: Optional[str] = None,
+    dataset_id: Optional[str] = None,
+    days: int = Query(default=30, ge=1),
+):
+    """
+    p50 and p95 run time and start delay of each dataset's scheduled runs over
+    the last ``days`` days, slowest first. The daily percentiles of a single
+    dataset are included when ``dataset_id`` is set.
+    """
+    percentiles = {
+        "duration": {
+            "percentiles": {"field": "duration_seconds", "percents": [50, 95]}
+        },
+        "start_delay": {
+            "percentiles": {"field": "start_delay_seconds", "percents": [50, 95]}
+        },
+    }
+    aggs = {
+        "failures": {"filter": {"term": {"status": schedule_runs.FAILED}}},
+        **percentiles,
+    }
+    if dataset_id:
+        aggs["daily"] = {
+            "date_histogram": {
+                "field": "scheduled_time",
+                "calendar_interval": "1d",
+                "format": "yyyy-MM-dd'T'HH:mm:ssZZZZZ",
+            },
+            "aggs": percentiles,
+        }
+
+    filters = _run_filters(datasource_id, dataset_id)
+    filters.append({"range": {"scheduled_time": {"gte": f"now-{days}d"}}})
+    response = await repository.schedule_runs.search(
+        body={
+            "size": 0,
+            "query": {"bool": {"filter": filters}},
+            "aggs": {
+                "datasets": {
+                    "terms": {"field": "dataset_id", "size": 1000},
+                    "aggs": aggs,
+                }
+            },
+        }
+    )
+
+    statistics = []
+    for bucket in response["aggregations"]["datasets"]["buckets"]:
+        dataset = {
+            "dataset_id": bucket["key"],
+            "run_count": bucket["doc_count"],
+            "failure_count": bucket["failures"]["doc_count"],
+            **_percentiles(bucket),
+        }
+        if "daily" in bucket:
+            dataset["daily"] = [
+                {"date": day["key_as_string"], **_percentiles(day)}
+                for day in bucket["daily"]["buckets"]
+            ]
+        statistics.append(dataset)
+
+    statistics.sort(key=lambda dataset: dataset["duration_p95"] or 0, reverse=True)
+    return JSONResponse(status_code=status.HTTP_200_OK, content=statistics)
+
+
+def _run_filters(datasource_id: Optional[str], dataset_id: Optional[str]) -> list:
+    filters = []
+    if datasource_id:
+        filters.append({"term": {"datasource_id": datasource_id}})
+    if dataset_id:
+        filters.append({"term": {"dataset_id": dataset_id}})
+    return filters
+
+
+def _percentiles(bucket: dict) -> dict:
+    return {
+        "duration_p50": bucket["duration"]["values"]["50.0"],
+        "duration_p95": bucket["duration"]["values"]["95.0"],
+        "start_delay_p50": bucket["start_delay"]["values"]["50.0"],
+        "start_delay_p95": bucket["start_delay"]["values"]["95.0"],
+    }
+
+
 @router.get("/{schedule_id}")
 def get_schedule(
     schedule_id: str,
@@ -1,107 +1,99 @@
+from typing import Optional, Tuple
+
+from app import constants as c
+from app.core import rollups
+from app.core.response_cache import VALIDATIONS, response_cache
 from app.core.users import current_active_user
-from app.db.client import client
-from app.settings import settings
-from fastapi import APIRouter, HTTPException, status
+from app.db import repository
+from fastapi import APIRouter, HTTPException, Query, status
 from fastapi.param_functions import Depends
 from fastapi.responses import JSONResponse
 
 router = APIRouter(dependencies=[Depends(current_active_user)])
 
+VALIDATIONS_SORT = [{"run_date": "asc"}]
+
 
 @router.get("")
-def list_validations(
+async def list_validations(
     datasource_id: str,
     dataset_id: str,
+    limit: Optional[int] = Query(default=None, ge=1, le=repository.PAGE_SIZE),
+    cursor: Optional[str] = None,
 ):
-    validations_response = client.search(
-        index=settings.VALIDATION_INDEX,
-        body=validations_query_body(dataset_id, datasource_id),
+    validations, query = validations_search(
+        datasource_id=datasource_id, dataset_id=dataset_id
     )
-    validations_list = [
-        validation["_source"] for validation in validations_response["hits"]["hits"]
-    ]
+    hits, next_cursor = await validations.paginate(
+        query, VALIDATIONS_SORT, limit, cursor
+    )
+    validations_list = [validation["_source"] for validation in hits]
 
-    return JSONResponse(status_code=status.HTTP_200_OK, content=validations_list)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=validations_list,
+        headers={c.NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None,
+    )
 
 
 @router.get("/statistics")
-def validations(dataset_id: str):
+@response_cache.cached(ttl=60, tags=[VALIDATIONS])
+async def validations(dataset_id: str):
+    counts = {
+        "success_count": {"sum": {"field": "success_count"}},
+        "failure_count": {"sum": {"field": "failure_count"}},
+    }
     query = {
         "size": 0,
         "query": {
             "bool": {
-                "must": [
-                    {"match": {"dataset_id.keyword": dataset_id}},
-                    {"range": {"run_date": {"gte": "now-31d", "lte": "now"}}},
-                    {"match": {"exception_info.raised_exception": "false"}},
+                "filter": [
+                    {"term": {"scope": rollups.DATASET}},
+                    {"term": {"dataset_id": dataset_id}},
                 ]
             }
         },
         "aggs": {
             "31_day": {
-                "filter": {"range": {"run_date": {"gte": "now-31d", "lte": "now"}}},
-                "aggs": {"success_counts": {"terms": {"field": "success"}}},
+                "filter": rollup_window(rollups.DAILY, "now-31d/d"),
+                "aggs": counts,
             },
             "7_day": {
-                "filter": {"range": {"run_date": {"gte": "now-7d", "lte": "now"}}},
-                "aggs": {"success_counts": {"terms": {"field": "success"}}},
+                "filter": rollup_window(rollups.HOURLY, "now-7d/h"),
+                "aggs": counts,
             },
             "1_day": {
-                "filter": {
-                    "range": {"run_date": {"gte": "now-1d", "lte": "now"}},
-                },
-                "aggs": {
-                    "success_counts": {
-                        "terms": {"field": "success"},
-                    }
-                },
+                "filter": rollup_window(rollups.HOURLY, "now-1d/h"),
+                "aggs": counts,
             },
-            "validation_counts": {
-                "date_histogram": {
-                    "field": "run_date",
-                    "calendar_interval": "1d",
-                    "format": "yyyy-MM-dd'T'HH:mm:ssZZZZZ",  # yyyy-MM-dd HH:mm:ss.SSSSSSZZZZZ
-                },
+            "daily": {
+                "filter": rollup_window(rollups.DAILY, "now-31d/d"),
                 "aggs": {
-                    "1_day": {
-                        "terms": {
-                            "field": "success",
-                        }
+                    "validation_counts": {
+                        "date_histogram": {
+                            "field": "bucket",
+                            "calendar_interval": "1d",
+                            "format": "yyyy-MM-dd'T'HH:mm:ssZZZZZ",  # yyyy-MM-dd HH:mm:ss.SSSSSSZZZZZ
+                        },
+                        "aggs": counts,
                     }
                 },
             },
         },
     }
 
-    validation_stats = client.search(
-        index=settings.VALIDATION_INDEX,
-        body=query,
-    )
+    validation_stats = await repository.rollups.search(body=query)
 
     aggs = validation_stats["aggregations"]
 
     validations_dataset = []
-    for daily_bucket in aggs["validation_counts"]["buckets"]:
-        objective_pass_rate = calculate_objective_pass_rate(
-            buckets=daily_bucket["1_day"]["buckets"],
-            doc_count=daily_bucket["doc_count"],
-        )
+    for daily_bucket in aggs["daily"]["validation_counts"]["buckets"]:
+        objective_pass_rate = calculate_objective_pass_rate(daily_bucket)
         validations_dataset.append([daily_bucket["key_as_string"], objective_pass_rate])
 
-    one_day_metric = calculate_objective_pass_rate(
-        buckets=aggs["1_day"]["success_counts"]["buckets"],
-        doc_count=aggs["1_day"]["doc_count"],
-    )
-
-    seven_day_metric = calculate_objective_pass_rate(
-        buckets=aggs["7_day"]["success_counts"]["buckets"],
-        doc_count=aggs["7_day"]["doc_count"],
-    )
-
-    thirty_one_day_metric = calculate_objective_pass_rate(
-        buckets=aggs["31_day"]["success_counts"]["buckets"],
-        doc_count=aggs["31_day"]["doc_count"],
-    )
+    one_day_metric = calculate_objective_pass_rate(aggs["1_day"])
+    seven_day_metric = calculate_objective_pass_rate(aggs["7_day"])
+    thirty_one_day_metric = calculate_objective_pass_rate(aggs["31_day"])
 
     return JSONResponse(
         status_code=status.HTTP_200_OK,
@@ -114,11 +106,19 @@ def validations(dataset_id: str):
     )
 
 
+def validations_search(
+    datasource_id: str = None, dataset_id: str = None, period: int = 14
+) -> Tuple[repository.Repository, dict]:
+    """The validation indices of the period and the query of its validations."""
+    return repository.validations.since(period), validations_query_body(
+        datasource_id, dataset_id, period
+    )
+
+
 def validations_query_body(
     datasource_id: str = None, dataset_id: str = None, period: int = 14
 ):
     query = {
-        "size": 2000,
         "query": {
             "bool": {
                 "must": [
@@ -126,7 +126,6 @@ def validations_query_body(
                 ]
             }
         },
-        "sort": [{"run_date": "asc"}],
     }
     if not dataset_id and not datasource_id:
         raise HTTPException(
@@ -147,7 +146,18 @@ def validations_query_body(
     return query
 
 
-def calculate_objective_pass_rate(buckets: list, doc_count: int):
-    for bucket in buckets:
-        if bucket["key_as_string"] == "true":
-            return bucket["doc_count"] / doc_count * 100
+def calculate_objective_pass_rate(bucket: dict):
+    return rollups.pass_rate(
+        bucket["success_count"]["value"], bucket["failure_count"]["value"]
+    )
+
+
+def rollup_window(interval: str, since: str):
+    return {
+        "bool": {
+            "filter": [
+                {"term": {"interval": interval}},
+                {"range": {"bucket": {"gte": since, "lte": "now"}}},
+            ]
+        }
+    }
@@ -0,0 +1,60 @@
+import json
+import time
+
+from app import constants as c
+from app.core import validation_jobs
+from app.core.users import current_active_user
+from fastapi import APIRouter, HTTPException, status
+from fastapi.params import Depends
+from fastapi.responses import JSONResponse, StreamingResponse
+
+router = APIRouter(dependencies=[Depends(current_active_user)])
+
+FINISHED_STATUSES = [c.JOB_SUCCEEDED, c.JOB_FAILED, c.JOB_CANCELLED]
+
+
+@router.get("/{job_id}")
+def get_validation_job(job_id: str):
+    job = _get_job(job_id)
+    return JSONResponse(status_code=status.HTTP_200_OK, content=job)
+
+
+@router.get("/{job_id}/events")
+def stream_validation_job(job_id: str, poll_interval: float = 1):
+    """
+    Server-sent events stream that emits the job document each time its status
+    changes and closes once the job has finished.
+    """
+    job = _get_job(job_id)
+
+    def events():
+        current = job
+        last_status = None
+
+        while True:
+            if current is None:
+                yield "event: error\ndata: job expired\n\n"
+                return
+
+            if current["status"] != last_status:
+                last_status = current["status"]
+                yield f"data: {json.dumps(current)}\n\n"
+
+            if last_status in FINISHED_STATUSES:
+                return
+
+            time.sleep(poll_interval)
+            current = validation_jobs.get(job_id)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def _get_job(job_id: str):
+    job = validation_jobs.get(job_id)
+
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"validation job with id '{job_id}' does not exist",
+        )
+    return job
@@ -7,6 +7,7 @@ from app.api.api_v1.endpoints import (
     metrics,
     schedule,
     validation,
+    validation_job,
 )
 from fastapi import APIRouter
 
@@ -16,6 +17,9 @@ router.include_router(datasource.router, prefix="/datasources", tags=["Data Sour
 router.include_router(dataset.router, prefix="/datasets", tags=["Datasets"])
 router.include_router(expectation.router, prefix="/expectations", tags=["Expectations"])
 router.include_router(validation.router, prefix="/validations", tags=["Validations"])
+router.include_router(
+    validation_job.router, prefix="/validation-jobs", tags=["Validation Jobs"]
+)
 router.include_router(introspect.router, prefix="/introspect", tags=["Introspect"])
 router.include_router(metrics.router, prefix="/metrics", tags=["Metrics"])
 router.include_router(schedule.router, prefix="/schedules", tags=["Schedule"])
@@ -11,6 +11,7 @@ COLUMN_INDEX = "If not None, checks the order of the columns. The expectation wi
 COLUMN_LIST = "The column names, in the correct order."
 COLUMN_SET = "The column names you wish to check. Column names are case sensitive."
 EXACT_MATCH = "Whether to make sure there are no extra columns in either the dataset or in the column_set."
+APPROXIMATE = "If True, the value is estimated with sketches (e.g. APPROX_COUNT_DISTINCT) instead of an exact distinct count or sort. Recommended for very large tables, the error bound is recorded in the result."
 MIN_VALUE = ""
 MAX_VALUE = ""
 
@@ -67,6 +68,16 @@ INTERVAL = "interval"
 CRON = "cron"
 DATE = "date"
 
+# Scheduler job store and executor for internal (non-dataset) jobs
+SYSTEM = "system"
+
+# Validation job statuses
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
 # Scheduler Descriptions
 MAX_INSTANCES = (
     "The maximum number of concurrently executing instances allowed for this schedule"
@@ -95,3 +106,6 @@ WEEKS = "Number of weeks to wait"
 
 # DateTrigger
 RUN_DATE = "The date/time to run the schedule at"
+
+# Response header with the cursor of the next page of a list endpoint.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
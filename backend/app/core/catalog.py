@@ -0,0 +1,142 @@
+import datetime
+from typing import Callable, List, Optional
+
+import sqlalchemy as sa
+from app import utils
+from app.db import engines
+from app.db.client import client
+from app.models.datasource import get_datasource
+from app.settings import settings
+from opensearchpy import NotFoundError
+
+SCHEMAS = "schemas"
+TABLES = "tables"
+COLUMNS = "columns"
+
+
+def list_schemas(datasource, refresh: bool = False) -> List[str]:
+    return _cached_entries(
+        datasource=datasource,
+        level=SCHEMAS,
+        loader=lambda inspector: inspector.get_schema_names(),
+        refresh=refresh,
+    )
+
+
+def list_tables(datasource, schema: str, refresh: bool = False) -> List[str]:
+    return _cached_entries(
+        datasource=datasource,
+        level=TABLES,
+        loader=lambda inspector: inspector.get_table_names(schema=schema),
+        refresh=refresh,
+        schema=schema,
+    )
+
+
+def list_columns(
+    datasource, schema: str, table: str, refresh: bool = False
+) -> List[dict]:
+    def loader(inspector):
+        return [
+            {"name": column["name"], "type": str(column["type"])}
+            for column in inspector.get_columns(schema=schema, table_name=table)
+        ]
+
+    return _cached_entries(
+        datasource=datasource,
+        level=COLUMNS,
+        loader=loader,
+        refresh=refresh,
+        schema=schema,
+        table=table,
+    )
+
+
+def paginate(
+    entries: list,
+    prefix: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    key: Callable = lambda entry: entry,
+) -> list:
+    """Case-insensitive prefix search followed by offset/limit pagination."""
+    if prefix:
+        prefix = prefix.lower()
+        entries = [entry for entry in entries if key(entry).lower().startswith(prefix)]
+
+    if limit is None:
+        return entries[offset:]
+    return entries[offset : offset + limit]
+
+
+def invalidate(datasource_id: str):
+    """Removes every cached catalog entry for a datasource."""
+    client.delete_by_query(
+        index=settings.CATALOG_INDEX,
+        body={"query": {"term": {"datasource_id": datasource_id}}},
+        ignore=[404],
+    )
+
+
+def refresh_all():
+    """
+    Reloads the cached schemas and tables of every datasource. Columns are
+    refreshed lazily when they expire, as there can be millions of them.
+    """
+    datasources = client.search(
+        index=settings.DATASOURCE_INDEX,
+        size=1000,
+        body={"query": {"match_all": {}}, "_source": False},
+    )["hits"]["hits"]
+
+    for doc in datasources:
+        try:
+            datasource = get_datasource(key=doc["_id"], decrypt_pw=True)
+            for schema in list_schemas(datasource, refresh=True):
+                list_tables(datasource, schema, refresh=True)
+        except Exception as ex:
+            print(f"Catalog refresh failed for datasource '{doc['_id']}': {ex}")
+
+
+def _cached_entries(
+    datasource,
+    level: str,
+    loader: Callable,
+    refresh: bool,
+    schema: str = None,
+    table: str = None,
+):
+    doc_id = "__".join(
+        part for part in [datasource.key, level, schema, table] if part is not None
+    )
+
+    if not refresh:
+        try:
+            doc = client.get(index=settings.CATALOG_INDEX, id=doc_id)["_source"]
+            if not _is_expired(doc["refreshed_at"]):
+                return doc["entries"]
+        except NotFoundError:
+            pass
+
+    inspector = sa.inspect(engines.get_engine(datasource))
+    entries = loader(inspector)
+
+    client.index(
+        index=settings.CATALOG_INDEX,
+        id=doc_id,
+        body={
+            "datasource_id": datasource.key,
+            "level": level,
+            "schema": schema,
+            "table": table,
+            "entries": entries,
+            "refreshed_at": utils.current_time(),
+        },
+    )
+    return entries
+
+
+def _is_expired(refreshed_at: str) -> bool:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    age = now - datetime.datetime.fromisoformat(refreshed_at)
+    return age.total_seconds() > settings.CATALOG_TTL_SECONDS
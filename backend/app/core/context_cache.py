@@ -0,0 +1,122 @@
+import contextlib
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from app.db.engines import fingerprint
+from app.settings import settings
+from great_expectations.data_context import BaseDataContext
+
+
+class DataContextCache:
+    """
+    Process-wide cache of idle GE DataContexts keyed by datasource id and a
+    connection string fingerprint.
+
+    Reusing a context keeps its SqlAlchemyExecutionEngine, and therefore its
+    connection pool, alive between profile, sample and validate calls. A
+    context is leased to one caller at a time: GE keeps the data of a batch
+    on the execution engine under an id shared by every batch of a dataset,
+    so validations running at once each need a context of their own. One is
+    created when none is idle.
+
+    Idle contexts are dropped when they have been idle for longer than
+    ``ttl`` seconds, when more than ``max_size`` are idle or when the
+    datasource is invalidated. Leased contexts of an invalidated datasource
+    are dropped when they're returned.
+    """
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._idle: "OrderedDict[int, tuple]" = OrderedDict()
+        self._generations: Dict[Optional[str], int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def lease(
+        self,
+        datasource_id: Optional[str],
+        connection_string: str,
+        factory: Callable[[], BaseDataContext],
+    ) -> Iterator[BaseDataContext]:
+        key = (datasource_id, fingerprint(connection_string))
+        context, generation = self._take(key)
+
+        if context is None:
+            context = factory()
+
+        try:
+            yield context
+        finally:
+            self._give_back(key, context, generation)
+
+    def invalidate(self, datasource_id: str):
+        """Drops every context that belongs to ``datasource_id``."""
+        with self._lock:
+            self._generations[datasource_id] += 1
+            for id, (key, context, __) in list(self._idle.items()):
+                if key[0] == datasource_id:
+                    del self._idle[id]
+                    self._dispose(context)
+
+    def clear(self):
+        with self._lock:
+            while self._idle:
+                __, (__, context, __) = self._idle.popitem()
+                self._dispose(context)
+
+    def _take(
+        self, key: Tuple[Optional[str], str]
+    ) -> Tuple[Optional[BaseDataContext], int]:
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            generation = self._generations[key[0]]
+
+            for id, (entry_key, context, __) in reversed(self._idle.items()):
+                if entry_key == key:
+                    del self._idle[id]
+                    return context, generation
+
+        return None, generation
+
+    def _give_back(
+        self,
+        key: Tuple[Optional[str], str],
+        context: BaseDataContext,
+        generation: int,
+    ):
+        with self._lock:
+            if self.max_size > 0 and generation == self._generations[key[0]]:
+                self._idle[id(context)] = (key, context, time.monotonic())
+
+                while len(self._idle) > self.max_size:
+                    __, (__, evicted, __) = self._idle.popitem(last=False)
+                    self._dispose(evicted)
+                return
+
+        self._dispose(context)
+
+    def _evict_expired(self, now: float):
+        expired = [
+            id
+            for id, (__, __, last_used) in self._idle.items()
+            if now - last_used > self.ttl
+        ]
+        for id in expired:
+            self._dispose(self._idle.pop(id)[1])
+
+    @staticmethod
+    def _dispose(context: BaseDataContext):
+        for datasource in context.datasources.values():
+            execution_engine = getattr(datasource, "execution_engine", None)
+            engine = getattr(execution_engine, "engine", None)
+            if engine is not None:
+                engine.dispose()
+
+
+context_cache = DataContextCache(
+    max_size=settings.RUNNER_CONTEXT_CACHE_SIZE,
+    ttl=settings.RUNNER_CONTEXT_CACHE_TTL_SECONDS,
+)
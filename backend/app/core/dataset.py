@@ -1,3 +1,6 @@
+import datetime
+
+import sqlalchemy as sa
 from app.models.dataset import Dataset
 
 
@@ -12,3 +15,22 @@ def split_dataset_resource(dataset: Dataset):
         is_virtual = False
 
     return dataset_schema, dataset_name, is_virtual
+
+
+def dataset_selectable(dataset: Dataset, alias: str):
+    """Returns the dataset's table, or its runtime query as a named subquery."""
+    if dataset.runtime_parameters:
+        query = dataset.runtime_parameters.query.replace(";", "").strip()
+        return sa.text(query).columns().subquery(alias)
+
+    schema, table, __ = split_dataset_resource(dataset)
+    return sa.table(table, schema=schema)
+
+
+def sql_literal(value):
+    """Returns a literal that can be rendered inline by every dialect."""
+    if isinstance(value, datetime.datetime):
+        return sa.cast(sa.literal(value.isoformat(sep=" ")), sa.DateTime)
+    if isinstance(value, datetime.date):
+        return sa.cast(sa.literal(value.isoformat()), sa.Date)
+    return sa.literal(value)
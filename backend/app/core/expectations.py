@@ -1,22 +1,42 @@
+import functools
+from typing import List, Tuple
+
 from app.models import expectation as exp
 from app.utils import json_schema_to_single_doc
 from great_expectations.core.expectation_configuration import ExpectationConfiguration
 
 
+@functools.lru_cache(maxsize=None)
+def expectation_schemas() -> Tuple[dict, ...]:
+    """
+    The JSON schemas of the supported expectations with their $refs resolved.
+    Models don't change at runtime, so schemas are built once per process and
+    must not be modified.
+    """
+    return tuple(
+        json_schema_to_single_doc(expectation.schema())
+        for expectation in exp.type_map.values()
+    )
+
+
 def supported_unsupported_expectations():
-    supported_expectations = []
-    for expectation in exp.type_map.values():
-        json_schema = json_schema_to_single_doc(expectation.schema())
-        expectation_type = json_schema["properties"]["expectation_type"]["default"]
-        supported_expectations.append(expectation_type)
+    supported_expectations, unsupported_expectations = _supported_unsupported()
+    return {
+        "supported_expectations": list(supported_expectations),
+        "unsupported_expectations": list(unsupported_expectations),
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _supported_unsupported() -> Tuple[List[str], List[str]]:
+    supported_expectations = [
+        json_schema["properties"]["expectation_type"]["default"]
+        for json_schema in expectation_schemas()
+    ]
     ge_expectations = ExpectationConfiguration.kwarg_lookup_dict.keys()
     unsupported_expectations = [
         ge_expectation
         for ge_expectation in ge_expectations
         if ge_expectation not in supported_expectations
     ]
-
-    return {
-        "supported_expectations": supported_expectations,
-        "unsupported_expectations": unsupported_expectations,
-    }
+    return supported_expectations, unsupported_expectations
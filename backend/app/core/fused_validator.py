@@ -0,0 +1,478 @@
+import traceback
+
+import sqlalchemy as sa
+from app import constants as c
+from app.core.dataset import dataset_selectable
+from app.core.sketches import HyperLogLog, TDigest
+from app.models.datasource import ATHENA, MYSQL, POSTGRESQL, REDSHIFT, SNOWFLAKE, TRINO
+from app.settings import settings
+
+# Expectations that can be answered from a single aggregate SELECT.
+COLUMN_MAP_EXPECTATIONS = [
+    c.EXPECT_COLUMN_VALUES_TO_NOT_BE_NULL,
+    c.EXPECT_COLUMN_VALUES_TO_BE_NULL,
+    c.EXPECT_COLUMN_VALUES_TO_BE_IN_SET,
+    c.EXPECT_COLUMN_VALUES_TO_NOT_BE_IN_SET,
+    c.EXPECT_COLUMN_VALUES_TO_BE_BETWEEN,
+    c.EXPECT_COLUMN_VALUE_LENGTHS_TO_BE_BETWEEN,
+    c.EXPECT_COLUMN_VALUE_LENGTHS_TO_EQUAL,
+    c.EXPECT_COLUMN_VALUES_TO_MATCH_REGEX,
+    c.EXPECT_COLUMN_VALUES_TO_NOT_MATCH_REGEX,
+    c.EXPECT_COLUMN_VALUES_TO_MATCH_REGEX_LIST,
+    c.EXPECT_COLUMN_VALUES_TO_NOT_MATCH_REGEX_LIST,
+]
+
+COLUMN_AGGREGATE_EXPECTATIONS = [
+    c.EXPECT_COLUMN_MEAN_TO_BE_BETWEEN,
+    c.EXPECT_COLUMN_SUM_TO_BE_BETWEEN,
+    c.EXPECT_COLUMN_MIN_TO_BE_BETWEEN,
+    c.EXPECT_COLUMN_MAX_TO_BE_BETWEEN,
+    c.EXPECT_COLUMN_UNIQUE_VALUE_COUNT_TO_BE_BETWEEN,
+    c.EXPECT_COLUMN_PROPORTION_OF_UNIQUE_VALUES_TO_BE_BETWEEN,
+]
+
+TABLE_EXPECTATIONS = [
+    c.EXPECT_TABLE_ROW_COUNT_TO_BE_BETWEEN,
+    c.EXPECT_TABLE_ROW_COUNT_TO_EQUAL,
+]
+
+# Expectations that can be estimated with sketches when "approximate" is set.
+APPROXIMATE_EXPECTATIONS = [
+    c.EXPECT_COLUMN_UNIQUE_VALUE_COUNT_TO_BE_BETWEEN,
+    c.EXPECT_COLUMN_PROPORTION_OF_UNIQUE_VALUES_TO_BE_BETWEEN,
+    c.EXPECT_COLUMN_MEDIAN_TO_BE_BETWEEN,
+]
+
+REGEX_EXPECTATIONS = [
+    c.EXPECT_COLUMN_VALUES_TO_MATCH_REGEX,
+    c.EXPECT_COLUMN_VALUES_TO_NOT_MATCH_REGEX,
+    c.EXPECT_COLUMN_VALUES_TO_MATCH_REGEX_LIST,
+    c.EXPECT_COLUMN_VALUES_TO_NOT_MATCH_REGEX_LIST,
+]
+
+SUPPORTED_EXPECTATIONS = (
+    COLUMN_MAP_EXPECTATIONS + COLUMN_AGGREGATE_EXPECTATIONS + TABLE_EXPECTATIONS
+)
+
+# Engines where a regular expression search can be pushed down.
+REGEX_ENGINES = [POSTGRESQL, REDSHIFT, MYSQL, SNOWFLAKE, TRINO, ATHENA]
+
+
+def _regex_search(engine: str, column, pattern: str):
+    """
+    Returns a boolean SQL expression that is true when the pattern is found
+    anywhere in the column value, matching GE's "search" semantics.
+    """
+    if engine in [POSTGRESQL, REDSHIFT]:
+        return column.op("~")(pattern)
+    if engine == MYSQL:
+        return column.op("REGEXP")(pattern)
+    if engine == SNOWFLAKE:
+        # REGEXP_LIKE/RLIKE are implicitly anchored in Snowflake
+        return sa.func.regexp_instr(column, pattern) > 0
+    # Trino and Athena
+    return sa.func.regexp_like(column, pattern)
+
+
+def _count_if(condition):
+    return sa.func.sum(sa.case((condition, 1), else_=0))
+
+
+def _outside_bounds(value, min_value, max_value, strict_min=False, strict_max=False):
+    conditions = []
+    if min_value is not None:
+        conditions.append(value <= min_value if strict_min else value < min_value)
+    if max_value is not None:
+        conditions.append(value >= max_value if strict_max else value > max_value)
+    if not conditions:
+        return sa.false()
+    return sa.or_(*conditions)
+
+
+def _within_bounds(value, min_value, max_value, strict_min=False, strict_max=False):
+    if value is None:
+        return False
+    if min_value is not None:
+        if value < min_value or (strict_min and value == min_value):
+            return False
+    if max_value is not None:
+        if value > max_value or (strict_max and value == max_value):
+            return False
+    return True
+
+
+class FusedValidator:
+    """
+    Evaluates the column-level expectations of a suite with a single aggregate
+    SELECT against the dataset and returns GE compatible result documents.
+
+    Expectations that cannot be expressed as an aggregate (or not for this
+    engine) are left for Great Expectations; see ``FusedValidator.supports``.
+    """
+
+    def __init__(self, datasource, batch, engine: sa.engine.Engine):
+        self.datasource = datasource
+        self.batch = batch
+        self.engine = engine
+
+    @staticmethod
+    def is_approximate(expectation_configuration: dict) -> bool:
+        """Approximate expectations are only evaluated by this validator."""
+        return (
+            bool(expectation_configuration["kwargs"].get("approximate"))
+            and expectation_configuration["expectation_type"]
+            in APPROXIMATE_EXPECTATIONS
+        )
+
+    def supports(self, expectation_configuration: dict) -> bool:
+        expectation_type = expectation_configuration["expectation_type"]
+        kwargs = expectation_configuration["kwargs"]
+
+        if self.is_approximate(expectation_configuration):
+            return True
+
+        if expectation_type not in SUPPORTED_EXPECTATIONS:
+            return False
+
+        if kwargs.get("parse_strings_as_datetimes") or kwargs.get(
+            "output_strftime_format"
+        ):
+            return False
+
+        if expectation_type in REGEX_EXPECTATIONS:
+            return self.datasource.engine in REGEX_ENGINES
+
+        return True
+
+    def validate(self, expectation_configurations: list) -> list:
+        if not expectation_configurations:
+            return []
+
+        selectable = dataset_selectable(self.batch, "swiple_fused")
+        row_count = sa.func.count().label("row_count")
+        columns = [row_count]
+        # labels estimated with sketches, and labels that have to be
+        # estimated in python while streaming the dataset
+        self._approximations = {}
+        self._streamed_sketches = {}
+        result_builders = [
+            self._compile(i, configuration, columns)
+            for i, configuration in enumerate(expectation_configurations)
+        ]
+
+        query = sa.select(*columns).select_from(selectable)
+
+        try:
+            with self.engine.connect() as connection:
+                row = dict(connection.execute(query).mappings().one())
+                if self._streamed_sketches:
+                    row.update(self._stream_sketches(connection, selectable))
+        except Exception as ex:
+            if len(expectation_configurations) > 1:
+                # One bad aggregate, e.g. on a dropped column or with an
+                # invalid regex, fails the whole query, so each expectation
+                # is evaluated on its own to isolate it.
+                return [
+                    result
+                    for configuration in expectation_configurations
+                    for result in self.validate([configuration])
+                ]
+
+            exception_traceback = traceback.format_exc()
+            return [
+                self._exception_result(configuration, ex, exception_traceback)
+                for configuration in expectation_configurations
+            ]
+
+        return [build_result(row) for build_result in result_builders]
+
+    def _compile(self, i: int, configuration: dict, columns: list):
+        """
+        Appends the labelled aggregates required by ``configuration`` to
+        ``columns`` and returns a callable that builds the GE result from the
+        fetched row.
+        """
+        expectation_type = configuration["expectation_type"]
+        kwargs = configuration["kwargs"]
+
+        def label(name):
+            return f"e{i}_{name}"
+
+        if expectation_type in TABLE_EXPECTATIONS:
+            return lambda row: self._table_result(configuration, row)
+
+        column = sa.column(kwargs["column"])
+        columns.append(sa.func.count(column).label(label("nonnull")))
+
+        if kwargs.get("approximate") and expectation_type in APPROXIMATE_EXPECTATIONS:
+            self._approximate(expectation_type, kwargs["column"], label, columns)
+            return lambda row: self._aggregate_result(configuration, row, label)
+
+        if expectation_type in COLUMN_AGGREGATE_EXPECTATIONS:
+            columns.append(
+                self._aggregate(expectation_type, column).label(label("value"))
+            )
+            return lambda row: self._aggregate_result(configuration, row, label)
+
+        unexpected = self._unexpected_condition(expectation_type, kwargs, column)
+        if unexpected is not None:
+            columns.append(_count_if(unexpected).label(label("unexpected")))
+
+        return lambda row: self._column_map_result(configuration, row, label)
+
+    def _approximate(self, expectation_type: str, column_name: str, label, columns):
+        """
+        Uses the engine's sketch function when it has one, otherwise the value
+        is estimated with a python sketch in ``_stream_sketches``.
+        """
+        quoted = self.engine.dialect.identifier_preparer.quote(column_name)
+
+        if expectation_type == c.EXPECT_COLUMN_MEDIAN_TO_BE_BETWEEN:
+            native = self.datasource.approx_median(quoted)
+            sketch, error_type = TDigest, "rank"
+        else:
+            native = self.datasource.approx_count_distinct(quoted)
+            sketch, error_type = HyperLogLog, "relative"
+
+        if native:
+            expression, error_bound = native
+            columns.append(sa.literal_column(expression).label(label("value")))
+            self._approximations[label("value")] = {
+                "approximate": True,
+                "method": expression.split("(")[0],
+                "error_bound": error_bound,
+                "error_type": error_type,
+            }
+            return
+
+        instance = sketch()
+        self._streamed_sketches[label("value")] = (column_name, instance)
+        self._approximations[label("value")] = {
+            "approximate": True,
+            "method": sketch.__name__,
+            "error_bound": instance.rank_error
+            if sketch is TDigest
+            else instance.relative_error,
+            "error_type": error_type,
+        }
+
+    def _stream_sketches(self, connection, selectable) -> dict:
+        """
+        Streams the columns that need a python sketch in a single scan and
+        returns the estimates by label.
+        """
+        column_names = sorted(
+            {column_name for column_name, __ in self._streamed_sketches.values()}
+        )
+        query = sa.select(*[sa.column(name) for name in column_names]).select_from(
+            selectable
+        )
+        result = connection.execution_options(stream_results=True).execute(query)
+
+        by_column = {}
+        for column_name, sketch in self._streamed_sketches.values():
+            by_column.setdefault(column_names.index(column_name), []).append(sketch)
+
+        for rows in result.partitions(settings.RUNNER_SKETCH_STREAM_BATCH_SIZE):
+            for row in rows:
+                for i, sketches in by_column.items():
+                    value = row[i]
+                    if value is None:
+                        continue
+                    for sketch in sketches:
+                        sketch.add(
+                            float(value) if isinstance(sketch, TDigest) else value
+                        )
+
+        return {
+            label: sketch.quantile(0.5)
+            if isinstance(sketch, TDigest)
+            else sketch.count()
+            for label, (__, sketch) in self._streamed_sketches.items()
+        }
+
+    def _aggregate(self, expectation_type: str, column):
+        if expectation_type == c.EXPECT_COLUMN_MEAN_TO_BE_BETWEEN:
+            return sa.func.avg(column)
+        if expectation_type == c.EXPECT_COLUMN_SUM_TO_BE_BETWEEN:
+            return sa.func.sum(column)
+        if expectation_type == c.EXPECT_COLUMN_MIN_TO_BE_BETWEEN:
+            return sa.func.min(column)
+        if expectation_type == c.EXPECT_COLUMN_MAX_TO_BE_BETWEEN:
+            return sa.func.max(column)
+        # unique value count and proportion of unique values
+        return sa.func.count(sa.distinct(column))
+
+    def _unexpected_condition(self, expectation_type: str, kwargs: dict, column):
+        engine = self.datasource.engine
+
+        if expectation_type in [
+            c.EXPECT_COLUMN_VALUES_TO_NOT_BE_NULL,
+            c.EXPECT_COLUMN_VALUES_TO_BE_NULL,
+        ]:
+            # derived from row_count and nonnull
+            return None
+        if expectation_type == c.EXPECT_COLUMN_VALUES_TO_BE_IN_SET:
+            return column.notin_(kwargs["value_set"])
+        if expectation_type == c.EXPECT_COLUMN_VALUES_TO_NOT_BE_IN_SET:
+            return column.in_(kwargs["value_set"])
+        if expectation_type == c.EXPECT_COLUMN_VALUES_TO_BE_BETWEEN:
+            return _outside_bounds(
+                column,
+                kwargs.get("min_value"),
+                kwargs.get("max_value"),
+                kwargs.get("strict_min", False),
+                kwargs.get("strict_max", False),
+            )
+
+        length = (
+            sa.func.char_length(column) if engine == MYSQL else sa.func.length(column)
+        )
+        if expectation_type == c.EXPECT_COLUMN_VALUE_LENGTHS_TO_BE_BETWEEN:
+            return _outside_bounds(
+                length, kwargs.get("min_value"), kwargs.get("max_value")
+            )
+        if expectation_type == c.EXPECT_COLUMN_VALUE_LENGTHS_TO_EQUAL:
+            return length != kwargs["value"]
+        if expectation_type == c.EXPECT_COLUMN_VALUES_TO_MATCH_REGEX:
+            return sa.not_(_regex_search(engine, column, kwargs["regex"]))
+        if expectation_type == c.EXPECT_COLUMN_VALUES_TO_NOT_MATCH_REGEX:
+            return _regex_search(engine, column, kwargs["regex"])
+
+        matches = [
+            _regex_search(engine, column, regex) for regex in kwargs["regex_list"]
+        ]
+        combine = sa.and_ if kwargs.get("match_on", "any") == "all" else sa.or_
+        if expectation_type == c.EXPECT_COLUMN_VALUES_TO_MATCH_REGEX_LIST:
+            return sa.not_(combine(*matches))
+        # expect_column_values_to_not_match_regex_list
+        return sa.or_(*matches)
+
+    def _table_result(self, configuration: dict, row) -> dict:
+        kwargs = configuration["kwargs"]
+        observed_value = row["row_count"]
+
+        if configuration["expectation_type"] == c.EXPECT_TABLE_ROW_COUNT_TO_EQUAL:
+            success = observed_value == kwargs["value"]
+        else:
+            success = _within_bounds(
+                observed_value, kwargs.get("min_value"), kwargs.get("max_value")
+            )
+
+        return self._result(configuration, success, {"observed_value": observed_value})
+
+    def _aggregate_result(self, configuration: dict, row, label) -> dict:
+        kwargs = configuration["kwargs"]
+        nonnull_count = row[label("nonnull")]
+        observed_value = row[label("value")]
+
+        if (
+            configuration["expectation_type"]
+            == c.EXPECT_COLUMN_PROPORTION_OF_UNIQUE_VALUES_TO_BE_BETWEEN
+        ):
+            observed_value = observed_value / nonnull_count if nonnull_count else None
+
+        if observed_value is not None and not isinstance(observed_value, (int, float)):
+            # Decimal, date and datetime values
+            try:
+                observed_value = float(observed_value)
+            except (TypeError, ValueError):
+                observed_value = str(observed_value)
+
+        try:
+            success = _within_bounds(
+                observed_value,
+                kwargs.get("min_value"),
+                kwargs.get("max_value"),
+                kwargs.get("strict_min", False),
+                kwargs.get("strict_max", False),
+            )
+        except TypeError:
+            success = False
+
+        result = {"observed_value": observed_value, "element_count": row["row_count"]}
+        if label("value") in self._approximations:
+            result["details"] = self._approximations[label("value")]
+
+        return self._result(configuration, success, result)
+
+    def _column_map_result(self, configuration: dict, row, label) -> dict:
+        expectation_type = configuration["expectation_type"]
+        kwargs = configuration["kwargs"]
+        element_count = row["row_count"] or 0
+        nonnull_count = row[label("nonnull")] or 0
+        missing_count = element_count - nonnull_count
+
+        if expectation_type == c.EXPECT_COLUMN_VALUES_TO_NOT_BE_NULL:
+            unexpected_count = missing_count
+            denominator = element_count
+        elif expectation_type == c.EXPECT_COLUMN_VALUES_TO_BE_NULL:
+            unexpected_count = nonnull_count
+            denominator = element_count
+        else:
+            unexpected_count = row[label("unexpected")] or 0
+            denominator = nonnull_count
+
+        mostly = kwargs.get("mostly", 1)
+        if denominator:
+            unexpected_percent = unexpected_count / denominator * 100
+            success = (denominator - unexpected_count) / denominator >= mostly
+        else:
+            unexpected_percent = None
+            success = True
+
+        result = {
+            "element_count": element_count,
+            "unexpected_count": unexpected_count,
+            "unexpected_percent": unexpected_percent,
+            "partial_unexpected_list": [],
+        }
+
+        if expectation_type not in [
+            c.EXPECT_COLUMN_VALUES_TO_NOT_BE_NULL,
+            c.EXPECT_COLUMN_VALUES_TO_BE_NULL,
+        ]:
+            result.update(
+                {
+                    "missing_count": missing_count,
+                    "missing_percent": missing_count / element_count * 100
+                    if element_count
+                    else None,
+                    "unexpected_percent_total": unexpected_count / element_count * 100
+                    if element_count
+                    else None,
+                    "unexpected_percent_nonmissing": unexpected_percent,
+                }
+            )
+
+        return self._result(configuration, success, result)
+
+    @staticmethod
+    def _result(configuration: dict, success: bool, result: dict) -> dict:
+        return {
+            "success": bool(success),
+            "expectation_config": {
+                "expectation_type": configuration["expectation_type"],
+                "kwargs": dict(configuration["kwargs"]),
+                "meta": dict(configuration["meta"]),
+            },
+            "result": result,
+            "meta": {},
+            "exception_info": {
+                "raised_exception": False,
+                "exception_message": None,
+                "exception_traceback": None,
+            },
+        }
+
+    @staticmethod
+    def _exception_result(
+        configuration: dict, ex: Exception, exception_traceback: str
+    ) -> dict:
+        result = FusedValidator._result(configuration, False, {})
+        result["exception_info"] = {
+            "raised_exception": True,
+            "exception_message": str(ex),
+            "exception_traceback": exception_traceback,
+        }
+        return result
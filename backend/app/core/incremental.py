@@ -0,0 +1,275 @@
+import datetime
+import decimal
+from typing import Optional
+
+import sqlalchemy as sa
+from app import constants as c
+from app import utils
+from app.core.dataset import dataset_selectable, split_dataset_resource, sql_literal
+from app.core.fused_validator import _within_bounds
+from app.db.client import client
+from app.models.dataset import Dataset, RuntimeParameters
+from app.settings import settings
+from opensearchpy import ConflictError, NotFoundError
+
+# Expectations whose observed value over the whole dataset can be derived from
+# the previous total and the observed value over the new rows.
+ADDITIVE_EXPECTATIONS = {
+    c.EXPECT_TABLE_ROW_COUNT_TO_BE_BETWEEN: "sum",
+    c.EXPECT_TABLE_ROW_COUNT_TO_EQUAL: "sum",
+    c.EXPECT_COLUMN_SUM_TO_BE_BETWEEN: "sum",
+    c.EXPECT_COLUMN_MIN_TO_BE_BETWEEN: "min",
+    c.EXPECT_COLUMN_MAX_TO_BE_BETWEEN: "max",
+}
+
+# Counts of column map expectations accumulated in the state document.
+ROLLING_COUNTS = ["element_count", "missing_count", "unexpected_count"]
+
+
+class Window:
+    """
+    The rows of an incremental run: those with a watermark column value past
+    the stored high-water mark and up to the mark observed when the run began.
+    """
+
+    def __init__(
+        self,
+        dataset_id: str,
+        dataset: Dataset,
+        engine: sa.engine.Engine,
+        state: dict,
+        upper,
+    ):
+        self.dataset_id = dataset_id
+        self.dataset = dataset
+        self.engine = engine
+        self.state = state
+        self.lower = _decode(state.get("watermark"))
+        self.upper = upper
+
+    def is_empty(self) -> bool:
+        """
+        True when no rows were added since the last run. A dataset that was
+        empty in its first run still has its expectations validated.
+        """
+        return self.lower is not None and not self.upper > self.lower
+
+    def batch(self) -> Dataset:
+        """
+        Returns a copy of the dataset whose runtime query only selects the rows
+        of the window, so both the fused and GE validation paths use it.
+        """
+        column = sa.column(self.dataset.watermark_column)
+        query = sa.select(sa.text("*")).select_from(
+            dataset_selectable(self.dataset, "swiple_incremental")
+        )
+
+        if self.upper is None:
+            # empty dataset
+            query = query.where(sa.false())
+        else:
+            query = query.where(column <= sql_literal(self.upper))
+            if self.lower is not None:
+                query = query.where(column > sql_literal(self.lower))
+
+        compiled = query.compile(
+            dialect=self.engine.dialect, compile_kwargs={"literal_binds": True}
+        )
+        schema, __, __ = split_dataset_resource(self.dataset)
+
+        batch = self.dataset.copy(deep=True)
+        batch.runtime_parameters = RuntimeParameters(schema=schema, query=str(compiled))
+        return batch
+
+    def commit(self, results: list) -> list:
+        """
+        Merges the run's additive metrics into the rolling state, rewrites the
+        results of additive expectations to describe the whole dataset and
+        advances the high-water mark.
+
+        The state is left untouched when an expectation raised an exception so
+        the next run validates the same rows again.
+        """
+        if any(result["exception_info"]["raised_exception"] for result in results):
+            return results
+
+        metrics = self.state.get("metrics", {})
+
+        for result in results:
+            expectation_id = result["expectation_id"]
+            config = result["expectation_config"]
+            column = config["kwargs"].get("column")
+
+            previous = metrics.get(expectation_id)
+            if previous and (
+                previous["expectation_type"] != config["expectation_type"]
+                or previous.get("column") != column
+            ):
+                previous = None
+
+            merged = {"expectation_type": config["expectation_type"], "column": column}
+
+            merge = ADDITIVE_EXPECTATIONS.get(config["expectation_type"])
+            if merge:
+                merged["observed_value"] = _merge(
+                    merge,
+                    previous and previous.get("observed_value"),
+                    result["result"].get("observed_value"),
+                )
+                _rewrite_result(result, merged["observed_value"])
+            else:
+                for count in ROLLING_COUNTS:
+                    if count in result["result"]:
+                        merged[count] = (previous or {}).get(count, 0) + (
+                            result["result"][count] or 0
+                        )
+
+            metrics[expectation_id] = merged
+
+        if self.upper is not None:
+            self.state["watermark"] = _encode(self.upper)
+        self.state.update(
+            {
+                "watermark_column": self.dataset.watermark_column,
+                "metrics": metrics,
+                "modified_date": utils.current_time(),
+            }
+        )
+        _save_state(self.dataset_id, self.state)
+        return results
+
+
+def open_window(
+    dataset_id: str, dataset: Dataset, engine: sa.engine.Engine
+) -> Optional[Window]:
+    """
+    Returns the window of rows to validate for a dataset with a watermark
+    column, or None when the dataset is validated in full.
+    """
+    if not dataset.watermark_column:
+        return None
+
+    state = _get_state(dataset_id)
+    if state.get("watermark_column") != dataset.watermark_column:
+        state = {
+            "seq_no": state.get("seq_no"),
+            "primary_term": state.get("primary_term"),
+        }
+
+    column = sa.column(dataset.watermark_column)
+    query = sa.select(sa.func.max(column)).select_from(
+        dataset_selectable(dataset, "swiple_incremental")
+    )
+    with engine.connect() as connection:
+        upper = connection.execute(query).scalar()
+
+    if upper is None:
+        upper = _decode(state.get("watermark"))
+
+    return Window(dataset_id, dataset, engine, state, upper)
+
+
+def reset(dataset_id: str):
+    """Discards the rolling state so the next run validates the whole dataset."""
+    client.delete(
+        index=settings.VALIDATION_STATE_INDEX,
+        id=dataset_id,
+        refresh="wait_for",
+        ignore=[404],
+    )
+
+
+def _get_state(dataset_id: str) -> dict:
+    try:
+        doc = client.get(index=settings.VALIDATION_STATE_INDEX, id=dataset_id)
+    except NotFoundError:
+        return {}
+
+    return {
+        **doc["_source"],
+        "seq_no": doc["_seq_no"],
+        "primary_term": doc["_primary_term"],
+    }
+
+
+def _save_state(dataset_id: str, state: dict):
+    seq_no = state.pop("seq_no", None)
+    primary_term = state.pop("primary_term", None)
+
+    # Optimistic concurrency control, a concurrent run of the same dataset may
+    # have advanced the watermark since this run began.
+    params = {"op_type": "create"}
+    if seq_no is not None:
+        params = {"if_seq_no": seq_no, "if_primary_term": primary_term}
+
+    try:
+        client.index(
+            index=settings.VALIDATION_STATE_INDEX,
+            id=dataset_id,
+            body={"dataset_id": dataset_id, **state},
+            **params,
+        )
+    except ConflictError:
+        print(f"Validation state of dataset '{dataset_id}' changed during the run")
+
+
+def _merge(merge: str, previous, current):
+    if previous is None:
+        return current
+    if current is None:
+        return previous
+
+    try:
+        if merge == "sum":
+            return previous + current
+        if merge == "min":
+            return min(previous, current)
+        return max(previous, current)
+    except TypeError:
+        return current
+
+
+def _rewrite_result(result: dict, observed_value):
+    kwargs = result["expectation_config"]["kwargs"]
+
+    if (
+        result["expectation_config"]["expectation_type"]
+        == c.EXPECT_TABLE_ROW_COUNT_TO_EQUAL
+    ):
+        success = observed_value == kwargs["value"]
+    else:
+        try:
+            success = _within_bounds(
+                observed_value,
+                kwargs.get("min_value"),
+                kwargs.get("max_value"),
+                kwargs.get("strict_min", False),
+                kwargs.get("strict_max", False),
+            )
+        except TypeError:
+            success = False
+
+    result["success"] = bool(success)
+    result["result"]["observed_value"] = observed_value
+
+
+def _encode(value) -> dict:
+    if isinstance(value, datetime.datetime):
+        return {"type": "datetime", "value": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"type": "date", "value": value.isoformat()}
+    if isinstance(value, decimal.Decimal):
+        return {"type": "decimal", "value": str(value)}
+    return {"type": type(value).__name__, "value": value}
+
+
+def _decode(watermark: Optional[dict]):
+    if not watermark:
+        return None
+    if watermark["type"] == "datetime":
+        return datetime.datetime.fromisoformat(watermark["value"])
+    if watermark["type"] == "date":
+        return datetime.date.fromisoformat(watermark["value"])
+    if watermark["type"] == "decimal":
+        return decimal.Decimal(watermark["value"])
+    return watermark["value"]
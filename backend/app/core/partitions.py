@@ -0,0 +1,168 @@
+import datetime
+import hashlib
+import json
+from typing import Dict, Optional
+
+import sqlalchemy as sa
+from app import utils
+from app.core.dataset import dataset_selectable, split_dataset_resource, sql_literal
+from app.db.client import client
+from app.models.dataset import Dataset, RuntimeParameters
+from app.settings import settings
+from opensearchpy import NotFoundError
+
+NULL_PARTITION = "__null__"
+
+
+class PartitionPlan:
+    """
+    The partitions of a dataset that changed since they were last validated,
+    each with a batch that only selects the partition's rows.
+    """
+
+    def __init__(self, dataset_id: str, fingerprints: dict, changed: dict):
+        self.dataset_id = dataset_id
+        self.fingerprints = fingerprints
+        self.batches: Dict[str, Dataset] = changed
+
+    def commit(self, results: list):
+        """
+        Stores the fingerprints of the validated partitions. Partitions with an
+        expectation that raised an exception are validated again next run.
+        Partitions that fell out of the lookback are forgotten.
+        """
+        failed = {
+            result["partition"]
+            for result in results
+            if result["exception_info"]["raised_exception"]
+        }
+        state = {
+            partition: fingerprint
+            for partition, fingerprint in _get_state(self.dataset_id).items()
+            if partition in self.fingerprints
+        }
+        state.update(
+            {
+                partition: fingerprint
+                for partition, fingerprint in self.fingerprints.items()
+                if partition in self.batches and partition not in failed
+            }
+        )
+        client.index(
+            index=settings.VALIDATION_STATE_INDEX,
+            id=_state_id(self.dataset_id),
+            body={
+                "dataset_id": self.dataset_id,
+                "partitions": state,
+                "modified_date": utils.current_time(),
+            },
+        )
+
+
+def plan(
+    dataset_id: str,
+    dataset: Dataset,
+    engine: sa.engine.Engine,
+    expectations: list,
+) -> Optional[PartitionPlan]:
+    """
+    Enumerates the most recent partitions of a partitioned dataset, or returns
+    None when the dataset is validated as a single batch.
+
+    A partition's fingerprint is its row count, the latest value of the
+    change column when there is one, and the enabled expectations, so
+    partitions are only validated again when one of them changes.
+    """
+    if not dataset.partitioning:
+        return None
+
+    column = sa.column(dataset.partitioning.column)
+    aggregates = [column.label("partition"), sa.func.count().label("row_count")]
+    if dataset.partitioning.change_column:
+        change_column = sa.column(dataset.partitioning.change_column)
+        aggregates.append(sa.func.max(change_column).label("changed"))
+
+    query = (
+        sa.select(*aggregates)
+        .select_from(dataset_selectable(dataset, "swiple_partitions"))
+        .group_by(column)
+        .order_by(column.desc())
+        .limit(dataset.partitioning.lookback)
+    )
+    with engine.connect() as connection:
+        rows = connection.execute(query).all()
+
+    expectations_hash = _expectations_hash(expectations)
+    previous = _get_state(dataset_id)
+
+    fingerprints = {}
+    changed = {}
+    for value, row_count, *changed_at in rows:
+        partition = _partition_key(value)
+        fingerprint = [str(row_count), expectations_hash]
+        if changed_at:
+            fingerprint.insert(1, _partition_key(changed_at[0]))
+        fingerprints[partition] = ":".join(fingerprint)
+        if previous.get(partition) != fingerprints[partition]:
+            changed[partition] = _partition_batch(dataset, engine, value)
+
+    return PartitionPlan(dataset_id, fingerprints, changed)
+
+
+def reset(dataset_id: str):
+    """Forgets the partition fingerprints so every partition is validated again."""
+    client.delete(
+        index=settings.VALIDATION_STATE_INDEX,
+        id=_state_id(dataset_id),
+        refresh="wait_for",
+        ignore=[404],
+    )
+
+
+def _partition_batch(dataset: Dataset, engine: sa.engine.Engine, value) -> Dataset:
+    column = sa.column(dataset.partitioning.column)
+    query = (
+        sa.select(sa.text("*"))
+        .select_from(dataset_selectable(dataset, "swiple_partition"))
+        .where(column.is_(None) if value is None else column == sql_literal(value))
+    )
+    compiled = query.compile(
+        dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+    )
+    schema, __, __ = split_dataset_resource(dataset)
+
+    batch = dataset.copy(deep=True)
+    batch.runtime_parameters = RuntimeParameters(schema=schema, query=str(compiled))
+    return batch
+
+
+def _partition_key(value) -> str:
+    if value is None:
+        return NULL_PARTITION
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def _expectations_hash(expectations: list) -> str:
+    expectations = sorted(
+        [expectation["key"], expectation["expectation_type"], expectation["kwargs"]]
+        for expectation in expectations
+    )
+    return hashlib.sha256(
+        json.dumps(expectations, sort_keys=True, default=str).encode()
+    ).hexdigest()[:16]
+
+
+def _state_id(dataset_id: str) -> str:
+    return f"{dataset_id}__partitions"
+
+
+def _get_state(dataset_id: str) -> dict:
+    try:
+        doc = client.get(
+            index=settings.VALIDATION_STATE_INDEX, id=_state_id(dataset_id)
+        )
+    except NotFoundError:
+        return {}
+    return doc["_source"].get("partitions", {})
@@ -0,0 +1,327 @@
+import datetime
+import decimal
+import math
+
+import sqlalchemy as sa
+from app import constants as c
+from app.core.dataset import dataset_selectable
+from app.models.datasource import MYSQL
+from app.settings import settings
+
+NUMERIC = "numeric"
+STRING = "string"
+DATETIME = "datetime"
+BOOLEAN = "boolean"
+OTHER = "other"
+
+
+def _column_kind(values: list) -> str:
+    """Classifies a column from the python types of its sampled values."""
+    kinds = set()
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            kinds.add(BOOLEAN)
+        elif isinstance(value, (int, float, decimal.Decimal)):
+            kinds.add(NUMERIC)
+        elif isinstance(value, str):
+            kinds.add(STRING)
+        elif isinstance(value, (datetime.date, datetime.datetime)):
+            kinds.add(DATETIME)
+        else:
+            kinds.add(OTHER)
+
+    return kinds.pop() if len(kinds) == 1 else OTHER
+
+
+def _to_json(value):
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def _from_string(kind: str, sample_type: type, value: str):
+    """Converts a top-k value, read as a string, back to the column's type."""
+    if kind == BOOLEAN:
+        return value.lower() in ["true", "t", "1"]
+    if kind == NUMERIC:
+        return int(value) if sample_type is int else float(value)
+    return value
+
+
+class StatisticsProfiler:
+    """
+    Suggests expectations from column statistics computed with one aggregate
+    query over the dataset, and a second query for the top values of low
+    cardinality columns.
+
+    Distinct counts are estimated with the engine's approximate distinct
+    function when it has one. Columns that may be unique are counted exactly
+    in a further query, and columns with a value set are counted from it.
+
+    Column types are inferred from a small sample so, unlike GE's
+    UserConfigurableProfiler, the dataset never has to be materialized into a
+    temporary table.
+    """
+
+    def __init__(
+        self, datasource, batch, engine: sa.engine.Engine, excluded_expectations=[]
+    ):
+        self.datasource = datasource
+        self.batch = batch
+        self.engine = engine
+        self.excluded_expectations = excluded_expectations
+        # relative errors of the distinct counts that were estimated, by column
+        self._approximate_distinct = {}
+
+    def build_suite(self) -> list:
+        with self.engine.connect() as connection:
+            columns = self._columns(connection)
+            statistics = self._statistics(connection, columns)
+            self._count_unique_candidates(connection, columns, statistics)
+            value_sets = self._value_sets(connection, columns, statistics)
+
+        for column in columns:
+            value_set = value_sets.get(column["name"])
+            if value_set and column["index"] in self._approximate_distinct:
+                del self._approximate_distinct[column["index"]]
+                statistics[f"c{column['index']}_distinct"] = len(value_set)
+
+        expectations = self._table_expectations(columns, statistics)
+        for column in columns:
+            expectations.extend(
+                self._column_expectations(
+                    column, statistics, value_sets.get(column["name"])
+                )
+            )
+
+        return [
+            expectation
+            for expectation in expectations
+            if expectation["expectation_type"] not in self.excluded_expectations
+        ]
+
+    def _selectable(self):
+        return dataset_selectable(self.batch, "swiple_profile")
+
+    def _columns(self, connection) -> list:
+        query = (
+            sa.select(sa.text("*"))
+            .select_from(self._selectable())
+            .limit(settings.PROFILER_SAMPLE_SIZE)
+        )
+        result = connection.execute(query)
+        names = list(result.keys())
+        rows = result.all()
+
+        columns = []
+        for i, name in enumerate(names):
+            values = [row[i] for row in rows]
+            non_null = [value for value in values if value is not None]
+            columns.append(
+                {
+                    "index": i,
+                    "name": name,
+                    "kind": _column_kind(values),
+                    "sample_type": type(non_null[0]) if non_null else None,
+                }
+            )
+        return columns
+
+    def _statistics(self, connection, columns: list) -> dict:
+        aggregates = [sa.func.count().label("row_count")]
+
+        for i, column in enumerate(columns):
+            value = sa.column(column["name"])
+            aggregates.append(sa.func.count(value).label(f"c{i}_nonnull"))
+
+            if column["kind"] in [NUMERIC, STRING, DATETIME, BOOLEAN]:
+                aggregates.append(
+                    self._distinct_count(i, column).label(f"c{i}_distinct")
+                )
+
+            if column["kind"] in [NUMERIC, DATETIME]:
+                aggregates.append(sa.func.min(value).label(f"c{i}_min"))
+                aggregates.append(sa.func.max(value).label(f"c{i}_max"))
+
+            if column["kind"] == NUMERIC:
+                aggregates.append(
+                    sa.func.avg(sa.cast(value, sa.Float)).label(f"c{i}_mean")
+                )
+
+            if column["kind"] == STRING:
+                length = (
+                    sa.func.char_length(value)
+                    if self.datasource.engine == MYSQL
+                    else sa.func.length(value)
+                )
+                aggregates.append(sa.func.min(length).label(f"c{i}_min_length"))
+                aggregates.append(sa.func.max(length).label(f"c{i}_max_length"))
+
+        query = sa.select(*aggregates).select_from(self._selectable())
+        return dict(connection.execute(query).mappings().one())
+
+    def _distinct_count(self, i: int, column: dict):
+        quoted = self.engine.dialect.identifier_preparer.quote(column["name"])
+        native = self.datasource.approx_count_distinct(quoted)
+        if native is None:
+            return sa.func.count(sa.distinct(sa.column(column["name"])))
+
+        expression, error_bound = native
+        self._approximate_distinct[i] = error_bound
+        return sa.literal_column(expression)
+
+    def _count_unique_candidates(self, connection, columns: list, statistics: dict):
+        """
+        Replaces estimated distinct counts within three standard errors of the
+        non-null count with exact counts, so unique columns are recognized.
+        """
+        aggregates = []
+        for i, error_bound in self._approximate_distinct.items():
+            distinct = statistics[f"c{i}_distinct"]
+            nonnull = statistics[f"c{i}_nonnull"]
+            if nonnull and distinct >= nonnull * (1 - 3 * error_bound):
+                value = sa.column(columns[i]["name"])
+                aggregates.append(
+                    sa.func.count(sa.distinct(value)).label(f"c{i}_distinct")
+                )
+
+        if not aggregates:
+            return
+
+        query = sa.select(*aggregates).select_from(self._selectable())
+        for label, distinct in connection.execute(query).mappings().one().items():
+            statistics[label] = distinct
+            del self._approximate_distinct[int(label[1:].split("_")[0])]
+
+    def _value_sets(self, connection, columns: list, statistics: dict) -> dict:
+        selects = []
+        for i, column in enumerate(columns):
+            distinct = statistics.get(f"c{i}_distinct")
+            if not distinct or distinct > settings.PROFILER_VALUE_SET_THRESHOLD:
+                continue
+            # identifiers of small tables aren't categories
+            if distinct == statistics[f"c{i}_nonnull"] and distinct > 2:
+                continue
+            if column["kind"] not in [NUMERIC, STRING, BOOLEAN]:
+                continue
+
+            value = sa.column(column["name"])
+            selects.append(
+                sa.select(
+                    sa.literal(i).label("column_index"),
+                    sa.cast(value, sa.String).label("value"),
+                )
+                .select_from(self._selectable())
+                .where(value.isnot(None))
+                .group_by(value)
+            )
+
+        if not selects:
+            return {}
+
+        value_sets = {}
+        for column_index, value in connection.execute(sa.union_all(*selects)):
+            column = columns[column_index]
+            value_sets.setdefault(column["name"], []).append(
+                _from_string(column["kind"], column["sample_type"], value)
+            )
+
+        return {name: sorted(values) for name, values in value_sets.items()}
+
+    def _table_expectations(self, columns: list, statistics: dict) -> list:
+        row_count = statistics["row_count"]
+        return [
+            self._expectation(
+                c.EXPECT_TABLE_COLUMNS_TO_MATCH_ORDERED_LIST,
+                column_list=[column["name"] for column in columns],
+            ),
+            self._expectation(
+                c.EXPECT_TABLE_ROW_COUNT_TO_BE_BETWEEN,
+                min_value=row_count,
+                max_value=row_count,
+            ),
+        ]
+
+    def _column_expectations(self, column: dict, statistics: dict, value_set) -> list:
+        i = column["index"]
+        name = column["name"]
+        row_count = statistics["row_count"]
+        nonnull = statistics[f"c{i}_nonnull"]
+        distinct = statistics.get(f"c{i}_distinct")
+        expectations = []
+
+        if row_count and nonnull == 0:
+            return [self._expectation(c.EXPECT_COLUMN_VALUES_TO_BE_NULL, column=name)]
+
+        if row_count:
+            not_null = self._expectation(
+                c.EXPECT_COLUMN_VALUES_TO_NOT_BE_NULL, column=name
+            )
+            if nonnull < row_count:
+                # round down so the suggestion passes against the profiled data
+                not_null["kwargs"]["mostly"] = (
+                    math.floor(nonnull / row_count * 100) / 100
+                )
+            expectations.append(not_null)
+
+        if distinct is not None and nonnull:
+            proportion = distinct / nonnull
+            proportion_expectation = self._expectation(
+                c.EXPECT_COLUMN_PROPORTION_OF_UNIQUE_VALUES_TO_BE_BETWEEN,
+                column=name,
+                min_value=proportion,
+                max_value=proportion,
+            )
+            if i in self._approximate_distinct:
+                # validated with the same estimate it was suggested from
+                proportion_expectation["kwargs"]["approximate"] = True
+            expectations.append(proportion_expectation)
+            if distinct == nonnull:
+                expectations.append(
+                    self._expectation(c.EXPECT_COLUMN_VALUES_TO_BE_UNIQUE, column=name)
+                )
+
+        if value_set:
+            expectations.append(
+                self._expectation(
+                    c.EXPECT_COLUMN_VALUES_TO_BE_IN_SET,
+                    column=name,
+                    value_set=value_set,
+                )
+            )
+
+        if column["kind"] == NUMERIC:
+            for expectation_type, statistic in [
+                (c.EXPECT_COLUMN_MIN_TO_BE_BETWEEN, "min"),
+                (c.EXPECT_COLUMN_MAX_TO_BE_BETWEEN, "max"),
+                (c.EXPECT_COLUMN_MEAN_TO_BE_BETWEEN, "mean"),
+            ]:
+                observed_value = _to_json(statistics[f"c{i}_{statistic}"])
+                expectations.append(
+                    self._expectation(
+                        expectation_type,
+                        column=name,
+                        min_value=observed_value,
+                        max_value=observed_value,
+                    )
+                )
+
+        if column["kind"] == STRING:
+            expectations.append(
+                self._expectation(
+                    c.EXPECT_COLUMN_VALUE_LENGTHS_TO_BE_BETWEEN,
+                    column=name,
+                    min_value=statistics[f"c{i}_min_length"],
+                    max_value=statistics[f"c{i}_max_length"],
+                )
+            )
+
+        return expectations
+
+    @staticmethod
+    def _expectation(expectation_type: str, **kwargs) -> dict:
+        return {"expectation_type": expectation_type, "kwargs": kwargs, "meta": {}}
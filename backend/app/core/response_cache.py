@@ -0,0 +1,244 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from app.core.users import current_active_user
+from app.db.client import redis_client
+from app.settings import settings
+from fastapi import Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.params import Depends
+from redis import Redis, RedisError
+
+# Resources whose writes invalidate the responses that read them.
+DATASOURCES = "datasources"
+DATASETS = "datasets"
+EXPECTATIONS = "expectations"
+VALIDATIONS = "validations"
+
+CACHE_CONTROL = "private, no-cache"
+
+
+class MemoryBackend:
+    """LRU of the responses cached by this process."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def versions(self, tags: List[str]) -> List[int]:
+        with self._lock:
+            return [self._versions.get(tag, 0) for tag in tags]
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: dict, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tags: List[str]):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+
+class RedisBackend:
+    """Responses cached in Redis, shared by every API replica and scheduler."""
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+
+    def versions(self, tags: List[str]) -> List[int]:
+        return [int(version or 0) for version in self.redis.mget(map(_version, tags))]
+
+    def get(self, key: str) -> Optional[dict]:
+        value = self.redis.get(key)
+        return None if value is None else json.loads(value)
+
+    def set(self, key: str, value: dict, ttl: int):
+        self.redis.set(key, json.dumps(value), ex=ttl)
+
+    def invalidate(self, tags: List[str]):
+        pipeline = self.redis.pipeline()
+        for tag in tags:
+            pipeline.incr(_version(tag))
+        pipeline.execute()
+
+
+class ResponseCache:
+    """
+    Caches the JSON responses of read endpoints per path, query parameters
+    and user. Responses carry an ETag, and requests whose If-None-Match
+    matches it are answered with 304 Not Modified.
+
+    Each entry is keyed by the versions of the resources it reads. Writes
+    bump those versions instead of deleting entries, so a response computed
+    while a write was in progress is never served after the write. Entries
+    that are no longer reachable expire after their TTL.
+    """
+
+    def __init__(self, backend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+
+    def cached(self, ttl: int, tags: List[str]) -> Callable:
+        """Caches an endpoint's responses for ``ttl`` seconds or until ``tags`` are written."""
+
+        def decorator(endpoint: Callable) -> Callable:
+            signature = inspect.signature(endpoint)
+
+            @functools.wraps(endpoint)
+            async def wrapper(*args, _cache_request: Request, _cache_user, **kwargs):
+                if not self.enabled:
+                    return await _call(endpoint, *args, **kwargs)
+
+                key = None
+                entry = None
+                try:
+                    key = await run_in_threadpool(
+                        self._key, endpoint, tags, _cache_request, _cache_user
+                    )
+                    entry = await run_in_threadpool(self.backend.get, key)
+                except RedisError as ex:
+                    print(f"Response cache unavailable: {ex}")
+
+                if entry is None:
+                    response = await _call(endpoint, *args, **kwargs)
+                    if response.status_code != status.HTTP_200_OK:
+                        return response
+
+                    entry = {
+                        "etag": f'"{hashlib.sha1(response.body).hexdigest()}"',
+                        "body": response.body.decode(),
+                        "headers": {
+                            name: value
+                            for name, value in response.headers.items()
+                            if name != "content-length"
+                        },
+                    }
+                    if key is not None:
+                        try:
+                            await run_in_threadpool(self.backend.set, key, entry, ttl)
+                        except RedisError as ex:
+                            print(f"Response cache unavailable: {ex}")
+
+                headers = {"ETag": entry["etag"], "Cache-Control": CACHE_CONTROL}
+                if _matches(_cache_request.headers.get("if-none-match"), entry["etag"]):
+                    return Response(
+                        status_code=status.HTTP_304_NOT_MODIFIED, headers=headers
+                    )
+                return Response(
+                    content=entry["body"], headers={**entry["headers"], **headers}
+                )
+
+            # FastAPI resolves the endpoint's own parameters plus the request
+            # and the user, which is already resolved by the router.
+            wrapper.__signature__ = signature.replace(
+                parameters=[
+                    *signature.parameters.values(),
+                    inspect.Parameter(
+                        "_cache_request",
+                        inspect.Parameter.KEYWORD_ONLY,
+                        annotation=Request,
+                    ),
+                    inspect.Parameter(
+                        "_cache_user",
+                        inspect.Parameter.KEYWORD_ONLY,
+                        default=Depends(current_active_user),
+                    ),
+                ]
+            )
+            return wrapper
+
+        return decorator
+
+    def invalidates(self, *tags: str) -> Callable:
+        """Invalidates the responses reading ``tags`` once an endpoint returns or fails."""
+
+        def decorator(endpoint: Callable) -> Callable:
+            @functools.wraps(endpoint)
+            async def wrapper(*args, **kwargs):
+                try:
+                    return await _call(endpoint, *args, **kwargs)
+                finally:
+                    # writes that fail part way may still have changed documents
+                    await run_in_threadpool(self.invalidate, *tags)
+
+            return wrapper
+
+        return decorator
+
+    def invalidate(self, *tags: str):
+        if not self.enabled:
+            return
+        try:
+            self.backend.invalidate(list(tags))
+        except RedisError as ex:
+            print(f"Failed to invalidate cached {', '.join(tags)} responses: {ex}")
+
+    def _key(self, endpoint: Callable, tags: List[str], request: Request, user) -> str:
+        digest = hashlib.sha1(
+            json.dumps(
+                [
+                    request.url.path,
+                    sorted(request.query_params.multi_items()),
+                    str(user.id),
+                    self.backend.versions(tags),
+                ]
+            ).encode()
+        ).hexdigest()
+        return f"swiple:response_cache:{endpoint.__name__}:{digest}"
+
+
+async def _call(endpoint: Callable, *args, **kwargs):
+    if asyncio.iscoroutinefunction(endpoint):
+        return await endpoint(*args, **kwargs)
+    return await run_in_threadpool(endpoint, *args, **kwargs)
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in [
+        candidate[2:] if candidate.startswith("W/") else candidate
+        for candidate in candidates
+    ]
+
+
+def _version(tag: str) -> str:
+    return f"swiple:response_cache:version:{tag}"
+
+
+if settings.RESPONSE_CACHE_BACKEND == "redis":
+    response_cache = ResponseCache(
+        RedisBackend(redis_client), enabled=settings.RESPONSE_CACHE_ENABLED
+    )
+else:
+    response_cache = ResponseCache(
+        MemoryBackend(settings.RESPONSE_CACHE_SIZE),
+        enabled=settings.RESPONSE_CACHE_ENABLED,
+    )
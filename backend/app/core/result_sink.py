@@ -0,0 +1,181 @@
+import os
+import threading
+import time
+from multiprocessing import util
+from typing import Iterable, List, Set
+
+from app.core.response_cache import VALIDATIONS, response_cache
+from app.db.client import client
+from app.settings import settings
+from opensearchpy.helpers import streaming_bulk
+
+
+class ResultSink:
+    """
+    Buffers the bulk actions written at the end of validations and indexes
+    them in batches shared across validations. A batch is sent once
+    ``batch_size`` actions or ``batch_bytes`` bytes are buffered, or when the
+    oldest action has waited ``flush_seconds``.
+
+    Batches are sent without a refresh. Callers that need to read their
+    writes call ``flush(refresh=True)``. Bulk items rejected with 429 are
+    retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = None,
+        batch_bytes: int = None,
+        flush_seconds: float = None,
+        max_retries: int = None,
+    ):
+        self.batch_size = batch_size or settings.RESULT_SINK_BATCH_SIZE
+        self.batch_bytes = batch_bytes or settings.RESULT_SINK_BATCH_BYTES
+        self.flush_seconds = flush_seconds or settings.RESULT_SINK_FLUSH_SECONDS
+        self.max_retries = max_retries or settings.RESULT_SINK_MAX_RETRIES
+        self._condition = threading.Condition()
+        self._send_lock = threading.Lock()
+        self._buffer: List[dict] = []
+        self._buffer_bytes = 0
+        self._oldest = None
+        self._unrefreshed: Set[str] = set()
+        self._pid = None
+        self._closed = False
+
+    def add(self, actions: Iterable[dict]):
+        with self._condition:
+            self._start()
+            if self._closed:
+                raise RuntimeError("The result sink is closed")
+            for action in actions:
+                self._buffer.append(action)
+                self._buffer_bytes += len(client.transport.serializer.dumps(action))
+
+            if self._buffer and self._oldest is None:
+                self._oldest = time.monotonic()
+            self._condition.notify()
+
+    def flush(self, refresh: bool = False):
+        """
+        Sends every buffered action, raising if OpenSearch can't be reached.
+
+        With ``refresh`` every index written since the last refresh is
+        refreshed, including the batches the flush thread sent, which may
+        have taken the caller's actions before this call.
+        """
+        with self._send_lock:
+            batch = self._take()
+            try:
+                self._send(batch)
+            except Exception:
+                self._requeue(batch)
+                raise
+
+            if refresh and self._unrefreshed:
+                client.indices.refresh(index=",".join(sorted(self._unrefreshed)))
+                self._unrefreshed.clear()
+
+    def close(self):
+        """
+        Stops the flush thread and sends the buffered actions. Returns once a
+        batch the flush thread is sending has been sent too, so the client
+        can be closed afterwards.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self.flush()
+
+    def _start(self):
+        # The flush thread doesn't survive a fork, e.g. into a scheduler worker.
+        if self._pid == os.getpid():
+            return
+
+        if self._pid is not None:
+            # actions buffered before the fork are sent by the parent
+            self._buffer = []
+            self._buffer_bytes = 0
+            self._oldest = None
+
+        self._pid = os.getpid()
+        self._closed = False
+        threading.Thread(target=self._run, name="result-sink", daemon=True).start()
+        # Daemon threads are stopped without flushing when a process exits.
+        # Finalizers also run when multiprocessing workers exit, unlike atexit.
+        util.Finalize(None, self.close, exitpriority=10)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed and not self._is_due():
+                    self._condition.wait(self._wait_seconds())
+                if self._closed:
+                    return
+
+            try:
+                self.flush()
+            except Exception as ex:
+                print(f"Failed to index validation results, retrying: {ex}")
+                time.sleep(self.flush_seconds)
+
+    def _is_full(self) -> bool:
+        return (
+            len(self._buffer) >= self.batch_size
+            or self._buffer_bytes >= self.batch_bytes
+        )
+
+    def _is_due(self) -> bool:
+        if not self._buffer:
+            return False
+        age = time.monotonic() - self._oldest
+        return self._is_full() or age >= self.flush_seconds
+
+    def _wait_seconds(self):
+        if self._oldest is None:
+            return None
+        return max(self.flush_seconds - (time.monotonic() - self._oldest), 0)
+
+    def _take(self) -> List[dict]:
+        with self._condition:
+            batch = self._buffer
+            self._buffer = []
+            self._buffer_bytes = 0
+            self._oldest = None
+            return batch
+
+    def _requeue(self, batch: List[dict]):
+        with self._condition:
+            self._buffer = batch + self._buffer
+            self._buffer_bytes += sum(
+                len(client.transport.serializer.dumps(action)) for action in batch
+            )
+            if self._buffer:
+                self._oldest = time.monotonic()
+
+    def _send(self, batch: List[dict]):
+        if not batch:
+            return
+
+        self._unrefreshed.update(action["_index"] for action in batch)
+
+        failures = []
+        for ok, item in streaming_bulk(
+            client,
+            batch,
+            chunk_size=self.batch_size,
+            max_chunk_bytes=self.batch_bytes,
+            raise_on_error=False,
+            max_retries=self.max_retries,
+            initial_backoff=1,
+            max_backoff=60,
+        ):
+            if not ok:
+                failures.append(item)
+
+        if failures:
+            print(f"Failed to index {len(failures)} documents, e.g. {failures[0]}")
+
+        response_cache.invalidate(VALIDATIONS)
+
+
+result_sink = ResultSink()
@@ -0,0 +1,173 @@
+import datetime
+from typing import Iterable
+
+from app.core.result_sink import result_sink
+from app.db.client import client
+from app.settings import settings
+from opensearchpy.helpers import bulk, scan
+
+DATASET = "dataset"
+EXPECTATION = "expectation"
+
+HOURLY = "1h"
+DAILY = "1d"
+
+COUNTERS = ["success_count", "failure_count", "exception_count"]
+
+INCREMENT_SCRIPT = """
+for (counter in params.counters.entrySet()) {
+  ctx._source[counter.getKey()] += counter.getValue();
+}
+"""
+
+
+def record(results: list):
+    """
+    Adds validation results to the hourly and daily pass, fail and exception
+    counters of their dataset and expectation. Counters are upserted through
+    the result sink, so concurrent validations of the same dataset can record
+    at the same time.
+    """
+    result_sink.add(
+        _upsert(rollup_id, rollup) for rollup_id, rollup in _count(results).items()
+    )
+
+
+def backfill(batch_size: int = 10000):
+    """
+    Rebuilds every rollup from the validations index. Validations that finish
+    while the backfill runs can be counted twice, so it's best run while no
+    validations are in progress.
+    """
+    client.delete_by_query(
+        index=settings.VALIDATION_ROLLUP_INDEX,
+        body={"query": {"match_all": {}}},
+        refresh=True,
+        ignore=[404],
+    )
+
+    results = []
+    for hit in scan(
+        client,
+        index=settings.VALIDATION_INDEX,
+        query={"query": {"match_all": {}}},
+        _source=[
+            "datasource_id",
+            "dataset_id",
+            "expectation_id",
+            "run_date",
+            "success",
+            "exception_info.raised_exception",
+        ],
+        size=batch_size,
+    ):
+        results.append(hit["_source"])
+        if len(results) == batch_size:
+            record(results)
+            results = []
+
+    record(results)
+    result_sink.flush()
+
+
+def forget_expectation(expectation_id: str):
+    """
+    Removes an expectation's rollups and takes its counts off its dataset's
+    rollups, as happens when its validations are deleted.
+    """
+    query = {
+        "query": {
+            "bool": {
+                "filter": [
+                    {"term": {"scope": EXPECTATION}},
+                    {"term": {"expectation_id": expectation_id}},
+                ]
+            }
+        }
+    }
+
+    decrements = []
+    for hit in scan(client, index=settings.VALIDATION_ROLLUP_INDEX, query=query):
+        rollup = {
+            **hit["_source"],
+            "scope": DATASET,
+            "expectation_id": None,
+            **{name: -hit["_source"][name] for name in COUNTERS},
+        }
+        rollup_id = _rollup_id(rollup, DATASET, rollup["interval"], rollup["bucket"])
+        decrements.append(_upsert(rollup_id, rollup))
+
+    bulk(client, decrements)
+    client.delete_by_query(
+        index=settings.VALIDATION_ROLLUP_INDEX, body=query, ignore=[404]
+    )
+
+
+def pass_rate(success_count: float, failure_count: float):
+    """Percent of evaluated expectations that passed. Exceptions aren't evaluated."""
+    evaluated = success_count + failure_count
+    if not evaluated:
+        return None
+    return success_count / evaluated * 100
+
+
+def _count(results: Iterable[dict]) -> dict:
+    rollups = {}
+    for result in results:
+        run_date = datetime.datetime.fromisoformat(str(result["run_date"]))
+        if result["exception_info"]["raised_exception"]:
+            counter = "exception_count"
+        elif result["success"]:
+            counter = "success_count"
+        else:
+            counter = "failure_count"
+
+        for scope in [DATASET, EXPECTATION]:
+            for interval in [HOURLY, DAILY]:
+                bucket = _bucket(run_date, interval)
+                rollup_id = _rollup_id(result, scope, interval, bucket)
+                if rollup_id not in rollups:
+                    rollups[rollup_id] = {
+                        "scope": scope,
+                        "interval": interval,
+                        "bucket": bucket,
+                        "datasource_id": result["datasource_id"],
+                        "dataset_id": result["dataset_id"],
+                        "expectation_id": (
+                            result["expectation_id"] if scope == EXPECTATION else None
+                        ),
+                        **{name: 0 for name in COUNTERS},
+                    }
+                rollups[rollup_id][counter] += 1
+
+    return rollups
+
+
+def _upsert(rollup_id: str, rollup: dict) -> dict:
+    return {
+        "_op_type": "update",
+        "_index": settings.VALIDATION_ROLLUP_INDEX,
+        "_id": rollup_id,
+        "retry_on_conflict": 5,
+        "script": {
+            "source": INCREMENT_SCRIPT,
+            "lang": "painless",
+            "params": {"counters": {name: rollup[name] for name in COUNTERS}},
+        },
+        "upsert": rollup,
+    }
+
+
+def _bucket(run_date: datetime.datetime, interval: str) -> str:
+    run_date = run_date.astimezone(datetime.timezone.utc)
+    bucket = run_date.replace(minute=0, second=0, microsecond=0)
+    if interval == DAILY:
+        bucket = bucket.replace(hour=0)
+    return bucket.isoformat(sep=" ", timespec="microseconds")
+
+
+def _rollup_id(result: dict, scope: str, interval: str, bucket: str) -> str:
+    key = result["dataset_id"]
+    if scope == EXPECTATION:
+        key = f"{key}__{result['expectation_id']}"
+    return f"{scope}__{key}__{interval}__{bucket}"
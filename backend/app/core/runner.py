@@ -1,10 +1,16 @@
-import datetime
-import json
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import ContextManager
 
-# TODO, add some "runner_max_batches" to datasource to control the
-# max number of batches run at any one time.
 from app import utils
+from app.core import samples
+from app.core.context_cache import context_cache
+from app.core.fused_validator import FusedValidator
+from app.core.profiler import StatisticsProfiler
+from app.db import engines
 from app.models.datasource import SNOWFLAKE
+from app.settings import settings
 from great_expectations.core import ExpectationConfiguration, ExpectationSuite
 from great_expectations.core.batch import BatchRequest, RuntimeBatchRequest
 from great_expectations.data_context import BaseDataContext
@@ -15,7 +21,8 @@ from great_expectations.data_context.types.base import (
 from great_expectations.profile.user_configurable_profiler import (
     UserConfigurableProfiler,
 )
-from pandas import isnull
+
+BATCH_IDENTIFIER = "dataset_name"
 
 
 class Runner:
@@ -43,25 +50,16 @@ class Runner:
         assert self.datasource_id is not None, 'Require "datasource_id" when profiling.'
         assert self.dataset_id is not None, 'Require "dataset_id" when profiling.'
 
-        data_context_config = self.get_data_context_config()
-        context = BaseDataContext(project_config=data_context_config)
-        suite: ExpectationSuite = context.create_expectation_suite(
-            "suite", overwrite_existing=True
-        )
-
-        batch_request = self.get_batch_request(is_profile=True)
-
-        validator = context.get_validator(
-            batch_request=batch_request,
-            expectation_suite=suite,
-        )
-
-        profiler = UserConfigurableProfiler(
-            validator,
-            excluded_expectations=self.excluded_expectations,
-            value_set_threshold="few",
-        )
-        expectations = profiler.build_suite().to_json_dict()["expectations"]
+        if settings.RUNNER_NATIVE_PROFILER_ENABLED:
+            engine = engines.get_engine(self.datasource, self.get_connection_string())
+            expectations = StatisticsProfiler(
+                self.datasource,
+                self.batch,
+                engine,
+                excluded_expectations=self.excluded_expectations,
+            ).build_suite()
+        else:
+            expectations = self._profile_with_ge()
 
         for expectation in expectations:
             expectation["kwargs"].update(
@@ -71,7 +69,6 @@ class Runner:
                     "catch_exceptions": True,
                 }
             )
-            expectation["kwargs"] = json.dumps(expectation["kwargs"])
             expectation["enabled"] = False
             expectation["suggested"] = True
             expectation["datasource_id"] = self.datasource_id
@@ -81,46 +78,36 @@ class Runner:
 
         return expectations
 
-    def sample(self):
-        data_context_config = self.get_data_context_config()
-        context = BaseDataContext(project_config=data_context_config)
-
-        batch_request = self.get_batch_request()
+    def _profile_with_ge(self):
+        with self.lease_data_context() as context:
+            suite = self.get_expectation_suite(context)
 
-        suite: ExpectationSuite = context.create_expectation_suite(
-            "suite", overwrite_existing=True
-        )
+            batch_request = self.get_batch_request(is_profile=True)
 
-        try:
             validator = context.get_validator(
                 batch_request=batch_request,
                 expectation_suite=suite,
             )
-            head = validator.head()
-        except KeyError:
-            if self.batch.runtime_parameters:
-                return {"exception": "Syntax error in query."}
-            return {"exception": f"{self.batch.dataset_name} is not recognized."}
 
-        rows = head.to_dict(orient="records")
-        columns = head.columns
+            profiler = UserConfigurableProfiler(
+                validator,
+                excluded_expectations=self.excluded_expectations,
+                value_set_threshold="few",
+            )
+            return profiler.build_suite().to_json_dict()["expectations"]
 
-        for record in rows:
-            for column in columns:
-                if isinstance(record[column], datetime.datetime):
-                    record[column] = record[column].__str__()
+    def sample(self):
+        engine = engines.get_engine(self.datasource, self.get_connection_string())
 
-                if isnull(record[column]):
-                    record[column] = None
-        return {"columns": list(columns), "rows": rows}
+        if self.batch.runtime_parameters:
+            query = self.batch.runtime_parameters.query
+        else:
+            query = f"select * from {self.batch.dataset_name}"
 
-    def validate(self):
-        data_context_config = self.get_data_context_config()
-        context = BaseDataContext(project_config=data_context_config)
+        return samples.get_sample(query, engine)
 
-        suite: ExpectationSuite = context.create_expectation_suite(
-            "suite", overwrite_existing=True
-        )
+    def validate(self):
+        expectation_configurations = []
 
         for expectation in self.expectations:
             if self.batch.runtime_parameters:
@@ -137,21 +124,48 @@ class Runner:
             if expectation["kwargs"].get("objective"):
                 expectation["kwargs"]["mostly"] = expectation["kwargs"].pop("objective")
 
-            expectation_configuration = ExpectationConfiguration(
-                expectation_type=expectation["expectation_type"],
-                kwargs=expectation["kwargs"],
-                meta=expectation_meta,
+            expectation_configurations.append(
+                {
+                    "expectation_type": expectation["expectation_type"],
+                    "kwargs": expectation["kwargs"],
+                    "meta": expectation_meta,
+                }
             )
 
-            suite.add_expectation(expectation_configuration=expectation_configuration)
+        tasks = []
+        engine = engines.get_engine(self.datasource, self.get_connection_string())
+        fused_validator = FusedValidator(self.datasource, self.batch, engine)
+        fused_configurations = []
+        ge_configurations = []
+        for configuration in expectation_configurations:
+            # GE ignores "approximate" and would run the exact query instead
+            if fused_validator.is_approximate(configuration) or (
+                settings.RUNNER_FUSED_VALIDATION_ENABLED
+                and fused_validator.supports(configuration)
+            ):
+                fused_configurations.append(configuration)
+            else:
+                ge_configurations.append(configuration)
 
-        batch_request = self.get_batch_request()
-        validator = context.get_validator(
-            batch_request=batch_request,
-            expectation_suite=suite,
-        )
+        if fused_configurations:
+            tasks.append(partial(fused_validator.validate, fused_configurations))
+
+        max_workers = getattr(self.datasource, "max_expectation_workers", None) or 1
 
-        results = validator.validate().to_json_dict()["results"]
+        for group in self._split_into_groups(ge_configurations, max_workers):
+            tasks.append(partial(self._validate_with_ge, group))
+
+        results = []
+
+        if max_workers > 1 and len(tasks) > 1:
+            # Each group leases a context of its own, as GE keeps the batch
+            # data of a validator on the context's execution engine.
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks))) as pool:
+                for task_results in pool.map(lambda task: task(), tasks):
+                    results.extend(task_results)
+        else:
+            for task in tasks:
+                results.extend(task())
 
         for result in results:
             # GE "mostly" is synonymous for Swiple "objective"
@@ -173,13 +187,79 @@ class Runner:
 
         return results
 
-    def get_data_context_config(self):
+    def _validate_with_ge(self, expectation_configurations):
+        with self.lease_data_context() as context:
+            suite = self.get_expectation_suite(context)
+
+            for configuration in expectation_configurations:
+                expectation_configuration = ExpectationConfiguration(**configuration)
+                suite.add_expectation(
+                    expectation_configuration=expectation_configuration
+                )
+
+            batch_request = self.get_batch_request()
+
+            validator = context.get_validator(
+                batch_request=batch_request,
+                expectation_suite=suite,
+            )
+
+            return validator.validate().to_json_dict()["results"]
+
+    @staticmethod
+    def _split_into_groups(expectation_configurations, max_groups: int):
+        """
+        Splits expectations into at most ``max_groups`` groups. Expectations on
+        the same column stay in the same group so GE can reuse their metrics.
+        """
+        by_column = defaultdict(list)
+        for configuration in expectation_configurations:
+            kwargs = configuration["kwargs"]
+            column = kwargs.get("column") or str(
+                kwargs.get("column_list") or kwargs.get("column_A")
+            )
+            by_column[column].append(configuration)
+
+        groups = [[] for __ in range(max_groups)]
+        for column_group in sorted(by_column.values(), key=len, reverse=True):
+            min(groups, key=len).extend(column_group)
+
+        return [group for group in groups if group]
+
+    def get_connection_string(self):
         # Snowflake SQLAlchemy connector requires the schema in the connection string in order to create TEMP tables.
         if self.datasource.engine == SNOWFLAKE and self.batch.runtime_parameters:
             schema = self.batch.runtime_parameters.schema_name
-            connection_string = self.datasource.connection_string(schema)
-        else:
-            connection_string = self.datasource.connection_string()
+            return self.datasource.connection_string(schema)
+        return self.datasource.connection_string()
+
+    def lease_data_context(self) -> ContextManager[BaseDataContext]:
+        """
+        Leases a cached DataContext for the datasource so that its execution
+        engine and connection pool are reused across runs. The context isn't
+        used by anything else until the lease ends.
+        """
+        datasource_id = (
+            self.datasource_id
+            or getattr(self.datasource, "datasource_id", None)
+            or self.datasource.key
+        )
+        return context_cache.lease(
+            datasource_id=datasource_id,
+            connection_string=self.get_connection_string(),
+            factory=lambda: BaseDataContext(
+                project_config=self.get_data_context_config()
+            ),
+        )
+
+    @staticmethod
+    def get_expectation_suite(context: BaseDataContext) -> ExpectationSuite:
+        # The suite is not added to the context's store as the context is reused
+        # by other runs.
+        return ExpectationSuite(expectation_suite_name="suite", data_context=context)
+
+    def get_data_context_config(self):
+        connection_string = self.get_connection_string()
 
         context = DataContextConfig(
             datasources={
@@ -200,7 +280,9 @@ class Runner:
                             #
                             # Alternative is to let users push to ES runs without
                             # values in app. (Don't like the sound of that...)
-                            "batch_identifiers": [self.batch.dataset_name],
+                            # The identifier is not dataset specific so the context
+                            # can be shared by every dataset on the datasource.
+                            "batch_identifiers": [BATCH_IDENTIFIER],
                         },
                         "default_inferred_data_connector_name": {
                             "class_name": "InferredAssetSqlDataConnector",
@@ -231,7 +313,7 @@ class Runner:
                 data_connector_name="default_runtime_data_connector",
                 data_asset_name=self.batch.dataset_name,
                 runtime_parameters=runtime_parameters,
-                batch_identifiers={self.batch.dataset_name: self.batch.dataset_name},
+                batch_identifiers={BATCH_IDENTIFIER: self.batch.dataset_name},
                 batch_spec_passthrough=batch_spec_passthrough,
             )
         else:
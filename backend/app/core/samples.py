@@ -0,0 +1,142 @@
+import datetime
+import decimal
+import json
+import math
+from typing import Callable, Iterator, List, Optional
+
+import sqlalchemy as sa
+from app.settings import settings
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+
+def _identity(value):
+    return value
+
+
+def _to_string(value):
+    return None if value is None else str(value)
+
+
+def _to_float(value):
+    return None if value is None else float(value)
+
+
+def _nan_to_none(value):
+    return None if value is None or math.isnan(value) else value
+
+
+def _decode(value):
+    return None if value is None else bytes(value).decode("utf-8", "replace")
+
+
+def _converter(value) -> Callable:
+    """Returns the converter that makes a column's values JSON serializable."""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return _to_string
+    if isinstance(value, decimal.Decimal):
+        return _to_float
+    if isinstance(value, float):
+        return _nan_to_none
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return _decode
+    return _identity
+
+
+class SampleReader:
+    """
+    Reads sample rows through a server-side cursor and converts them a column
+    at a time. Each column's converter is chosen once, from its first non-null
+    value, instead of type checking every cell.
+
+    Rows stop once ``max_rows`` rows or ``max_bytes`` bytes of JSON have been
+    read, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        max_rows: int = None,
+        max_bytes: int = None,
+        fetch_size: int = None,
+    ):
+        self.max_rows = max_rows or settings.SAMPLE_MAX_ROWS
+        self.max_bytes = max_bytes or settings.SAMPLE_MAX_BYTES
+        self.fetch_size = fetch_size or min(self.max_rows, 1000)
+        self.columns: List[str] = []
+        self.truncated = False
+        self._converters: List[Optional[Callable]] = []
+
+    def rows(self, connection, query: str) -> Iterator[dict]:
+        query = query.replace(";", "").strip()
+        statement = (
+            sa.select(sa.text("*"))
+            .select_from(sa.text(query).columns().subquery("swiple_sample"))
+            .limit(self.max_rows)
+        )
+
+        result = connection.execution_options(stream_results=True).execute(statement)
+        self.columns = list(result.keys())
+        self._converters = [None] * len(self.columns)
+
+        size = 0
+        count = 0
+        for partition in result.partitions(self.fetch_size):
+            for row in self._convert(partition):
+                size += len(json.dumps(row, default=str))
+                if count and size > self.max_bytes:
+                    self.truncated = True
+                    result.close()
+                    return
+
+                yield {"key": count, **row}
+                count += 1
+
+    def _convert(self, partition: list) -> List[dict]:
+        values_by_column = list(zip(*partition))
+
+        for i, values in enumerate(values_by_column):
+            if self._converters[i] is None:
+                first = next((value for value in values if value is not None), None)
+                if first is not None:
+                    self._converters[i] = _converter(first)
+
+            converter = self._converters[i]
+            if converter is not None and converter is not _identity:
+                values_by_column[i] = map(converter, values)
+
+        return [dict(zip(self.columns, row)) for row in zip(*values_by_column)]
+
+
+def get_sample(query: str, engine: sa.engine.Engine, **kwargs) -> dict:
+    """Returns the sample rows and columns of a query."""
+    reader = SampleReader(**kwargs)
+
+    try:
+        with engine.connect() as connection:
+            rows = list(reader.rows(connection, query))
+    except ProgrammingError as ex:
+        return {"exception": getattr(ex.orig, "pgerror", None) or str(ex.orig)}
+    except OperationalError as ex:
+        return {"exception": str(ex.orig)}
+
+    if len(reader.columns) == 0:
+        return {"error": "No columns included in statement."}
+
+    return {"rows": rows, "columns": reader.columns, "truncated": reader.truncated}
+
+
+def stream_sample(query: str, engine: sa.engine.Engine, **kwargs) -> Iterator[str]:
+    """
+    Yields the sample as newline delimited JSON, the column names followed by
+    one line per row.
+    """
+    reader = SampleReader(**kwargs)
+
+    with engine.connect() as connection:
+        rows = reader.rows(connection, query)
+        first = next(rows, None)
+        yield json.dumps({"columns": reader.columns}) + "\n"
+
+        if first is not None:
+            yield json.dumps(first, default=str) + "\n"
+        for row in rows:
+            yield json.dumps(row, default=str) + "\n"
@@ -0,0 +1,114 @@
+import math
+
+import sqlalchemy as sa
+from app import constants as c
+from app.core.dataset import split_dataset_resource
+from app.models.dataset import Dataset, RuntimeParameters
+
+SAMPLE_ALIAS = "swiple_sample"
+
+# Hash buckets used when sampling on a column.
+HASH_BUCKETS = 1000000
+
+# Expectations on totals, which describe the sample rather than the dataset.
+TOTAL_EXPECTATIONS = [
+    c.EXPECT_TABLE_ROW_COUNT_TO_BE_BETWEEN,
+    c.EXPECT_TABLE_ROW_COUNT_TO_EQUAL,
+    c.EXPECT_COLUMN_SUM_TO_BE_BETWEEN,
+]
+ROW_COUNT_EXPECTATIONS = TOTAL_EXPECTATIONS[:2]
+
+
+def sample_batch(datasource, dataset: Dataset, engine: sa.engine.Engine) -> Dataset:
+    """
+    Returns a copy of the dataset whose runtime query selects the configured
+    sample, so both the fused and GE validation paths validate the sample.
+    """
+    sampling = dataset.sampling
+    preparer = engine.dialect.identifier_preparer
+    schema, table, is_virtual = split_dataset_resource(dataset)
+
+    if is_virtual:
+        query = dataset.runtime_parameters.query.replace(";", "").strip()
+        relation = f"({query}) AS {SAMPLE_ALIAS}"
+        alias = SAMPLE_ALIAS
+    else:
+        relation = preparer.format_table(sa.table(table, schema=schema))
+        alias = None
+
+    bucket = None
+    if sampling.hash_column:
+        bucket = datasource.hash_bucket(
+            preparer.quote(sampling.hash_column), sampling.seed
+        )
+
+    if not sampling.fraction:
+        query = f"SELECT * FROM {relation}"
+    elif bucket:
+        threshold = round(sampling.fraction * HASH_BUCKETS)
+        query = f"SELECT * FROM {relation} WHERE mod({bucket}, {HASH_BUCKETS}) < {threshold}"
+    else:
+        query = datasource.sample_query(
+            relation, alias, sampling.fraction, sampling.seed
+        )
+
+    if sampling.max_rows:
+        # Buckets are uniformly distributed, so the rows in the lowest buckets
+        # are a random and reproducible subset, unlike the first rows read.
+        query = f"{query} ORDER BY {bucket} LIMIT {sampling.max_rows}"
+
+    batch = dataset.copy(deep=True)
+    batch.runtime_parameters = RuntimeParameters(schema=schema, query=query)
+    return batch
+
+
+def annotate(results: list, dataset: Dataset) -> list:
+    """
+    Records the sample on each result. Column map results also get the
+    unexpected count extrapolated to the whole dataset and the margin of error
+    of their unexpected percent at 95% confidence. Results of expectations on
+    totals, e.g. the row count, are flagged as describing the sample, and
+    row counts are extrapolated when the row cap wasn't reached.
+    """
+    sampling = dataset.sampling
+
+    for result in results:
+        sample_size = result["result"].get("element_count")
+        result["sampling"] = {
+            "fraction": sampling.fraction,
+            "max_rows": sampling.max_rows,
+            "seed": sampling.seed,
+            "sample_size": sample_size,
+        }
+
+        expectation_type = result["expectation_config"]["expectation_type"]
+        if expectation_type in TOTAL_EXPECTATIONS:
+            result["sampling"]["describes_sample"] = True
+
+        observed_value = result["result"].get("observed_value")
+        if (
+            expectation_type in ROW_COUNT_EXPECTATIONS
+            and sampling.fraction
+            and isinstance(observed_value, int)
+            and observed_value != sampling.max_rows
+        ):
+            result["result"]["estimated_observed_value"] = round(
+                observed_value / sampling.fraction
+            )
+
+        unexpected_count = result["result"].get("unexpected_count")
+        if not sample_size or unexpected_count is None:
+            continue
+
+        # The population can only be estimated when the row cap wasn't reached.
+        if sampling.fraction and sample_size != sampling.max_rows:
+            result["result"]["estimated_unexpected_count"] = round(
+                unexpected_count / sampling.fraction
+            )
+
+        rate = unexpected_count / sample_size
+        result["result"]["unexpected_percent_margin"] = (
+            1.96 * math.sqrt(rate * (1 - rate) / sample_size) * 100
+        )
+
+    return results
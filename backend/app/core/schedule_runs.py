@@ -0,0 +1,164 @@
+import datetime
+import time
+import traceback
+from typing import Dict, Tuple
+
+from app.api.api_v1.endpoints.dataset import validate_dataset
+from app.core.result_sink import result_sink
+from app.db.client import client
+from app.settings import settings
+from apscheduler.events import (
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MAX_INSTANCES,
+    EVENT_JOB_MISSED,
+    EVENT_JOB_SUBMITTED,
+    JobEvent,
+)
+from apscheduler.util import ref_to_obj
+
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+MISSED = "missed"
+SKIPPED = "skipped"
+
+TIMESTAMPS = ["scheduled_time", "submitted_time", "started_time", "finished_time"]
+
+EVENTS = (
+    EVENT_JOB_SUBMITTED
+    | EVENT_JOB_EXECUTED
+    | EVENT_JOB_ERROR
+    | EVENT_JOB_MISSED
+    | EVENT_JOB_MAX_INSTANCES
+)
+QUEUED_EVENTS = EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES
+
+
+def validate(dataset_id: str) -> dict:
+    """
+    Runs a scheduled validation in a scheduler worker and returns its timing
+    and outcome instead of the results, which would otherwise be pickled back
+    to the scheduler only to be dropped.
+    """
+    run = {"started_time": datetime.datetime.now(datetime.timezone.utc)}
+    start = time.monotonic()
+
+    try:
+        results = validate_dataset(dataset_id)
+        run["result_count"] = len(results)
+        run["bytes_written"] = len(client.transport.serializer.dumps(results))
+    except Exception as ex:
+        traceback.print_exc()
+        run["exception"] = repr(ex)
+        run["traceback"] = traceback.format_exc()
+
+    run["duration_seconds"] = time.monotonic() - start
+    return run
+
+
+def execute(body: dict):
+    """
+    Runs a scheduled run taken off the work queue, see QueueExecutor, and
+    records it. The function is looked up by the reference APScheduler stored.
+    """
+    scheduled_time = datetime.datetime.fromisoformat(body["scheduled_time"])
+    run = {"submitted_time": datetime.datetime.fromisoformat(body["submitted_time"])}
+
+    try:
+        retval = ref_to_obj(body["func"])(*body["args"], **body["kwargs"])
+    except Exception as ex:
+        traceback.print_exc()
+        run.update(_outcome(exception=ex, traceback=traceback.format_exc()))
+    else:
+        run.update(_outcome(retval=retval))
+
+    run["finished_time"] = datetime.datetime.now(datetime.timezone.utc)
+    record(body["job_id"], scheduled_time, run)
+
+
+def record(schedule_id: str, scheduled_time: datetime.datetime, run: dict):
+    """Indexes a run of a schedule through the result sink."""
+    datasource_id, dataset_id, __ = schedule_id.split("__")
+    run = {
+        "schedule_id": schedule_id,
+        "datasource_id": datasource_id,
+        "dataset_id": dataset_id,
+        "scheduled_time": scheduled_time,
+        **run,
+    }
+
+    if run.get("started_time"):
+        run["start_delay_seconds"] = (
+            run["started_time"] - scheduled_time
+        ).total_seconds()
+
+    for field in TIMESTAMPS:
+        if run.get(field):
+            run[field] = timestamp(run[field])
+
+    result_sink.add(
+        [
+            {
+                "_index": settings.SCHEDULE_RUN_INDEX,
+                "_id": f"{schedule_id}__{run['scheduled_time']}",
+                **run,
+            }
+        ]
+    )
+
+
+def timestamp(value: datetime.datetime) -> str:
+    value = value.astimezone(datetime.timezone.utc)
+    return value.isoformat(sep=" ", timespec="microseconds")
+
+
+class RunRecorder:
+    """
+    Listens to the scheduler's job events and records one run per run time of
+    a schedule.
+
+    Runs are submitted and finish in the scheduler process, while ``validate``
+    times the run itself in the worker that executes it. Runs handed to the
+    work queue are recorded by the worker instead, so only QUEUED_EVENTS are
+    listened to.
+    """
+
+    def __init__(self, jobstore: str = "default"):
+        self.jobstore = jobstore
+        self._submitted: Dict[Tuple[str, datetime.datetime], datetime.datetime] = {}
+
+    def __call__(self, event: JobEvent):
+        if event.jobstore != self.jobstore:
+            return
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+
+        if event.code == EVENT_JOB_SUBMITTED:
+            for scheduled_time in event.scheduled_run_times:
+                self._submitted[(event.job_id, scheduled_time)] = now
+        elif event.code == EVENT_JOB_MAX_INSTANCES:
+            for scheduled_time in event.scheduled_run_times:
+                record(event.job_id, scheduled_time, {"status": SKIPPED})
+        elif event.code == EVENT_JOB_MISSED:
+            record(event.job_id, event.scheduled_run_time, {"status": MISSED})
+        else:
+            submitted_time = self._submitted.pop(
+                (event.job_id, event.scheduled_run_time), None
+            )
+            run = {
+                "submitted_time": submitted_time,
+                "finished_time": now,
+                **_outcome(event.retval, event.exception, event.traceback),
+            }
+            record(event.job_id, event.scheduled_run_time, run)
+
+
+def _outcome(retval=None, exception=None, traceback=None) -> dict:
+    if exception is not None:
+        return {"status": FAILED, "exception": repr(exception), "traceback": traceback}
+
+    if isinstance(retval, dict):
+        return {**retval, "status": FAILED if retval.get("exception") else SUCCEEDED}
+
+    # schedules created before validate() return the results
+    return {"status": SUCCEEDED, "result_count": len(retval or [])}
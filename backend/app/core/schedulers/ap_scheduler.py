@@ -4,11 +4,24 @@ from typing import Dict, List
 
 import app.constants as c
 from app.api.api_v1.endpoints.dataset import validate_dataset
+from app.core import catalog, schedule_runs, validation_indices
+from app.core.schedulers.leader import LeaderElection
+from app.core.schedulers.queue_executor import QueueExecutor
+from app.core.schedulers.schedule_index import ScheduleIndex
 from app.core.schedulers.scheduler_interface import SchedulerInterface
+from app.core.schedulers.warm_pool import WarmProcessPoolExecutor
+from app.db.client import redis_client
 from app.models.schedule import Schedule
 from app.settings import settings
-from apscheduler.executors.pool import ProcessPoolExecutor
+from apscheduler.events import (
+    EVENT_ALL_JOBS_REMOVED,
+    EVENT_JOB_ADDED,
+    EVENT_JOB_REMOVED,
+    SchedulerEvent,
+)
+from apscheduler.executors.pool import ThreadPoolExecutor
 from apscheduler.job import Job
+from apscheduler.jobstores.memory import MemoryJobStore
 from apscheduler.jobstores.redis import RedisJobStore
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
@@ -20,19 +33,33 @@ from pytz import utc
 class ApScheduler(SchedulerInterface):
     def __init__(self):
         self.ap_scheduler: AsyncIOScheduler = None
+        self.schedule_index = ScheduleIndex(redis_client)
+        self.leader_election: LeaderElection = None
 
     def start(self):
         jobstores = {
             "default": RedisJobStore(
                 db=settings.SCHEDULER_REDIS_DB,
                 **settings.SCHEDULER_REDIS_KWARGS,
-            )
+            ),
+            # Internal jobs are re-added on start and never listed as schedules.
+            c.SYSTEM: MemoryJobStore(),
         }
-        executors = {
-            "default": ProcessPoolExecutor(
+        if settings.SCHEDULER_EXECUTOR == "queue":
+            executor = QueueExecutor()
+            run_events = schedule_runs.QUEUED_EVENTS
+        else:
+            executor = WarmProcessPoolExecutor(
                 max_workers=settings.SCHEDULER_EXECUTOR_MAX_WORKERS,
+                max_tasks_per_child=settings.SCHEDULER_EXECUTOR_MAX_TASKS_PER_CHILD,
+                warm_datasources=settings.SCHEDULER_EXECUTOR_WARM_DATASOURCES,
+                start_method=settings.SCHEDULER_EXECUTOR_START_METHOD,
                 pool_kwargs=settings.SCHEDULER_EXECUTOR_KWARGS,
             )
+            run_events = schedule_runs.EVENTS
+        executors = {
+            "default": executor,
+            c.SYSTEM: ThreadPoolExecutor(max_workers=1),
         }
         job_defaults = {"coalesce": False, "max_instances": 3}
         self.ap_scheduler = AsyncIOScheduler(
@@ -41,17 +68,88 @@ class ApScheduler(SchedulerInterface):
             job_defaults=job_defaults,
             timezone=utc,
         )
-        self.ap_scheduler.start()
+        self.ap_scheduler.add_listener(schedule_runs.RunRecorder(), run_events)
+        self.ap_scheduler.add_listener(
+            self.update_schedule_index,
+            EVENT_JOB_ADDED | EVENT_JOB_REMOVED | EVENT_ALL_JOBS_REMOVED,
+        )
+        # Every replica serves the API, but only the elected leader processes
+        # due jobs; the others stay paused until they're elected.
+        self.ap_scheduler.start(paused=True)
+        self.add_system_jobs()
+
+        # Schedules may have been added or removed while the index was
+        # unmaintained, e.g. by an older version, so it's rebuilt from the ids
+        # of the stored jobs, without deserializing them. The rebuild only adds
+        # and prunes ids, as other replicas may be adding schedules meanwhile.
+        jobstore = jobstores["default"]
+        self.schedule_index.rebuild(
+            (id.decode() for id in jobstore.redis.hkeys(jobstore.jobs_key)),
+            jobstore.jobs_key,
+        )
+
+        # Renewals wake the leader up, so it picks up jobs added through
+        # other replicas.
+        self.leader_election = LeaderElection(
+            redis_client,
+            "scheduler",
+            on_elected=self.on_elected,
+            on_demoted=self.ap_scheduler.pause,
+            on_renewed=self.ap_scheduler.wakeup,
+            lease_seconds=settings.SCHEDULER_LEADER_LEASE_SECONDS,
+        )
+        self.leader_election.start()
         print("-- Scheduler Started --")
 
+    def on_elected(self):
+        self.upgrade_schedules()
+        self.ap_scheduler.resume()
+
+    def add_system_jobs(self):
+        self.ap_scheduler.add_job(
+            id="catalog_refresh",
+            func=catalog.refresh_all,
+            trigger=c.INTERVAL,
+            minutes=settings.CATALOG_REFRESH_INTERVAL_MINUTES,
+            jobstore=c.SYSTEM,
+            executor=c.SYSTEM,
+            replace_existing=True,
+        )
+        self.ap_scheduler.add_job(
+            id="validation_retention",
+            func=validation_indices.apply_retention,
+            trigger=c.INTERVAL,
+            minutes=settings.VALIDATION_RETENTION_INTERVAL_MINUTES,
+            jobstore=c.SYSTEM,
+            executor=c.SYSTEM,
+            replace_existing=True,
+        )
+
+    def update_schedule_index(self, event: SchedulerEvent):
+        if event.code == EVENT_ALL_JOBS_REMOVED:
+            if event.alias in [None, "default"]:
+                self.schedule_index.clear()
+        elif event.jobstore == "default":
+            if event.code == EVENT_JOB_ADDED:
+                self.schedule_index.add(event.job_id)
+            else:
+                self.schedule_index.remove(event.job_id)
+
+    def upgrade_schedules(self):
+        # Schedules created before run history call validate_dataset directly.
+        for job in self.ap_scheduler.get_jobs("default"):
+            if job.func is validate_dataset:
+                job.modify(func=schedule_runs.validate)
+
     def shutdown(self):
+        self.leader_election.stop()
         self.ap_scheduler.shutdown()
         print("-- Scheduler Shutdown --")
 
     def add_schedule(self, schedule: Schedule, datasource_id: str, dataset_id: str):
         return self.ap_scheduler.add_job(
             id=f"{datasource_id}__{dataset_id}__{uuid.uuid4()}",
-            func=validate_dataset,
+            func=schedule_runs.validate,
             kwargs={"dataset_id": dataset_id},
             misfire_grace_time=schedule.misfire_grace_time,
             max_instances=schedule.max_instances,
@@ -76,30 +174,42 @@ class ApScheduler(SchedulerInterface):
         return self.ap_scheduler.get_job(schedule_id)
 
     def list_schedules(self, datasource_id=None, dataset_id=None):
-        schedules = self.ap_scheduler.get_jobs("default")
-        schedules_as_dict = []
+        if dataset_id:
+            schedules = self._get_schedules(self.schedule_index.by_dataset(dataset_id))
+        elif datasource_id:
+            schedules = self._get_schedules(
+                self.schedule_index.by_datasource(datasource_id)
+            )
+        else:
+            schedules = self.ap_scheduler.get_jobs("default")
 
+        schedules_as_dict = []
         for schedule in schedules:
             schedule_as_dict = self.to_dict(schedule)
             schedule_as_dict["expression"] = schedule.trigger.__str__()
-
-            if not datasource_id and not dataset_id:
-                schedules_as_dict.append(schedule_as_dict)
-
-            schedule_datasource_id, schedule_dataset_id, __ = schedule.id.split("__")
-
-            if not datasource_id and dataset_id and schedule_dataset_id == dataset_id:
-                schedules_as_dict.append(schedule_as_dict)
-
-            if (
-                not dataset_id
-                and datasource_id
-                and schedule_datasource_id == datasource_id
-            ):
-                schedules_as_dict.append(schedule_as_dict)
+            schedules_as_dict.append(schedule_as_dict)
 
         return schedules_as_dict
 
+    def _get_schedules(self, schedule_ids) -> List[Job]:
+        schedules = []
+        for schedule_id in schedule_ids:
+            schedule = self.ap_scheduler.get_job(schedule_id, "default")
+            if schedule is None:
+                # removed while the index wasn't maintained
+                self.schedule_index.remove(schedule_id)
+            else:
+                schedules.append(schedule)
+
+        # ordered like get_jobs, by next run time with paused schedules last
+        return sorted(
+            schedules,
+            key=lambda schedule: (
+                schedule.next_run_time is None,
+                schedule.next_run_time or 0,
+            ),
+        )
+
     def to_dict(self, job: Job):
         job_state = job.__getstate__()
         trigger_fields = {}
@@ -0,0 +1,115 @@
+import threading
+import uuid
+from typing import Callable, Optional
+
+from redis import Redis, RedisError
+
+# Extends the lease of a lock that is still held by this token.
+RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], tonumber(ARGV[2]))
+end
+return 0
+"""
+
+# Deletes the lock if it is still held by this token.
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderElection:
+    """
+    Elects one leader among the processes sharing ``name`` through a Redis
+    lock with a lease. The leader renews its lease every third of
+    ``lease_seconds`` and the others try to take the lock as often, so a
+    leader that dies is replaced within ``lease_seconds``.
+
+    ``on_elected`` and ``on_demoted`` are called from the election thread when
+    this process gains or loses leadership, and ``on_renewed`` each time the
+    leader renews its lease. A leader that can't reach Redis steps down, as
+    its lease may expire before it can renew it.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        name: str,
+        on_elected: Callable[[], None],
+        on_demoted: Callable[[], None],
+        on_renewed: Optional[Callable[[], None]] = None,
+        lease_seconds: int = 15,
+    ):
+        self.redis = redis
+        self.key = f"swiple:leader:{name}"
+        self.token = str(uuid.uuid4())
+        self.lease_ms = lease_seconds * 1000
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.on_renewed = on_renewed
+        self.is_leader = False
+        self._renew = redis.register_script(RENEW_SCRIPT)
+        self._release = redis.register_script(RELEASE_SCRIPT)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f"{self.key}:election", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stops campaigning and releases the lock so another process takes over."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+        if self.is_leader:
+            try:
+                self._release(keys=[self.key], args=[self.token])
+            except RedisError as ex:
+                print(f"Failed to release '{self.key}': {ex}")
+            self._set_leader(False)
+
+    def _run(self):
+        interval = self.lease_ms / 3000
+        while True:
+            self._campaign()
+            if self._stop.wait(interval):
+                return
+
+    def _campaign(self):
+        try:
+            if self.is_leader:
+                leader = bool(
+                    self._renew(keys=[self.key], args=[self.token, self.lease_ms])
+                )
+            else:
+                leader = bool(
+                    self.redis.set(self.key, self.token, nx=True, px=self.lease_ms)
+                )
+        except RedisError as ex:
+            print(f"Failed to campaign for '{self.key}': {ex}")
+            leader = False
+
+        was_leader = self.is_leader
+        self._set_leader(leader)
+        if leader and was_leader and self.on_renewed is not None:
+            self.on_renewed()
+
+    def _set_leader(self, leader: bool):
+        if leader == self.is_leader:
+            return
+
+        self.is_leader = leader
+        if leader:
+            print(f"Elected leader of '{self.key}'")
+            self.on_elected()
+        else:
+            print(f"No longer leader of '{self.key}'")
+            self.on_demoted()
@@ -0,0 +1,37 @@
+import datetime
+
+from app.core import schedule_runs, work_queue
+from app.core.schedulers import warm_pool
+from apscheduler.executors.base import BaseExecutor
+
+
+class QueueExecutor(BaseExecutor):
+    """
+    Pushes each run time of a job onto the scheduled_runs work queue instead
+    of running it, for the workers started with ``python -m app.worker``.
+
+    Queued runs are recorded by the worker that runs them, so no executed or
+    error events are dispatched, and ``max_instances`` isn't enforced as runs
+    of a job may be running on any worker.
+    """
+
+    def submit_job(self, job, run_times):
+        assert self._lock is not None, "This executor has not been started yet"
+        self._do_submit_job(job, run_times)
+
+    def _do_submit_job(self, job, run_times):
+        submitted_time = schedule_runs.timestamp(
+            datetime.datetime.now(datetime.timezone.utc)
+        )
+        warm_pool.mark_hot(job.id)
+        for run_time in run_times:
+            work_queue.scheduled_runs.push(
+                {
+                    "job_id": job.id,
+                    "func": job.func_ref,
+                    "args": list(job.args),
+                    "kwargs": job.kwargs,
+                    "scheduled_time": schedule_runs.timestamp(run_time),
+                    "submitted_time": submitted_time,
+                }
+            )
@@ -0,0 +1,100 @@
+from collections import defaultdict
+from typing import Iterable, Optional, Set, Tuple
+
+from redis import Redis
+
+PREFIX = "swiple:schedules"
+
+# Removes the given schedule ids from an index set unless the job store still
+# holds them, so schedules added since the ids were listed are kept.
+PRUNE_SCRIPT = """
+local removed = 0
+for _, schedule_id in ipairs(ARGV) do
+    if redis.call('HEXISTS', KEYS[2], schedule_id) == 0 then
+        removed = removed + redis.call('SREM', KEYS[1], schedule_id)
+    end
+end
+return removed
+"""
+
+
+class ScheduleIndex:
+    """
+    Redis sets of the schedule ids of each dataset and datasource, so the
+    schedules of one dataset are loaded without deserializing every job in
+    the job store. Schedule ids have the form
+    ``{datasource_id}__{dataset_id}__{uuid}``.
+    """
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+        self._prune = redis.register_script(PRUNE_SCRIPT)
+
+    def add(self, schedule_id: str):
+        keys = _keys(schedule_id)
+        if keys:
+            pipeline = self.redis.pipeline()
+            for key in keys:
+                pipeline.sadd(key, schedule_id)
+            pipeline.execute()
+
+    def remove(self, schedule_id: str):
+        keys = _keys(schedule_id)
+        if keys:
+            pipeline = self.redis.pipeline()
+            for key in keys:
+                pipeline.srem(key, schedule_id)
+            pipeline.execute()
+
+    def by_dataset(self, dataset_id: str) -> Set[str]:
+        return {id.decode() for id in self.redis.smembers(_key("dataset", dataset_id))}
+
+    def by_datasource(self, datasource_id: str) -> Set[str]:
+        return {
+            id.decode() for id in self.redis.smembers(_key("datasource", datasource_id))
+        }
+
+    def rebuild(self, schedule_ids: Iterable[str], jobs_key: str):
+        """
+        Adds the given schedules to the index and removes the indexed schedules
+        that are no longer in the job store hash ``jobs_key``. Schedules added
+        or removed by other processes meanwhile are left as they are, so
+        replicas can rebuild the index while others serve requests.
+        """
+        expected = defaultdict(set)
+        for schedule_id in schedule_ids:
+            for key in _keys(schedule_id) or []:
+                expected[key].add(schedule_id)
+
+        pipeline = self.redis.pipeline()
+        for key, ids in expected.items():
+            pipeline.sadd(key, *ids)
+        pipeline.execute()
+
+        for key in self.redis.scan_iter(match=f"{PREFIX}:*"):
+            key = key.decode()
+            stale = [
+                id.decode()
+                for id in self.redis.smembers(key)
+                if id.decode() not in expected[key]
+            ]
+            if stale:
+                self._prune(keys=[key, jobs_key], args=stale)
+
+    def clear(self):
+        """Removes every schedule from the index."""
+        keys = list(self.redis.scan_iter(match=f"{PREFIX}:*"))
+        if keys:
+            self.redis.delete(*keys)
+
+
+def _key(kind: str, id: str) -> str:
+    return f"{PREFIX}:{kind}:{id}"
+
+
+def _keys(schedule_id: str) -> Optional[Tuple[str, str]]:
+    parts = schedule_id.split("__")
+    if len(parts) != 3:
+        return None
+    datasource_id, dataset_id, __ = parts
+    return _key("datasource", datasource_id), _key("dataset", dataset_id)
@@ -0,0 +1,161 @@
+import importlib
+import multiprocessing
+import time
+
+from app.core.runner import Runner
+from app.db import engines
+from app.db.client import client, redis_client
+from app.models.datasource import SNOWFLAKE, datasource_from_doc
+from app.settings import settings
+from apscheduler.executors.pool import ProcessPoolExecutor
+from opensearchpy import NotFoundError
+from redis import RedisError
+from sqlalchemy.dialects import registry
+
+# Imported by every process before its first run. Under "forkserver" they're
+# imported once by the fork server and inherited by the processes it forks.
+PRELOAD_MODULES = ["app.core.schedule_runs"]
+
+# Dialects of the connection strings of app.models.datasource. Dialects of
+# connectors that aren't installed are skipped.
+DIALECTS = [
+    "awsathena.rest",
+    "mysql.pymysql",
+    "postgresql.psycopg2",
+    "snowflake",
+    "trino",
+]
+
+# Datasources scored by the time they were last scheduled.
+HOT_DATASOURCES_KEY = "swiple:scheduler:hot_datasources"
+HOT_DATASOURCES_LIMIT = 100
+
+
+def preload():
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+
+    for name in DIALECTS:
+        try:
+            registry.load(name).dbapi()
+        except Exception:
+            pass
+
+
+def mark_hot(schedule_id: str):
+    """Records that the datasource of a schedule was just scheduled."""
+    datasource_id = schedule_id.split("__")[0]
+    try:
+        pipeline = redis_client.pipeline()
+        pipeline.zadd(HOT_DATASOURCES_KEY, {datasource_id: time.time()})
+        pipeline.zremrangebyrank(HOT_DATASOURCES_KEY, 0, -HOT_DATASOURCES_LIMIT - 1)
+        pipeline.execute()
+    except RedisError as ex:
+        print(f"Failed to mark datasource '{datasource_id}' as hot: {ex}")
+
+
+def warm(limit: int):
+    """
+    Opens an engine connection, and builds the DataContext, of the ``limit``
+    datasources scheduled most recently, so the first runs against them
+    don't pay for it.
+    """
+    if limit <= 0:
+        return
+
+    try:
+        datasource_ids = redis_client.zrevrange(HOT_DATASOURCES_KEY, 0, limit - 1)
+    except RedisError as ex:
+        print(f"Failed to list hot datasources: {ex}")
+        return
+
+    for datasource_id in datasource_ids:
+        datasource_id = datasource_id.decode()
+        try:
+            datasource = datasource_from_doc(
+                client.get(index=settings.DATASOURCE_INDEX, id=datasource_id),
+                decrypt_pw=True,
+            )
+            engines.get_engine(datasource).connect().close()
+
+            # Snowflake contexts depend on the schema of the batch
+            if datasource.engine != SNOWFLAKE:
+                with Runner(
+                    datasource=datasource,
+                    batch=None,
+                    meta={},
+                    datasource_id=datasource_id,
+                ).lease_data_context():
+                    pass
+        except NotFoundError:
+            redis_client.zrem(HOT_DATASOURCES_KEY, datasource_id)
+        except Exception as ex:
+            print(f"Failed to warm datasource '{datasource_id}': {ex}")
+
+
+def _init_process(warm_datasources: int):
+    preload()
+    warm(warm_datasources)
+
+
+def _ready():
+    pass
+
+
+class WarmProcessPoolExecutor(ProcessPoolExecutor):
+    """
+    Process pool whose processes are started with the pool, preload Great
+    Expectations and the SQLAlchemy dialects and warm the engines of hot
+    datasources, so runs don't pay for imports and connections.
+
+    The pool is replaced by a fresh one once its processes ran
+    ``max_tasks_per_child`` runs each on average; the old processes exit
+    after finishing the runs they were given. Pools that broke, e.g. because
+    a process was killed, are replaced with the same settings.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 10,
+        max_tasks_per_child: int = 0,
+        warm_datasources: int = 0,
+        start_method: str = "forkserver",
+        pool_kwargs: dict = None,
+    ):
+        context = multiprocessing.get_context(start_method)
+        if start_method == "forkserver":
+            context.set_forkserver_preload(PRELOAD_MODULES)
+
+        self._pool_kwargs = {
+            "mp_context": context,
+            "initializer": _init_process,
+            "initargs": (warm_datasources,),
+            **(pool_kwargs or {}),
+        }
+        self._max_tasks = max_tasks_per_child * int(max_workers)
+        self._tasks = 0
+        super().__init__(max_workers, self._pool_kwargs)
+
+    def start(self, scheduler, alias):
+        super().start(scheduler, alias)
+        self._start_processes()
+
+    def _do_submit_job(self, job, run_times):
+        if self._pool._broken or 0 < self._max_tasks <= self._tasks:
+            self._replace_pool()
+
+        self._tasks += 1
+        mark_hot(job.id)
+        super()._do_submit_job(job, run_times)
+
+    def _replace_pool(self):
+        pool = self._pool
+        self._pool = pool.__class__(pool._max_workers, **self._pool_kwargs)
+        self._tasks = 0
+        self._start_processes()
+        pool.shutdown(wait=False)
+
+    def _start_processes(self):
+        # processes are started on demand, one per submission while none idle
+        for __ in range(self._pool._max_workers):
+            self._pool.submit(_ready)
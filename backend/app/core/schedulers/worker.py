@@ -0,0 +1,67 @@
+import signal
+import threading
+
+from app.core import schedule_runs, work_queue
+from app.core.result_sink import result_sink
+from app.core.schedulers import warm_pool
+from app.settings import settings
+from redis import RedisError
+
+
+class QueueWorker:
+    """
+    Runs the scheduled runs the scheduler leader pushes onto the work queue.
+    Workers keep no state, so any number of them can consume the queue.
+
+    A run is acknowledged once its results are flushed to OpenSearch. Runs of
+    a worker that dies are delivered to another worker once their visibility
+    timeout passes, so a run may be executed more than once.
+    """
+
+    def __init__(self, queue: work_queue.WorkQueue = work_queue.scheduled_runs):
+        self.queue = queue
+        self._stop = threading.Event()
+
+    def run(self):
+        signal.signal(signal.SIGTERM, lambda *args: self.stop())
+        signal.signal(signal.SIGINT, lambda *args: self.stop())
+        warm_pool.preload()
+        warm_pool.warm(settings.SCHEDULER_EXECUTOR_WARM_DATASOURCES)
+        print("-- Worker Started --")
+
+        try:
+            while not self._stop.is_set():
+                if not self.run_once():
+                    self._stop.wait(settings.WORK_QUEUE_POLL_SECONDS)
+        finally:
+            result_sink.close()
+            print("-- Worker Shutdown --")
+
+    def run_once(self) -> bool:
+        """Runs the next queued run, returning False if there was none."""
+        try:
+            message = self.queue.claim()
+        except RedisError as ex:
+            print(f"Failed to claim a scheduled run: {ex}")
+            return False
+
+        if message is None:
+            return False
+
+        with self.queue.keep_visible(message):
+            schedule_runs.execute(message.body)
+            try:
+                result_sink.flush()
+            except Exception as ex:
+                # left unacknowledged, so the run is delivered again
+                print(f"Failed to write the results of {message.id}: {ex}")
+                return True
+
+        try:
+            self.queue.ack(message)
+        except RedisError as ex:
+            print(f"Failed to acknowledge {message.id}: {ex}")
+        return True
+
+    def stop(self):
+        self._stop.set()
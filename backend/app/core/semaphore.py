@@ -0,0 +1,112 @@
+import random
+import threading
+import time
+import uuid
+from typing import Optional
+
+from redis import Redis, RedisError
+
+# Removes expired holders and takes a slot if one is free. Holders are stored
+# in a sorted set scored by the Redis server time of their last heartbeat.
+ACQUIRE_SCRIPT = """
+local now = redis.call('TIME')
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local lease_ms = tonumber(ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now_ms - lease_ms)
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[2]) then
+    redis.call('ZADD', KEYS[1], now_ms, ARGV[3])
+    redis.call('PEXPIRE', KEYS[1], lease_ms)
+    return 1
+end
+return 0
+"""
+
+# Extends the lease of a slot that is still held.
+HEARTBEAT_SCRIPT = """
+local now = redis.call('TIME')
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+if redis.call('ZSCORE', KEYS[1], ARGV[2]) then
+    redis.call('ZADD', KEYS[1], now_ms, ARGV[2])
+    redis.call('PEXPIRE', KEYS[1], tonumber(ARGV[1]))
+    return 1
+end
+return 0
+"""
+
+
+class SemaphoreTimeout(Exception):
+    pass
+
+
+class DistributedSemaphore:
+    """
+    Counting semaphore shared by every API and scheduler process through Redis.
+
+    Callers block until one of ``limit`` slots is free. A held slot is kept
+    alive by a heartbeat thread, so a slot held by a crashed process is freed
+    once its lease expires.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        name: str,
+        limit: int,
+        lease_seconds: int = 60,
+        poll_interval_seconds: float = 1,
+    ):
+        self.redis = redis
+        self.key = f"swiple:semaphore:{name}"
+        self.limit = limit
+        self.lease_ms = lease_seconds * 1000
+        self.poll_interval_seconds = poll_interval_seconds
+        self.token: Optional[str] = None
+        self._acquire = redis.register_script(ACQUIRE_SCRIPT)
+        self._heartbeat = redis.register_script(HEARTBEAT_SCRIPT)
+        self._stop_heartbeat = threading.Event()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+
+    def acquire(self, timeout_seconds: Optional[float] = None):
+        token = str(uuid.uuid4())
+        deadline = (
+            None if timeout_seconds is None else time.monotonic() + timeout_seconds
+        )
+
+        while not self._acquire(
+            keys=[self.key], args=[self.lease_ms, self.limit, token]
+        ):
+            if deadline is not None and time.monotonic() > deadline:
+                raise SemaphoreTimeout(f"timed out waiting for '{self.key}'")
+            # jitter so waiting processes don't poll in lockstep
+            time.sleep(self.poll_interval_seconds * random.uniform(0.5, 1.5))
+
+        self.token = token
+        self._stop_heartbeat.clear()
+        self._heartbeat_thread = threading.Thread(
+            target=self._keep_alive, name=f"{self.key}:heartbeat", daemon=True
+        )
+        self._heartbeat_thread.start()
+
+    def release(self):
+        if self.token is None:
+            return
+
+        self._stop_heartbeat.set()
+        self._heartbeat_thread.join()
+        self.redis.zrem(self.key, self.token)
+        self.token = None
+
+    def _keep_alive(self):
+        interval = self.lease_ms / 3000
+        while not self._stop_heartbeat.wait(interval):
+            try:
+                self._heartbeat(keys=[self.key], args=[self.lease_ms, self.token])
+            except RedisError as ex:
+                print(f"Failed to extend lease for '{self.key}': {ex}")
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
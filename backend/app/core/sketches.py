@@ -0,0 +1,126 @@
+import hashlib
+import math
+from typing import Optional
+
+
+def _hash64(value) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(repr(value).encode(), digest_size=8).digest(), "big"
+    )
+
+
+class HyperLogLog:
+    """
+    Streaming distinct count estimator. With the default precision of 14 the
+    relative standard error is 1.04 / sqrt(2 ** 14), about 0.8%, using 16KB.
+    """
+
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(self.m)
+
+    def add(self, value):
+        h = _hash64(value)
+        index = h >> (64 - self.precision)
+        remainder = h & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = (
+            alpha * self.m**2 / sum(2.0**-register for register in self.registers)
+        )
+
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            # linear counting is more accurate for small cardinalities
+            estimate = self.m * math.log(self.m / zeros)
+
+        return round(estimate)
+
+
+class TDigest:
+    """
+    Streaming quantile estimator (merging t-digest). Quantiles near the median
+    are estimated within a rank error of about 1 / compression.
+    """
+
+    def __init__(self, compression: int = 100, buffer_size: int = 10000):
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.centroids = []  # [mean, weight] sorted by mean
+        self.buffer = []
+        self.count = 0
+
+    @property
+    def rank_error(self) -> float:
+        return 1 / self.compression
+
+    def add(self, value: float):
+        self.buffer.append(value)
+        self.count += 1
+        if len(self.buffer) >= self.buffer_size:
+            self._merge()
+
+    def quantile(self, q: float) -> Optional[float]:
+        self._merge()
+        if not self.centroids:
+            return None
+        if len(self.centroids) == 1:
+            return self.centroids[0][0]
+
+        target = q * self.count
+        cumulative = 0
+        for i, (mean, weight) in enumerate(self.centroids):
+            center = cumulative + weight / 2
+            if target <= center:
+                if i == 0:
+                    return mean
+                previous_mean, previous_weight = self.centroids[i - 1]
+                previous_center = cumulative - previous_weight / 2
+                fraction = (target - previous_center) / (center - previous_center)
+                return previous_mean + fraction * (mean - previous_mean)
+            cumulative += weight
+
+        return self.centroids[-1][0]
+
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _k_inverse(self, k: float) -> float:
+        return (
+            math.sin(min(k, self.compression / 4) * 2 * math.pi / self.compression) + 1
+        ) / 2
+
+    def _merge(self):
+        if not self.buffer:
+            return
+
+        items = sorted(self.centroids + [[value, 1] for value in self.buffer])
+        self.buffer = []
+
+        merged = [items[0][:]]
+        weight_so_far = 0
+        q_limit = self._k_inverse(self._k(0) + 1) * self.count
+
+        for mean, weight in items[1:]:
+            current = merged[-1]
+            if weight_so_far + current[1] + weight <= q_limit:
+                current[0] += (mean - current[0]) * weight / (current[1] + weight)
+                current[1] += weight
+            else:
+                weight_so_far += current[1]
+                q_limit = (
+                    self._k_inverse(self._k(weight_so_far / self.count) + 1)
+                    * self.count
+                )
+                merged.append([mean, weight])
+
+        self.centroids = merged
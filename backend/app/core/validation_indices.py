@@ -0,0 +1,147 @@
+import datetime
+from typing import Iterable, Iterator, List, Optional
+
+from app.core.response_cache import VALIDATIONS, response_cache
+from app.db.client import client
+from app.settings import settings
+
+DAY = "day"
+MONTH = "month"
+
+FORMATS = {DAY: "%Y.%m.%d", MONTH: "%Y.%m"}
+
+# Longest period of daily indices searched by name before whole months are
+# searched instead, so request lines stay short.
+MAX_DAILY_INDICES = 31
+
+
+def index_name(run_date, period: str = None) -> str:
+    """The index a validation that ran at ``run_date`` is written to."""
+    period = period or settings.VALIDATION_INDEX_PERIOD
+    if not isinstance(run_date, datetime.datetime):
+        run_date = datetime.datetime.fromisoformat(str(run_date))
+    run_date = run_date.astimezone(datetime.timezone.utc)
+    return f"{settings.VALIDATION_INDEX}-{run_date.strftime(FORMATS[period])}"
+
+
+def route(results: Iterable[dict]) -> Iterator[dict]:
+    """Bulk actions that write each result to the index of its run date."""
+    for result in results:
+        yield {"_index": index_name(result["run_date"]), **result}
+
+
+def since(days: int) -> List[str]:
+    """The indices that can hold validations of the last ``days`` days."""
+    today = datetime.datetime.now(datetime.timezone.utc)
+    start = today - datetime.timedelta(days=days)
+
+    if settings.VALIDATION_INDEX_PERIOD == DAY and days <= MAX_DAILY_INDICES:
+        return [
+            index_name(start + datetime.timedelta(days=i), DAY)
+            for i in range((today.date() - start.date()).days + 1)
+        ]
+
+    indices = []
+    month = start.replace(day=1)
+    while month <= today:
+        name = index_name(month, MONTH)
+        indices.append(f"{name}.*" if settings.VALIDATION_INDEX_PERIOD == DAY else name)
+        month = (month + datetime.timedelta(days=32)).replace(day=1)
+    return indices
+
+
+def initialize(mappings: dict):
+    """
+    Creates the index template of the time-based validation indices and the
+    index of the current period, so the alias exists before the first write.
+
+    A ``validations`` index from before time-based indices is reindexed into
+    them and deleted, as an alias can't share its name with an index.
+    """
+    alias = settings.VALIDATION_INDEX
+
+    if client.indices.exists(index=alias) and not client.indices.exists_alias(
+        name=alias
+    ):
+        _put_template(mappings, aliases={})
+        _migrate()
+
+    _put_template(mappings, aliases={alias: {}})
+    client.indices.put_alias(index=f"{alias}-*", name=alias, ignore=[404])
+
+    current = index_name(datetime.datetime.now(datetime.timezone.utc))
+    if not client.indices.exists(index=current):
+        client.indices.create(index=current)
+        print(f"Created index {current}")
+
+
+def apply_retention():
+    """
+    Deletes the validation indices whose period ended more than
+    VALIDATION_RETENTION_DAYS ago. The most recent index is always kept.
+    """
+    if not settings.VALIDATION_RETENTION_DAYS:
+        return
+
+    cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
+        days=settings.VALIDATION_RETENTION_DAYS
+    )
+    indices = []
+    for index in client.indices.get_alias(name=settings.VALIDATION_INDEX):
+        end = _period_end(index)
+        if end is not None:
+            indices.append((end, index))
+
+    for end, index in sorted(indices)[:-1]:
+        if end <= cutoff:
+            client.indices.delete(index=index, ignore=[404])
+            print(f"Deleted index {index}")
+            response_cache.invalidate(VALIDATIONS)
+
+
+def _put_template(mappings: dict, aliases: dict):
+    client.indices.put_index_template(
+        name=settings.VALIDATION_INDEX,
+        body={
+            "index_patterns": [f"{settings.VALIDATION_INDEX}-*"],
+            "template": {"mappings": mappings, "aliases": aliases},
+        },
+    )
+
+
+def _migrate():
+    prefix = settings.VALIDATION_INDEX
+    # characters of the run_date, "yyyy-MM-dd" or "yyyy-MM", naming the index
+    length = 10 if settings.VALIDATION_INDEX_PERIOD == DAY else 7
+
+    print(f"Reindexing {prefix} into time-based indices")
+    client.reindex(
+        body={
+            "source": {"index": prefix},
+            "dest": {"index": f"{prefix}-migrated"},
+            "script": {
+                "lang": "painless",
+                "source": "ctx._index = params.prefix + '-' + "
+                "ctx._source.run_date.substring(0, params.length).replace('-', '.')",
+                "params": {"prefix": prefix, "length": length},
+            },
+        },
+        wait_for_completion=True,
+        request_timeout=3600,
+    )
+    client.indices.delete(index=prefix)
+
+
+def _period_end(index: str) -> Optional[datetime.datetime]:
+    suffix = index[len(settings.VALIDATION_INDEX) + 1 :]
+    for period, date_format in FORMATS.items():
+        try:
+            start = datetime.datetime.strptime(suffix, date_format)
+        except ValueError:
+            continue
+
+        start = start.replace(tzinfo=datetime.timezone.utc)
+        if period == DAY:
+            return start + datetime.timedelta(days=1)
+        return (start + datetime.timedelta(days=32)).replace(day=1)
+    return None
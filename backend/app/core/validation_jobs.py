@@ -0,0 +1,128 @@
+import threading
+import traceback
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from app import constants as c
+from app import utils
+from app.db.client import redis_client
+from app.settings import settings
+from redis import RedisError
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.VALIDATION_JOB_WORKERS,
+    thread_name_prefix="validation-job",
+)
+# futures of the jobs that haven't finished, by job id
+_futures: Dict[str, Future] = {}
+_futures_lock = threading.Lock()
+
+
+def _key(job_id: str) -> str:
+    return f"swiple:validation_job:{job_id}"
+
+
+def submit(dataset_id: str, validate: Callable[[str], list]) -> dict:
+    """
+    Queues ``validate(dataset_id)`` on the API's validation worker pool and
+    returns the job document. Job state lives in a Redis hash so any API
+    replica can report on it.
+    """
+    job = {
+        "job_id": str(uuid.uuid4()),
+        "dataset_id": dataset_id,
+        "status": c.JOB_QUEUED,
+        "create_date": utils.current_time(),
+    }
+    _update(job["job_id"], job)
+
+    with _futures_lock:
+        future = _executor.submit(_run, job["job_id"], dataset_id, validate)
+        _futures[job["job_id"]] = future
+    future.add_done_callback(lambda __: _forget(job["job_id"]))
+    return job
+
+
+def get(job_id: str) -> Optional[dict]:
+    job = redis_client.hgetall(_key(job_id))
+
+    if not job:
+        return None
+
+    job = {key.decode(): value.decode() for key, value in job.items()}
+    for field in ["result_count", "success_count"]:
+        if field in job:
+            job[field] = int(job[field])
+    return job
+
+
+def shutdown(wait: bool = True):
+    """
+    Stops accepting jobs and cancels the queued ones, marking them as
+    cancelled so clients stop waiting for them. Running jobs finish; with
+    ``wait`` this returns once they did, so the resources they write
+    through can be closed afterwards.
+    """
+    with _futures_lock:
+        _executor.shutdown(wait=False)
+        futures = list(_futures.items())
+
+    for job_id, future in futures:
+        if not future.cancel():
+            continue
+        try:
+            _update(
+                job_id,
+                {
+                    "status": c.JOB_CANCELLED,
+                    "end_date": utils.current_time(),
+                    "exception_message": "The API shut down before the job started",
+                },
+            )
+        except RedisError as ex:
+            print(f"Failed to cancel validation job '{job_id}': {ex}")
+
+    if wait:
+        _executor.shutdown(wait=True)
+
+
+def _forget(job_id: str):
+    with _futures_lock:
+        _futures.pop(job_id, None)
+
+
+def _run(job_id: str, dataset_id: str, validate: Callable[[str], list]):
+    _update(job_id, {"status": c.JOB_RUNNING, "start_date": utils.current_time()})
+
+    try:
+        results = validate(dataset_id)
+    except Exception as ex:
+        _update(
+            job_id,
+            {
+                "status": c.JOB_FAILED,
+                "end_date": utils.current_time(),
+                "exception_message": str(getattr(ex, "detail", ex)),
+                "exception_traceback": traceback.format_exc(),
+            },
+        )
+        return
+
+    _update(
+        job_id,
+        {
+            "status": c.JOB_SUCCEEDED,
+            "end_date": utils.current_time(),
+            "result_count": len(results),
+            "success_count": sum(1 for result in results if result["success"]),
+        },
+    )
+
+
+def _update(job_id: str, fields: dict):
+    key = _key(job_id)
+    pipeline = redis_client.pipeline()
+    pipeline.hset(key, mapping=fields)
+    pipeline.expire(key, settings.VALIDATION_JOB_TTL_SECONDS)
+    pipeline.execute()
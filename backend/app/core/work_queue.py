@@ -0,0 +1,172 @@
+import contextlib
+import json
+import threading
+import uuid
+from typing import NamedTuple, Optional
+
+from app.db.client import redis_client
+from app.settings import settings
+from redis import Redis, RedisError
+
+# Puts messages whose visibility timeout passed back on the queue, then
+# delivers the oldest message. Messages delivered more than ARGV[2] times are
+# moved to the dead letter list instead.
+CLAIM_SCRIPT = """
+local now = redis.call('TIME')
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now_ms)) do
+    redis.call('ZREM', KEYS[2], id)
+    redis.call('RPUSH', KEYS[1], id)
+end
+
+local id = redis.call('RPOP', KEYS[1])
+if not id then
+    return nil
+end
+
+local body = redis.call('HGET', KEYS[3], id)
+local delivery = redis.call('HINCRBY', KEYS[4], id, 1)
+if not body or delivery > tonumber(ARGV[2]) then
+    if body then
+        redis.call('LPUSH', KEYS[5], body)
+        redis.call('LTRIM', KEYS[5], 0, tonumber(ARGV[3]) - 1)
+    end
+    redis.call('HDEL', KEYS[3], id)
+    redis.call('HDEL', KEYS[4], id)
+    return nil
+end
+
+redis.call('ZADD', KEYS[2], now_ms + tonumber(ARGV[1]), id)
+return {id, body, delivery}
+"""
+
+# Extends the visibility timeout of a delivery that hasn't been redelivered.
+EXTEND_SCRIPT = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+local now = redis.call('TIME')
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+redis.call('ZADD', KEYS[1], 'XX', now_ms + tonumber(ARGV[3]), ARGV[1])
+return 1
+"""
+
+# Deletes a message once its delivery is done, unless it was redelivered.
+ACK_SCRIPT = """
+if redis.call('HGET', KEYS[3], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+return 1
+"""
+
+DEAD_LETTER_LIMIT = 1000
+
+
+class Message(NamedTuple):
+    id: str
+    body: dict
+    delivery: int
+
+
+class WorkQueue:
+    """
+    At least once work queue in Redis. A claimed message is hidden from other
+    consumers for ``visibility_timeout_seconds`` and delivered again unless it
+    is acknowledged, or kept visible with ``keep_visible``, before then.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        name: str,
+        visibility_timeout_seconds: int = 300,
+        max_deliveries: int = 3,
+    ):
+        self.redis = redis
+        self.pending_key = f"swiple:work_queue:{name}:pending"
+        self.processing_key = f"swiple:work_queue:{name}:processing"
+        self.messages_key = f"swiple:work_queue:{name}:messages"
+        self.deliveries_key = f"swiple:work_queue:{name}:deliveries"
+        self.dead_letters_key = f"swiple:work_queue:{name}:dead_letters"
+        self.visibility_timeout_ms = visibility_timeout_seconds * 1000
+        self.max_deliveries = max_deliveries
+        self._claim = redis.register_script(CLAIM_SCRIPT)
+        self._extend = redis.register_script(EXTEND_SCRIPT)
+        self._ack = redis.register_script(ACK_SCRIPT)
+
+    def push(self, body: dict) -> str:
+        id = str(uuid.uuid4())
+        pipeline = self.redis.pipeline(transaction=True)
+        pipeline.hset(self.messages_key, id, json.dumps(body))
+        pipeline.lpush(self.pending_key, id)
+        pipeline.execute()
+        return id
+
+    def claim(self) -> Optional[Message]:
+        claimed = self._claim(
+            keys=[
+                self.pending_key,
+                self.processing_key,
+                self.messages_key,
+                self.deliveries_key,
+                self.dead_letters_key,
+            ],
+            args=[self.visibility_timeout_ms, self.max_deliveries, DEAD_LETTER_LIMIT],
+        )
+        if not claimed:
+            return None
+
+        id, body, delivery = claimed
+        return Message(id.decode(), json.loads(body), int(delivery))
+
+    def extend(self, message: Message) -> bool:
+        """Restarts the visibility timeout, returning False if the message was redelivered."""
+        return bool(
+            self._extend(
+                keys=[self.processing_key, self.deliveries_key],
+                args=[message.id, message.delivery, self.visibility_timeout_ms],
+            )
+        )
+
+    def ack(self, message: Message) -> bool:
+        return bool(
+            self._ack(
+                keys=[self.processing_key, self.messages_key, self.deliveries_key],
+                args=[message.id, message.delivery],
+            )
+        )
+
+    @contextlib.contextmanager
+    def keep_visible(self, message: Message):
+        """Extends the visibility timeout of a message while it's processed."""
+        stop = threading.Event()
+
+        def keep_alive():
+            while not stop.wait(self.visibility_timeout_ms / 3000):
+                try:
+                    if not self.extend(message):
+                        print(f"Message {message.id} was delivered again")
+                        return
+                except RedisError as ex:
+                    print(f"Failed to extend visibility of {message.id}: {ex}")
+
+        thread = threading.Thread(
+            target=keep_alive, name=f"{message.id}:visibility", daemon=True
+        )
+        thread.start()
+        try:
+            yield message
+        finally:
+            stop.set()
+            thread.join()
+
+
+scheduled_runs = WorkQueue(
+    redis_client,
+    "scheduled_runs",
+    visibility_timeout_seconds=settings.WORK_QUEUE_VISIBILITY_TIMEOUT_SECONDS,
+    max_deliveries=settings.WORK_QUEUE_MAX_DELIVERIES,
+)
@@ -1,6 +1,7 @@
 from app.models.auth import UserDB
 from app.settings import settings
 from opensearchpy import AsyncOpenSearch, OpenSearch
+from redis import Redis
 
 # Create the client with SSL/TLS enabled, but hostname verification disabled.
 client = OpenSearch(
@@ -14,6 +15,7 @@ client = OpenSearch(
     ssl_assert_hostname=False,
     ssl_show_warn=False,
     # ca_certs=ca_certs_path
+    maxsize=settings.OPENSEARCH_MAX_CONNECTIONS,
 )
 
 
@@ -24,6 +26,14 @@ async_client = AsyncOpenSearch(
     verify_certs=False,
     ssl_assert_hostname=False,
     ssl_show_warn=False,
+    maxsize=settings.OPENSEARCH_MAX_CONNECTIONS,
+)
+
+
+# Shared with the scheduler's job store. Connections are opened lazily.
+redis_client = Redis(
+    db=settings.SCHEDULER_REDIS_DB,
+    **settings.SCHEDULER_REDIS_KWARGS,
 )
 
 
@@ -0,0 +1,79 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import sqlalchemy as sa
+from app.settings import settings
+
+_engines: "OrderedDict[tuple, sa.engine.Engine]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def fingerprint(connection_string: str) -> str:
+    """Hash of a connection string so credentials are never used as a key."""
+    return hashlib.sha256(connection_string.encode()).hexdigest()
+
+
+def _datasource_id(datasource) -> Optional[str]:
+    return getattr(datasource, "key", None) or getattr(
+        datasource, "datasource_id", None
+    )
+
+
+def get_engine(datasource, connection_string: str = None) -> sa.engine.Engine:
+    """
+    Returns a pooled SQLAlchemy engine for the datasource.
+
+    Engines are shared by the introspect, sample, datasource test and
+    validation paths and are keyed by datasource id and a fingerprint of the
+    connection string, so a credential change never reuses an old pool.
+    """
+    if connection_string is None:
+        connection_string = datasource.connection_string()
+
+    key = (_datasource_id(datasource), fingerprint(connection_string))
+
+    with _lock:
+        engine = _engines.get(key)
+
+        if engine is not None:
+            _engines.move_to_end(key)
+            return engine
+
+        engine = sa.create_engine(
+            connection_string,
+            pool_size=settings.DATASOURCE_POOL_SIZE,
+            max_overflow=settings.DATASOURCE_POOL_MAX_OVERFLOW,
+            pool_recycle=settings.DATASOURCE_POOL_RECYCLE_SECONDS,
+            pool_pre_ping=True,
+        )
+        _engines[key] = engine
+
+        while len(_engines) > settings.DATASOURCE_ENGINE_REGISTRY_SIZE:
+            __, evicted = _engines.popitem(last=False)
+            evicted.dispose()
+
+    return engine
+
+
+def dispose(datasource_id: Optional[str]):
+    """Closes the pools of every engine that belongs to ``datasource_id``."""
+    with _lock:
+        for key in [key for key in _engines if key[0] == datasource_id]:
+            _engines.pop(key).dispose()
+
+
+def dispose_engine(engine: sa.engine.Engine):
+    """Removes a single engine from the registry, e.g. after a failed connection test."""
+    with _lock:
+        for key in [key for key, value in _engines.items() if value is engine]:
+            _engines.pop(key)
+    engine.dispose()
+
+
+def dispose_all():
+    with _lock:
+        while _engines:
+            __, engine = _engines.popitem()
+            engine.dispose()
@@ -0,0 +1,177 @@
+import base64
+import binascii
+import json
+from typing import List, Optional, Tuple
+
+from app.core import validation_indices
+from app.db.client import async_client
+from app.settings import settings
+from fastapi import HTTPException, status
+from opensearchpy import NotFoundError
+from opensearchpy.helpers import async_bulk
+
+# Hits read per request when paginating.
+PAGE_SIZE = 1000
+
+
+class Repository:
+    """
+    Async access to the documents of one OpenSearch index. Endpoints awaiting
+    a repository share the connection pool of ``async_client`` instead of
+    holding a threadpool worker for the duration of the request.
+
+    ``search_params`` are added to every search and count.
+    """
+
+    def __init__(self, index: str, **search_params):
+        self.index = index
+        self.search_params = search_params
+
+    async def get(self, id: str, **kwargs) -> dict:
+        return await async_client.get(index=self.index, id=id, **kwargs)
+
+    async def exists(self, id: str) -> bool:
+        return await async_client.exists(index=self.index, id=id)
+
+    async def search(self, body: dict, **kwargs) -> dict:
+        return await async_client.search(
+            index=self.index, body=body, **self.search_params, **kwargs
+        )
+
+    async def count(self, body: dict) -> int:
+        response = await async_client.count(
+            index=self.index, body=body, **self.search_params
+        )
+        return response["count"]
+
+    async def put(self, id: str, body: dict, **kwargs) -> dict:
+        return await async_client.index(index=self.index, id=id, body=body, **kwargs)
+
+    async def update(self, id: str, doc: dict, **kwargs) -> dict:
+        return await async_client.update(
+            index=self.index, id=id, body={"doc": doc}, **kwargs
+        )
+
+    async def update_by_query(self, body: dict, **kwargs) -> dict:
+        return await async_client.update_by_query(index=self.index, body=body, **kwargs)
+
+    async def delete(self, id: str, **kwargs) -> dict:
+        return await async_client.delete(index=self.index, id=id, **kwargs)
+
+    async def delete_by_query(self, body: dict, **kwargs) -> dict:
+        return await async_client.delete_by_query(index=self.index, body=body, **kwargs)
+
+    async def bulk(self, documents: list, **kwargs):
+        return await async_bulk(async_client, documents, index=self.index, **kwargs)
+
+    async def paginate(
+        self,
+        body: dict,
+        sort: list,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Tuple[list, Optional[str]]:
+        """
+        Searches with search_after, sorted by ``sort`` and then ``_id`` so pages
+        never skip or repeat hits. Returns a page of ``limit`` hits and the
+        cursor of the next page, or every hit when ``limit`` isn't set.
+
+        With OPENSEARCH_PIT_ENABLED, the pages of a cursor are read from the
+        point in time snapshot of its first page.
+        """
+        search_after, pit_id = _decode_cursor(cursor) if cursor else (None, None)
+        if settings.OPENSEARCH_PIT_ENABLED and pit_id is None:
+            pit_id = await self._open_pit()
+
+        hits = []
+        while True:
+            size = min(limit - len(hits), PAGE_SIZE) if limit else PAGE_SIZE
+            page_body = {**body, "size": size, "sort": [*sort, {"_id": "asc"}]}
+            if search_after:
+                page_body["search_after"] = search_after
+
+            try:
+                if pit_id:
+                    page_body["pit"] = {
+                        "id": pit_id,
+                        "keep_alive": settings.OPENSEARCH_PIT_KEEP_ALIVE,
+                    }
+                    response = await async_client.search(body=page_body)
+                    pit_id = response.get("pit_id", pit_id)
+                else:
+                    response = await self.search(page_body)
+            except NotFoundError:
+                if not cursor:
+                    raise
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="cursor has expired",
+                )
+
+            page = response["hits"]["hits"]
+            hits.extend(page)
+            if page:
+                search_after = page[-1]["sort"]
+
+            if len(page) < size:
+                break
+            if limit and len(hits) >= limit:
+                return hits, _encode_cursor(search_after, pit_id)
+
+        if pit_id:
+            await async_client.transport.perform_request(
+                "DELETE", "/_search/point_in_time", body={"pit_id": [pit_id]}
+            )
+        return hits, None
+
+    async def _open_pit(self) -> str:
+        response = await async_client.transport.perform_request(
+            "POST",
+            f"/{self.index}/_search/point_in_time",
+            params={"keep_alive": settings.OPENSEARCH_PIT_KEEP_ALIVE},
+        )
+        return response["pit_id"]
+
+
+class TimeSeriesRepository(Repository):
+    """Repository over the alias of time-based indices."""
+
+    def since(self, days: int) -> Repository:
+        """Only searches the indices that can hold documents of the last ``days`` days."""
+        return Repository(
+            ",".join(validation_indices.since(days)), ignore_unavailable=True
+        )
+
+
+def _encode_cursor(search_after: list, pit_id: Optional[str]) -> str:
+    cursor = json.dumps({"search_after": search_after, "pit_id": pit_id})
+    return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[list, Optional[str]]:
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return decoded["search_after"], decoded["pit_id"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"invalid cursor '{cursor}'",
+        )
+
+
+async def msearch(searches: List[Tuple[Repository, dict]]) -> list:
+    """Runs several searches in one request, returning the responses in order."""
+    body = []
+    for repository, query in searches:
+        body.extend([{"index": repository.index, **repository.search_params}, query])
+
+    response = await async_client.msearch(body=body)
+    return response["responses"]
+
+
+datasources = Repository(settings.DATASOURCE_INDEX)
+datasets = Repository(settings.DATASET_INDEX)
+expectations = Repository(settings.EXPECTATION_INDEX)
+validations = TimeSeriesRepository(settings.VALIDATION_INDEX)
+rollups = Repository(settings.VALIDATION_ROLLUP_INDEX)
+schedule_runs = Repository(settings.SCHEDULE_RUN_INDEX)
@@ -1,6 +1,9 @@
 import app.constants as c
 from app.api.api_v1 import auth_router
+from app.core import validation_jobs
+from app.core.result_sink import result_sink
 from app.core.schedulers.scheduler import scheduler
+from app.db import engines
 from app.db.client import async_client, client
 from app.settings import settings
 from fastapi import FastAPI
@@ -16,6 +19,7 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[c.NEXT_CURSOR_HEADER],
     )
 
 app.include_router(auth_router.router, prefix=settings.API_VERSION)
@@ -39,8 +43,16 @@ async def startup():
 
 @app.router.on_event("shutdown")
 async def shutdown():
-    await async_client.close()
-    client.close()
+    # Running validations, and the run history the scheduler records, write
+    # through the sink, clients and engines closed below, so they're waited
+    # for first.
+    if settings.APP == c.APP_SWIPLE_API:
+        validation_jobs.shutdown(wait=True)
 
     if settings.APP == c.APP_SCHEDULER:
         scheduler.shutdown()
+
+    result_sink.close()
+    await async_client.close()
+    client.close()
+    engines.dispose_all()
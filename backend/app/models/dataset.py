@@ -2,7 +2,7 @@ from typing import Optional
 
 from app.models.base_model import BaseModel
 from app.models.datasource import Engines
-from pydantic import Field, constr
+from pydantic import Field, confloat, conint, constr, root_validator
 
 
 class RuntimeParameters(BaseModel):
@@ -10,6 +10,26 @@ class RuntimeParameters(BaseModel):
     query: Optional[str]
 
 
+class Sampling(BaseModel):
+    fraction: Optional[confloat(gt=0, le=1)]
+    max_rows: Optional[conint(ge=1)]
+    seed: int = 0
+    # sample on a hash of this column instead of the engine's native sampling.
+    # Required for reproducible samples on Redshift, Athena and Trino, and for
+    # max_rows, which keeps the rows with the lowest hashes.
+    hash_column: Optional[str]
+
+
+class Partitioning(BaseModel):
+    column: str
+    # number of most recent partitions validated each run
+    lookback: conint(ge=1, le=1000) = 30
+    # column set when a row changes, e.g. "updated_at". Partitions are validated
+    # again when their row count or the column's latest value changes; without
+    # it, rows corrected in place aren't noticed.
+    change_column: Optional[str]
+
+
 class Sample(BaseModel):
     columns: list[str]
     rows: str
@@ -27,11 +47,36 @@ class Dataset(BaseModel):
         constr(max_length=500)
     ]  # requires update in src/screens/datasetOverview/components/DatasetModal
     runtime_parameters: Optional[RuntimeParameters]
+    # timestamp or monotonically increasing id column. When set, runs only
+    # validate rows added since the previous run, and are skipped when none were.
+    watermark_column: Optional[str]
+    sampling: Optional[Sampling]
+    partitioning: Optional[Partitioning]
     sample: Optional[Sample]
     created_by: Optional[str]
     create_date: Optional[str]
     modified_date: Optional[str]
 
+    @root_validator
+    def check_validation_modes(cls, values):
+        sampling = values.get("sampling")
+
+        if sampling and values.get("watermark_column"):
+            raise ValueError(
+                "sampling can't be used with a watermark column as rolling metrics require every row"
+            )
+        if values.get("partitioning") and values.get("watermark_column"):
+            raise ValueError(
+                "partitioning can't be used with a watermark column, use the partition lookback instead"
+            )
+        if sampling and not (sampling.fraction or sampling.max_rows):
+            raise ValueError("sampling requires a fraction or max_rows")
+        if sampling and sampling.max_rows and not sampling.hash_column:
+            raise ValueError(
+                "sampling max_rows requires a hash column to select random rows"
+            )
+        return values
+
 
 class ResponseDataset(Dataset):
     key: str
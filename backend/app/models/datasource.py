@@ -1,6 +1,7 @@
-from typing import Literal, Optional
+from typing import Literal, Optional, Tuple
 
 from app.core import security
+from app.db import repository
 from app.db.client import client
 from app.models.base_model import BaseModel
 from app.settings import settings
@@ -18,6 +19,9 @@ TRINO = "Trino"
 
 Engines = Literal[ATHENA, POSTGRESQL, MYSQL, REDSHIFT, SNOWFLAKE, TRINO]
 
+# Optional limits of every datasource, which remove the limit when empty.
+OPTIONAL_LIMITS = ["max_expectation_workers", "max_concurrent_validations"]
+
 
 class Datasource(BaseModel):
     class Config:
@@ -27,6 +31,17 @@ class Datasource(BaseModel):
     engine: Engines
     datasource_name: str
     description: str
+    max_expectation_workers: Optional[int] = Field(
+        ge=1,
+        le=32,
+        placeholder=1,
+        description="Number of expectation groups validated concurrently for a dataset. Leave empty to validate sequentially.",
+    )
+    max_concurrent_validations: Optional[int] = Field(
+        ge=1,
+        placeholder=1,
+        description="Maximum number of datasets validated against this datasource at the same time. Further validations wait for a free slot. Leave empty for no limit.",
+    )
     created_by: Optional[str]
     create_date: Optional[str]
     modified_date: Optional[str]
@@ -37,6 +52,33 @@ class Datasource(BaseModel):
     def expectation_meta(self):
         """Returns connection metadata to be included in validation."""
 
+    def sample_query(
+        self, relation: str, alias: Optional[str], fraction: float, seed: int
+    ) -> str:
+        """
+        Returns a query selecting a random ``fraction`` of the rows of a table,
+        or of a subquery named ``alias``, using the engine's native sampling.
+        """
+
+    def hash_bucket(self, value: str, seed: int) -> str:
+        """
+        Returns an expression mapping ``value`` to a non-negative integer, used
+        for deterministic hash based sampling. NULL values must map to a
+        bucket too, or rows with a NULL hash column are never sampled.
+        """
+
+    def approx_count_distinct(self, column: str) -> Optional[Tuple[str, float]]:
+        """
+        Returns the engine's approximate distinct count of ``column`` and its
+        relative standard error, or None when the engine has no native sketch.
+        """
+
+    def approx_median(self, column: str) -> Optional[Tuple[str, float]]:
+        """
+        Returns the engine's approximate median of ``column`` and its rank
+        error, or None when the engine has no native sketch.
+        """
+
 
 class Athena(Datasource):
     engine: str = Field(ATHENA, const=True)
@@ -62,6 +104,20 @@ class Athena(Datasource):
             "s3_staging_dir": self.s3_staging_dir,
         }
 
+    def sample_query(self, relation, alias, fraction, seed):
+        # Bernoulli sampling can't be seeded
+        return f"SELECT * FROM {relation} TABLESAMPLE BERNOULLI ({fraction * 100})"
+
+    def hash_bucket(self, value, seed):
+        # abs() of the smallest bigint overflows, the mod keeps it in range
+        return f"abs(mod(from_big_endian_64(xxhash64(to_utf8(coalesce(cast({value} as varchar), '') || '{seed}'))), 9223372036854775807))"
+
+    def approx_count_distinct(self, column):
+        return f"approx_distinct({column})", 0.023
+
+    def approx_median(self, column):
+        return f"approx_percentile({column}, 0.5)", 0.01
+
 
 class PostgreSQL(Datasource):
     engine: str = Field(POSTGRESQL, const=True)
@@ -80,6 +136,17 @@ class PostgreSQL(Datasource):
             "database": self.database,
         }
 
+    def sample_query(self, relation, alias, fraction, seed):
+        if alias is None:
+            return f"SELECT * FROM {relation} TABLESAMPLE BERNOULLI ({fraction * 100}) REPEATABLE ({seed})"
+        # TABLESAMPLE only applies to tables, hash the whole row of subqueries
+        bucket = self.hash_bucket(alias, seed)
+        return f"SELECT * FROM {relation} WHERE mod({bucket}, 1000000) < {round(fraction * 1000000)}"
+
+    def hash_bucket(self, value, seed):
+        # abs() of the smallest int4 overflows, so the hash is widened first
+        return f"abs(hashtext(coalesce(({value})::text, '') || '{seed}')::bigint)"
+
 
 class MySQL(Datasource):
     engine: str = Field(MYSQL, const=True)
@@ -98,6 +165,12 @@ class MySQL(Datasource):
             "database": self.database,
         }
 
+    def sample_query(self, relation, alias, fraction, seed):
+        return f"SELECT * FROM {relation} WHERE rand({seed}) < {fraction}"
+
+    def hash_bucket(self, value, seed):
+        return f"crc32(concat(coalesce({value}, ''), '{seed}'))"
+
 
 class Redshift(Datasource):
     engine: str = Field(REDSHIFT, const=True)
@@ -116,6 +189,18 @@ class Redshift(Datasource):
             "database": self.database,
         }
 
+    def sample_query(self, relation, alias, fraction, seed):
+        # Redshift has neither TABLESAMPLE nor seeded row functions, samples are
+        # only reproducible when sampling on a hash column.
+        return f"SELECT * FROM {relation} WHERE random() < {fraction}"
+
+    def hash_bucket(self, value, seed):
+        # abs() of the smallest bigint overflows, the mod keeps it in range
+        return f"abs(mod(fnv_hash(coalesce(cast({value} as varchar), ''), {seed}), 9223372036854775807))"
+
+    def approx_count_distinct(self, column):
+        return f"APPROXIMATE COUNT(DISTINCT {column})", 0.02
+
 
 class Snowflake(Datasource):
     engine: str = Field(SNOWFLAKE, const=True)
@@ -156,6 +241,22 @@ class Snowflake(Datasource):
             "database": self.database,
         }
 
+    def sample_query(self, relation, alias, fraction, seed):
+        if alias is None:
+            return f"SELECT * FROM {relation} SAMPLE BERNOULLI ({fraction * 100}) SEED ({seed})"
+        # seeds are not supported when sampling subqueries
+        return f"SELECT * FROM {relation} SAMPLE BERNOULLI ({fraction * 100})"
+
+    def hash_bucket(self, value, seed):
+        return f"abs(hash(coalesce(cast({value} as varchar), ''), {seed}))"
+
+    def approx_count_distinct(self, column):
+        return f"approx_count_distinct({column})", 0.0162
+
+    def approx_median(self, column):
+        # t-digest, Snowflake doesn't document an error bound
+        return f"approx_percentile({column}, 0.5)", None
+
 
 class Trino(Datasource):
     engine: str = Field(TRINO, const=True)
@@ -183,6 +284,20 @@ class Trino(Datasource):
             "database": self.database,
         }
 
+    def sample_query(self, relation, alias, fraction, seed):
+        # Bernoulli sampling can't be seeded
+        return f"SELECT * FROM {relation} TABLESAMPLE BERNOULLI ({fraction * 100})"
+
+    def hash_bucket(self, value, seed):
+        # abs() of the smallest bigint overflows, the mod keeps it in range
+        return f"abs(mod(from_big_endian_64(xxhash64(to_utf8(coalesce(cast({value} as varchar), '') || '{seed}'))), 9223372036854775807))"
+
+    def approx_count_distinct(self, column):
+        return f"approx_distinct({column})", 0.023
+
+    def approx_median(self, column):
+        return f"approx_percentile({column}, 0.5)", 0.01
+
 
 # An update to "_update_datasource" update_by_query and Dataset.js breadcrumb for BigQuery to work.
 # class BigQuery(Datasource):
@@ -209,6 +324,22 @@ def get_datasource(key: str, decrypt_pw: bool = False):
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"datasource with id '{key}' does not exist",
         )
+    return datasource_from_doc(ds_response, decrypt_pw)
+
+
+async def fetch_datasource(key: str, decrypt_pw: bool = False):
+    """Async variant of get_datasource for endpoints."""
+    try:
+        ds_response = await repository.datasources.get(key)
+    except NotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"datasource with id '{key}' does not exist",
+        )
+    return datasource_from_doc(ds_response, decrypt_pw)
+
+
+def datasource_from_doc(ds_response: dict, decrypt_pw: bool = False):
     ds_response["_source"]["key"] = ds_response["_id"]
     ds = ds_response["_source"]
 
@@ -12,6 +12,10 @@ class IgnoreRowIf(str, Enum):
     neither = "neither"
 
 
+# kwargs naming the columns an expectation is on, mapped as keywords
+COLUMN_KWARGS = ["column", "column_A", "column_B", "column_list", "column_set"]
+
+
 class Expectation(BaseModel):
     dataset_id: str
     datasource_id: str
@@ -742,6 +746,7 @@ class ExpectColumnMedianToBeBetween(BaseModel):
             description="If True, the column median must be strictly smaller than max value.",
             default=False,
         )
+        approximate: bool = Field(description=c.APPROXIMATE, default=False)
         result_format: str = "SUMMARY"
         include_config: bool = True
         catch_exceptions: bool = True
@@ -783,6 +788,7 @@ class ExpectColumnUniqueValueCountToBeBetween(BaseModel):
         max_value: int = Field(
             description="The maximum number of unique values allowed. If max_value is None, then min_value is treated as a lower bound"
         )
+        approximate: bool = Field(description=c.APPROXIMATE, default=False)
         result_format: str = "SUMMARY"
         include_config: bool = True
         catch_exceptions: bool = True
@@ -829,6 +835,7 @@ class ExpectColumnProportionOfUniqueValuesToBeBetween(BaseModel):
             description="If True, the maximum proportion of unique values must be strictly smaller than max value.",
             default=False,
         )
+        approximate: bool = Field(description=c.APPROXIMATE, default=False)
         result_format: str = "SUMMARY"
         include_config: bool = True
         catch_exceptions: bool = True
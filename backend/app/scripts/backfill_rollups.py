@@ -0,0 +1,5 @@
+from app.core import rollups
+
+# Rebuilds the validation_rollups index from existing validations.
+rollups.backfill()
+print("Backfilled validation rollups")
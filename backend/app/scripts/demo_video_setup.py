@@ -6,6 +6,7 @@ from datetime import datetime, timedelta
 
 import pytz
 import requests
+from app.core import validation_indices
 from app.db.client import client
 from app.settings import settings
 from opensearchpy.helpers import bulk
@@ -193,7 +194,7 @@ class DemoVideoSetup:
     def insert_raw_validations(self, validations):
         bulk(
             client,
-            validations,
+            validation_indices.route(validations),
             index=settings.VALIDATION_INDEX,
             refresh="wait_for",
         )
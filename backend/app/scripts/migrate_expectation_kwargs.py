@@ -0,0 +1,51 @@
+import json
+import pathlib
+
+import yaml
+from app.db.client import client
+from app.settings import settings
+from opensearchpy.helpers import bulk, scan
+
+# Moves expectations whose kwargs were stored as JSON strings to the kwargs
+# object mapping. A field's type can't be changed in place, so expectations
+# are copied to a temporary index, the expectations index is recreated with
+# the current mappings and the copies are reindexed into it.
+
+path = f"{pathlib.Path(__file__).parent.resolve()}/../opensearch.yaml"
+mappings = yaml.load(open(path), Loader=yaml.SafeLoader)["expectations"]["mappings"]
+
+index = settings.EXPECTATION_INDEX
+temporary_index = f"{index}-migrating"
+
+
+def parsed(hits):
+    for hit in hits:
+        source = hit["_source"]
+        if isinstance(source.get("kwargs"), str):
+            source["kwargs"] = json.loads(source["kwargs"])
+        yield {"_index": temporary_index, "_id": hit["_id"], "_source": source}
+
+
+def migrate():
+    current = client.indices.get_mapping(index=index)[index]["mappings"]
+    if current.get("properties", {}).get("kwargs", {}).get("type") != "text":
+        print(f"{index} already stores kwargs as objects")
+        return
+
+    client.indices.create(index=temporary_index, body={"mappings": mappings})
+    copied, __ = bulk(client, parsed(scan(client, index=index)), refresh=True)
+    print(f"Copied {copied} expectations to {temporary_index}")
+
+    client.indices.delete(index=index)
+    client.indices.create(index=index, body={"mappings": mappings})
+    client.reindex(
+        body={"source": {"index": temporary_index}, "dest": {"index": index}},
+        refresh=True,
+        wait_for_completion=True,
+        request_timeout=3600,
+    )
+    client.indices.delete(index=temporary_index)
+    print(f"Migrated {copied} expectations in {index}")
+
+
+migrate()
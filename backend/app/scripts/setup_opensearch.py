@@ -2,6 +2,7 @@ import pathlib
 
 import opensearchpy.exceptions
 import yaml
+from app.core import validation_indices
 from app.db.client import client
 
 
@@ -12,6 +13,11 @@ def create_indicies(
     print(indicies)
 
     for value in indicies.values():
+        if value.get("index_patterns"):
+            # validations are written to time-based indices behind an alias
+            validation_indices.initialize(value["mappings"])
+            continue
+
         try:
             response = client.indices.create(
                 index=value["index_name"], body={"mappings": value["mappings"]}
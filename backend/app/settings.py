@@ -58,7 +58,113 @@ class Settings(BaseSettings):
     OKTA_OAUTH_SECRET: str = Field(default=None)
     OKTA_OAUTH_BASE_URL: str = Field(default=None)
 
+    # Evaluate supported expectations with a single aggregate query per dataset
+    # instead of one or more Great Expectations queries per expectation.
+    # Approximate expectations are always evaluated this way.
+    RUNNER_FUSED_VALIDATION_ENABLED: bool = Field(default=True)
+
+    # Rows fetched at a time when approximate expectations are estimated in
+    # python because the engine has no native sketch functions.
+    RUNNER_SKETCH_STREAM_BATCH_SIZE: int = Field(default=10000)
+
+    # Suggest expectations from SQL column statistics instead of GE's
+    # UserConfigurableProfiler. Columns with at most PROFILER_VALUE_SET_THRESHOLD
+    # distinct values get a value set suggestion.
+    RUNNER_NATIVE_PROFILER_ENABLED: bool = Field(default=True)
+    PROFILER_SAMPLE_SIZE: int = Field(default=1000)
+    PROFILER_VALUE_SET_THRESHOLD: int = Field(default=100)
+
+    # Great Expectations DataContexts (and their connection pools) are cached
+    # per datasource and leased to one validation at a time. At most
+    # RUNNER_CONTEXT_CACHE_SIZE idle contexts are kept; 0 disables caching.
+    RUNNER_CONTEXT_CACHE_SIZE: int = Field(default=16)
+    RUNNER_CONTEXT_CACHE_TTL_SECONDS: int = Field(default=900)
+
+    # Datasources with "max_concurrent_validations" hold a Redis backed slot
+    # for the duration of a validation. Slots of crashed processes are freed
+    # once their lease expires.
+    VALIDATION_SLOT_LEASE_SECONDS: int = Field(default=60)
+    VALIDATION_SLOT_POLL_SECONDS: float = Field(default=1)
+
+    # Worker threads that run validations requested through the API, and how
+    # long finished job statuses are kept in Redis.
+    VALIDATION_JOB_WORKERS: int = Field(default=4)
+    VALIDATION_JOB_TTL_SECONDS: int = Field(default=86400)
+
+    # Partitions of a partitioned dataset validated at the same time.
+    PARTITION_VALIDATION_WORKERS: int = Field(default=4)
+
+    # SQLAlchemy engines shared by the introspect, sample, datasource test and
+    # validation paths.
+    DATASOURCE_ENGINE_REGISTRY_SIZE: int = Field(default=32)
+    DATASOURCE_POOL_SIZE: int = Field(default=5)
+    DATASOURCE_POOL_MAX_OVERFLOW: int = Field(default=10)
+    DATASOURCE_POOL_RECYCLE_SECONDS: int = Field(default=1800)
+
+    # Most recent validations returned per expectation with include_history.
+    # OpenSearch caps top_hits at index.max_inner_result_window, 100 by default.
+    EXPECTATION_HISTORY_SIZE: int = Field(default=100)
+
+    # Validations are written to one index per "day" or "month" behind the
+    # VALIDATION_INDEX alias. Indices whose period ended more than
+    # VALIDATION_RETENTION_DAYS ago are deleted; validations are kept forever
+    # when it isn't set.
+    VALIDATION_INDEX_PERIOD: Literal["day", "month"] = Field(default="month")
+    VALIDATION_RETENTION_DAYS: int = Field(default=None)
+    VALIDATION_RETENTION_INTERVAL_MINUTES: int = Field(default=60)
+
+    # Validation results and rollups are indexed in batches shared across
+    # validations, sent once RESULT_SINK_BATCH_SIZE documents or
+    # RESULT_SINK_BATCH_BYTES bytes are buffered, or after
+    # RESULT_SINK_FLUSH_SECONDS. Documents rejected with 429 are retried up to
+    # RESULT_SINK_MAX_RETRIES times with exponential backoff.
+    RESULT_SINK_BATCH_SIZE: int = Field(default=500)
+    RESULT_SINK_BATCH_BYTES: int = Field(default=5242880)
+    RESULT_SINK_FLUSH_SECONDS: float = Field(default=5)
+    RESULT_SINK_MAX_RETRIES: int = Field(default=5)
+
+    # Dataset samples shown in the UI stop at whichever limit is reached first.
+    SAMPLE_MAX_ROWS: int = Field(default=10)
+    SAMPLE_MAX_BYTES: int = Field(default=1048576)
+
+    # Responses of the endpoints the UI polls are cached until their TTL passes
+    # or a write invalidates them. The "redis" backend shares entries and
+    # invalidations between API replicas and the scheduler, "memory" keeps up
+    # to RESPONSE_CACHE_SIZE responses in each process.
+    RESPONSE_CACHE_ENABLED: bool = Field(default=True)
+    RESPONSE_CACHE_BACKEND: Literal["memory", "redis"] = Field(default="redis")
+    RESPONSE_CACHE_SIZE: int = Field(default=256)
+
+    # Cached schemas, tables and columns served by the introspect endpoints.
+    CATALOG_TTL_SECONDS: int = Field(default=3600)
+    CATALOG_REFRESH_INTERVAL_MINUTES: int = Field(default=30)
+
+    # Scheduler replicas elect a leader through a Redis lock, renewed every
+    # third of SCHEDULER_LEADER_LEASE_SECONDS. Only the leader runs schedules.
+    # With the "queue" executor it pushes due runs onto a Redis work queue,
+    # consumed by any number of "python -m app.worker" processes, instead of
+    # running them in its own process pool. Runs not acknowledged within
+    # WORK_QUEUE_VISIBILITY_TIMEOUT_SECONDS, e.g. because their worker died,
+    # are delivered again, up to WORK_QUEUE_MAX_DELIVERIES times.
+    SCHEDULER_LEADER_LEASE_SECONDS: int = Field(default=15)
+    SCHEDULER_EXECUTOR: Literal["process", "queue"] = Field(default="process")
+    WORK_QUEUE_VISIBILITY_TIMEOUT_SECONDS: int = Field(default=300)
+    WORK_QUEUE_POLL_SECONDS: float = Field(default=1)
+    WORK_QUEUE_MAX_DELIVERIES: int = Field(default=3)
+
+    # Scheduled runs execute in a pool of SCHEDULER_EXECUTOR_MAX_WORKERS
+    # processes, started with the scheduler by SCHEDULER_EXECUTOR_START_METHOD.
+    # Processes import Great Expectations and the SQLAlchemy dialects up front
+    # and connect to the SCHEDULER_EXECUTOR_WARM_DATASOURCES datasources
+    # scheduled most recently. The pool is replaced once its processes ran
+    # SCHEDULER_EXECUTOR_MAX_TASKS_PER_CHILD runs each on average, or never
+    # when it's 0. SCHEDULER_EXECUTOR_KWARGS are passed to the process pool.
     SCHEDULER_EXECUTOR_MAX_WORKERS: int = Field(default=10)
+    SCHEDULER_EXECUTOR_START_METHOD: Literal["fork", "forkserver", "spawn"] = Field(
+        default="forkserver"
+    )
+    SCHEDULER_EXECUTOR_MAX_TASKS_PER_CHILD: int = Field(default=100)
+    SCHEDULER_EXECUTOR_WARM_DATASOURCES: int = Field(default=5)
     SCHEDULER_EXECUTOR_KWARGS: dict = Field(default=None)
     SCHEDULER_REDIS_DB: int = Field(default=0)
 
@@ -71,6 +177,17 @@ class Settings(BaseSettings):
     OPENSEARCH_USERNAME: str = Field(default="admin")
     OPENSEARCH_PASSWORD: str = Field(default="admin")
 
+    # Connections each OpenSearch client keeps open per node. The async client
+    # serves the API's endpoints, so this bounds the concurrent requests a
+    # replica sends to OpenSearch.
+    OPENSEARCH_MAX_CONNECTIONS: int = Field(default=25)
+
+    # Cursors of list endpoints read their pages from a point in time snapshot,
+    # kept alive for OPENSEARCH_PIT_KEEP_ALIVE between pages. Requires
+    # OpenSearch 2.4 or later.
+    OPENSEARCH_PIT_ENABLED: bool = Field(default=False)
+    OPENSEARCH_PIT_KEEP_ALIVE: str = Field(default="5m")
+
     # OpenSearch Index names
     DATASOURCE_INDEX: str = "datasources"
     DATASET_INDEX: str = "datasets"
@@ -78,6 +195,10 @@ class Settings(BaseSettings):
     VALIDATION_INDEX: str = "validations"
     SUGGESTION_INDEX: str = "suggestions"
     USER_INDEX: str = "user"
+    CATALOG_INDEX: str = "catalog"
+    VALIDATION_STATE_INDEX: str = "validation_state"
+    VALIDATION_ROLLUP_INDEX: str = "validation_rollups"
+    SCHEDULE_RUN_INDEX: str = "schedule_runs"
 
     TOKEN_URL: str = "/api/v1/token"
     IS_SSL: bool = True
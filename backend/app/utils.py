@@ -1,15 +1,12 @@
 import datetime
 import json
 from pathlib import Path
-from re import search
 from typing import Any, Dict
 
 import emails
 import pytz
 from app.settings import settings
 from emails.template import JinjaTemplate
-from sqlalchemy import create_engine
-from sqlalchemy.exc import OperationalError, ProgrammingError
 
 
 def current_time():
@@ -36,89 +33,51 @@ def string_to_military_time(date_string):
     )
 
 
-def get_sample_query(query, url):
-    # remove semi-colon from query
-    query = query.replace(";", "").strip()
-    query = query + " limit 10"
-
-    try:
-        with create_engine(url).connect() as con:
-            query = add_limit_clause(query)
-
-            execution = con.execute(query)
-
-            # TODO neaten up
-            result_set = []
-            columns = list(execution.keys())
-
-            for i, row in enumerate(execution.all()):
-                temp_row = {"key": i}
-                row = list(row)
-
-                for key in columns:
-                    for value in row:
-                        if isinstance(value, datetime.datetime):
-                            temp_row[key] = value.__str__()
-                        else:
-                            temp_row[key] = value
-
-                        row.remove(value)
-                        break
-
-                result_set.append(temp_row)
-
-            if len(columns) == 0:
-                return {"error": "No columns included in statement."}
-
-            return {"rows": result_set, "columns": columns}
-
-    except ProgrammingError as ex:
-        print(ex.orig.pgerror)
-        return {"exception": ex.orig.pgerror}
-    except OperationalError as ex:
-        return {"exception": str(ex.orig)}
-
-
-def add_limit_clause(query):
-    query = query.strip().replace(";", "")
-
-    if not search("limit", query):
-        query = query + " limit 10;"
-
-    return query
-
-
-def json_schema_to_single_doc(schema):
-    max_tries = 100
-
-    for i in range(max_tries):
-        if "$ref" not in json.dumps(schema):
-            break
-        schema = replace_value_in_dict(schema.copy(), schema.copy())
-
-    if schema.get("definitions"):
-        del schema["definitions"]
-
-    return schema
-
+def json_schema_to_single_doc(schema: dict) -> dict:
+    """
+    Returns a copy of a JSON schema with every local $ref replaced by the
+    definition it points to. Each definition is resolved once and shared by
+    the places that refer to it.
 
-def replace_value_in_dict(item, original_schema):
-    if isinstance(item, list):
-        return [replace_value_in_dict(i, original_schema) for i in item]
-    elif isinstance(item, dict):
-        if list(item.keys()) == ["$ref"]:
-            definitions = item["$ref"][2:].split("/")
-            res = original_schema.copy()
-            for definition in definitions:
-                res = res[definition]
-            return res
-        else:
-            return {
-                key: replace_value_in_dict(i, original_schema)
-                for key, i in item.items()
-            }
-    else:
-        return item
+    A $ref inside its own definition, directly or through other definitions,
+    is left as it is and the definitions are kept so it still resolves.
+    """
+    resolved = {}
+    cyclic = set()
+
+    def resolve(item, expanding: frozenset):
+        if isinstance(item, list):
+            return [resolve(i, expanding) for i in item]
+        if not isinstance(item, dict):
+            return item
+
+        ref = item.get("$ref")
+        if not isinstance(ref, str) or not ref.startswith("#/"):
+            return {key: resolve(value, expanding) for key, value in item.items()}
+
+        siblings = {
+            key: resolve(value, expanding)
+            for key, value in item.items()
+            if key != "$ref"
+        }
+        if ref in expanding:
+            cyclic.add(ref)
+            return {"$ref": ref, **siblings}
+
+        if ref not in resolved:
+            definition = schema
+            for key in ref[2:].split("/"):
+                definition = definition[key]
+            resolved[ref] = resolve(definition, expanding | {ref})
+        return {**resolved[ref], **siblings} if siblings else resolved[ref]
+
+    single_doc = resolve(
+        {key: value for key, value in schema.items() if key != "definitions"},
+        frozenset(),
+    )
+    if cyclic and "definitions" in schema:
+        single_doc["definitions"] = schema["definitions"]
+    return single_doc
 
 
 def list_to_string_mapper(d, sep="."):
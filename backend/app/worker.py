@@ -0,0 +1,4 @@
+from app.core.schedulers.worker import QueueWorker
+
+if __name__ == "__main__":
+    QueueWorker().run()
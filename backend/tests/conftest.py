@@ -0,0 +1,7 @@
+import os
+
+# Settings are read when app.settings is first imported.
+os.environ.setdefault("PRODUCTION", "false")
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("ADMIN_EMAIL", "admin@example.com")
+os.environ.setdefault("ADMIN_PASSWORD", "test")
@@ -0,0 +1,153 @@
+import pytest
+import sqlalchemy as sa
+from app.core import sampling
+from app.models.dataset import Dataset
+from app.models.datasource import PostgreSQL, Redshift, Trino
+from pydantic import ValidationError
+
+POSTGRESQL = PostgreSQL(
+    datasource_name="postgres",
+    description="",
+    username="user",
+    password="password",
+    database="db",
+    host="localhost",
+    port=5432,
+)
+
+
+@pytest.fixture
+def engine():
+    return sa.create_engine("sqlite://")
+
+
+def dataset(**sampling_kwargs) -> Dataset:
+    return Dataset(
+        datasource_id="datasource",
+        datasource_name="postgres",
+        database="db",
+        dataset_name="public.orders",
+        sampling=sampling_kwargs,
+    )
+
+
+def sample_query(datasource, engine, **sampling_kwargs) -> str:
+    batch = sampling.sample_batch(datasource, dataset(**sampling_kwargs), engine)
+    return batch.runtime_parameters.query
+
+
+def test_fraction_uses_native_sampling(engine):
+    assert (
+        sample_query(POSTGRESQL, engine, fraction=0.1, seed=7)
+        == "SELECT * FROM public.orders TABLESAMPLE BERNOULLI (10.0) REPEATABLE (7)"
+    )
+
+
+def test_fraction_with_hash_column_compares_buckets(engine):
+    query = sample_query(POSTGRESQL, engine, fraction=0.25, hash_column="id")
+
+    assert query == (
+        "SELECT * FROM public.orders WHERE mod(abs(hashtext(coalesce((id)::text, '') "
+        "|| '0')::bigint), 1000000) < 250000"
+    )
+
+
+def test_max_rows_keeps_lowest_buckets(engine):
+    query = sample_query(POSTGRESQL, engine, max_rows=100, hash_column="id", seed=3)
+
+    assert query == (
+        "SELECT * FROM public.orders ORDER BY abs(hashtext(coalesce((id)::text, '') "
+        "|| '3')::bigint) LIMIT 100"
+    )
+
+
+def test_max_rows_requires_hash_column():
+    with pytest.raises(ValidationError, match="hash column"):
+        dataset(max_rows=100)
+
+
+def test_virtual_dataset_is_sampled_as_subquery(engine):
+    virtual = Dataset(
+        datasource_id="datasource",
+        datasource_name="postgres",
+        database="db",
+        dataset_name="recent_orders",
+        runtime_parameters={"schema": "public", "query": "SELECT * FROM orders;"},
+        sampling={"fraction": 0.5},
+    )
+
+    query = sampling.sample_batch(POSTGRESQL, virtual, engine).runtime_parameters.query
+
+    assert query.startswith("SELECT * FROM (SELECT * FROM orders) AS swiple_sample ")
+    assert "hashtext(coalesce((swiple_sample)::text, '')" in query
+
+
+@pytest.mark.parametrize(
+    "datasource",
+    [
+        POSTGRESQL,
+        Redshift(
+            datasource_name="redshift",
+            description="",
+            username="user",
+            password="password",
+            database="db",
+            host="localhost",
+            port=5439,
+        ),
+        Trino(
+            datasource_name="trino",
+            description="",
+            username="user",
+            host="localhost",
+            database="db",
+            port=8080,
+        ),
+    ],
+)
+def test_hash_bucket_maps_null_to_a_bucket(datasource):
+    assert "coalesce(" in datasource.hash_bucket('"id"', 0)
+
+
+def test_annotate_flags_totals_and_extrapolates_row_counts():
+    results = [
+        {
+            "expectation_config": {
+                "expectation_type": "expect_table_row_count_to_be_between"
+            },
+            "result": {"observed_value": 120},
+        },
+        {
+            "expectation_config": {
+                "expectation_type": "expect_column_values_to_not_be_null"
+            },
+            "result": {"element_count": 120, "unexpected_count": 12},
+        },
+    ]
+
+    row_count, not_null = sampling.annotate(
+        results, dataset(fraction=0.1, max_rows=1000, hash_column="id")
+    )
+
+    assert row_count["sampling"]["describes_sample"]
+    assert row_count["result"]["estimated_observed_value"] == 1200
+    assert "describes_sample" not in not_null["sampling"]
+    assert not_null["result"]["estimated_unexpected_count"] == 120
+    assert not_null["result"]["unexpected_percent_margin"] == pytest.approx(5.367, 1e-3)
+
+
+def test_annotate_doesnt_extrapolate_capped_row_counts():
+    results = [
+        {
+            "expectation_config": {
+                "expectation_type": "expect_table_row_count_to_equal"
+            },
+            "result": {"observed_value": 1000},
+        }
+    ]
+
+    (row_count,) = sampling.annotate(
+        results, dataset(fraction=0.1, max_rows=1000, hash_column="id")
+    )
+
+    assert "estimated_observed_value" not in row_count["result"]
@@ -0,0 +1,77 @@
+import fakeredis
+import pytest
+from app.core.work_queue import WorkQueue
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeRedis()
+
+
+def queue(redis, **kwargs) -> WorkQueue:
+    return WorkQueue(redis, "test", **kwargs)
+
+
+def test_claims_in_push_order_and_acks(redis):
+    work_queue = queue(redis)
+    work_queue.push({"run": 1})
+    work_queue.push({"run": 2})
+
+    first = work_queue.claim()
+    second = work_queue.claim()
+
+    assert (first.body, first.delivery) == ({"run": 1}, 1)
+    assert second.body == {"run": 2}
+    assert work_queue.claim() is None
+
+    assert work_queue.ack(first)
+    assert work_queue.ack(second)
+    assert not redis.exists(work_queue.messages_key, work_queue.processing_key)
+
+
+def test_claimed_message_is_hidden_until_its_timeout(redis):
+    work_queue = queue(redis, visibility_timeout_seconds=300)
+    work_queue.push({"run": 1})
+
+    assert work_queue.claim() is not None
+    assert work_queue.claim() is None
+
+
+def test_unacknowledged_message_is_delivered_again(redis):
+    work_queue = queue(redis, visibility_timeout_seconds=0)
+    work_queue.push({"run": 1})
+
+    first = work_queue.claim()
+    second = work_queue.claim()
+
+    assert second.id == first.id
+    assert second.delivery == 2
+
+
+def test_stale_delivery_cant_ack_or_extend(redis):
+    work_queue = queue(redis, visibility_timeout_seconds=0)
+    work_queue.push({"run": 1})
+    stale = work_queue.claim()
+    current = work_queue.claim()
+
+    assert not work_queue.ack(stale)
+    assert not work_queue.extend(stale)
+    assert work_queue.extend(current)
+    assert work_queue.ack(current)
+
+
+def test_message_is_dead_lettered_after_max_deliveries(redis):
+    work_queue = queue(redis, visibility_timeout_seconds=0, max_deliveries=2)
+    work_queue.push({"run": 1})
+
+    assert work_queue.claim().delivery == 1
+    assert work_queue.claim().delivery == 2
+    assert work_queue.claim() is None
+
+    assert redis.lrange(work_queue.dead_letters_key, 0, -1) == [b'{"run": 1}']
+    assert not redis.exists(
+        work_queue.pending_key,
+        work_queue.messages_key,
+        work_queue.deliveries_key,
+    )
+    assert work_queue.claim() is None
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import fakeredis
+import pytest
+from app import constants as c
+from app import main
+from app.core import result_sink as sink_module
+from app.core import validation_jobs
+
+
+@pytest.mark.parametrize(
+    "app, stop_work",
+    [
+        (c.APP_SWIPLE_API, mock.call.validation_jobs.shutdown(wait=True)),
+        (c.APP_SCHEDULER, mock.call.scheduler.shutdown()),
+    ],
+)
+def test_work_is_stopped_before_what_it_writes_through_is_closed(
+    monkeypatch, app, stop_work
+):
+    calls = mock.Mock()
+    calls.async_client.close = mock.AsyncMock()
+    for name in [
+        "validation_jobs",
+        "scheduler",
+        "result_sink",
+        "async_client",
+        "client",
+        "engines",
+    ]:
+        monkeypatch.setattr(main, name, getattr(calls, name))
+    monkeypatch.setattr(main.settings, "APP", app)
+
+    asyncio.run(main.shutdown())
+
+    assert calls.mock_calls == [
+        stop_work,
+        mock.call.result_sink.close(),
+        mock.call.async_client.close(),
+        mock.call.client.close(),
+        mock.call.engines.dispose_all(),
+    ]
+
+
+def test_validation_jobs_shutdown_waits_for_running_jobs(monkeypatch):
+    monkeypatch.setattr(validation_jobs, "redis_client", fakeredis.FakeRedis())
+    monkeypatch.setattr(validation_jobs, "_executor", ThreadPoolExecutor(1))
+    started = threading.Event()
+    release = threading.Event()
+    finished = []
+
+    def validate(dataset_id):
+        started.set()
+        release.wait()
+        finished.append(dataset_id)
+        return []
+
+    running = validation_jobs.submit("running", validate)
+    queued = validation_jobs.submit("queued", validate)
+    started.wait()
+    threading.Timer(0.1, release.set).start()
+
+    validation_jobs.shutdown(wait=True)
+
+    assert finished == ["running"]
+    assert validation_jobs.get(running["job_id"])["status"] == c.JOB_SUCCEEDED
+    assert validation_jobs.get(queued["job_id"])["status"] == c.JOB_CANCELLED
+
+
+def test_result_sink_rejects_actions_once_closed(monkeypatch):
+    sent = []
+    monkeypatch.setattr(
+        sink_module,
+        "streaming_bulk",
+        lambda client, batch, **kwargs: [
+            sent.append(action) or (True, {}) for action in batch
+        ],
+    )
+    monkeypatch.setattr(sink_module.response_cache, "invalidate", lambda *tags: None)
+    sink = sink_module.ResultSink(flush_seconds=60)
+
+    sink.add([{"_index": "validations", "success": True}])
+    sink.close()
+
+    assert sent == [{"_index": "validations", "success": True}]
+    with pytest.raises(RuntimeError):
+        sink.add([{"_index": "validations", "success": False}])
@@ -148,6 +148,12 @@ export const postRunnerValidateDataset = async (datasetId) => axios.post(
   .then((response) => response)
   .catch((error) => errorHandler(error));
 
+export const getValidationJob = (jobId) => axios.get(
+  `${BASE_URL}/validation-jobs/${jobId}`,
+)
+  .then((response) => response)
+  .catch((error) => errorHandler(error));
+
 export const suggestExpectations = (datasetId) => axios.post(
   `${BASE_URL}/datasets/${datasetId}/suggest`,
 )
@@ -34,6 +34,7 @@ import {
   getDataset, getDataSource,
   getExpectations,
   getValidationStats,
+  getValidationJob,
   postRunnerValidateDataset,
   putSample,
   getQuerySample,
@@ -520,8 +521,27 @@ const Dataset = withRouter(() => {
     modified_date: moment(item.modified_date).local().fromNow(),
   }));
 
+  const waitForValidationJob = (jobId) => new Promise((resolve) => {
+    const poll = () => getValidationJob(jobId).then((response) => {
+      if (response && response.status === 200 && !['succeeded', 'failed'].includes(response.data.status)) {
+        setTimeout(poll, 2000);
+        return;
+      }
+      if (response && response.status === 200 && response.data.status === 'failed') {
+        message.error(`Validation failed: ${response.data.exception_message}`, 5);
+      }
+      resolve();
+    });
+    poll();
+  });
+
   const analyzeDataset = () => new Promise((resolve) => {
-    postRunnerValidateDataset(datasetId).then(() => {
+    postRunnerValidateDataset(datasetId).then((response) => {
+      if (response && response.status === 202) {
+        return waitForValidationJob(response.data.job_id);
+      }
+      return null;
+    }).then(() => {
       setRefreshValidationStats(true);
       setRefreshExpectations(true);
       resolve();
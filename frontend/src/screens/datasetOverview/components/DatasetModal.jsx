@@ -1,7 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import PropTypes from 'prop-types';
 import {
-  Button, Form, Input, message, Radio, Row, Select, Space, Typography,
+  Button, Form, Input, InputNumber, message, Radio, Row, Select, Space, Typography,
 } from 'antd';
 import Editor from '@uiw/react-textarea-code-editor';
 import { CheckCircleTwoTone, CloseCircleTwoTone } from '@ant-design/icons';
@@ -55,6 +55,9 @@ function DatasetModal({
         form.setFieldsValue({
           dataset_name: editedDataset.dataset_name,
           description: editedDataset.description,
+          watermark_column: editedDataset.watermark_column,
+          sampling: editedDataset.sampling,
+          partitioning: editedDataset.partitioning,
           datasource_id: editedDataset.datasource_id,
           schema: editedDataset.runtime_parameters.schema,
           query: editedDataset.runtime_parameters.query,
@@ -65,6 +68,9 @@ function DatasetModal({
         form.setFieldsValue({
           dataset_name: editedDataset.dataset_name,
           description: editedDataset.description,
+          watermark_column: editedDataset.watermark_column,
+          sampling: editedDataset.sampling,
+          partitioning: editedDataset.partitioning,
           datasource_id: editedDataset.datasource_id,
           schema: splitDataset[0],
           table: splitDataset[1],
@@ -133,6 +139,28 @@ function DatasetModal({
     };
   };
 
+  const transformSampling = (sampling) => {
+    if (!sampling || !(sampling.fraction || sampling.max_rows)) {
+      return null;
+    }
+    return {
+      ...sampling,
+      seed: sampling.seed || 0,
+      hash_column: sampling.hash_column || null,
+    };
+  };
+
+  const transformPartitioning = (partitioning) => {
+    if (!partitioning || !partitioning.column) {
+      return null;
+    }
+    return {
+      column: partitioning.column,
+      lookback: partitioning.lookback || 30,
+      change_column: partitioning.change_column || null,
+    };
+  };
+
   const transformDatasetPayload = (payload) => {
     let transformedPayload;
 
@@ -151,9 +179,12 @@ function DatasetModal({
       transformedPayload = {
         dataset_name: `${payload.schema}.${payload.table}`,
         description: payload.description,
+        watermark_column: payload.watermark_column || null,
         datasource_id: payload.datasource_id,
       };
     }
+    transformedPayload.sampling = transformSampling(payload.sampling);
+    transformedPayload.partitioning = transformPartitioning(payload.partitioning);
 
     const datasourceFields = getAdditionalFields(payload.datasource_id);
 
@@ -459,6 +490,49 @@ function DatasetModal({
             placeholder="Enter a description"
           />
         </Form.Item>
+        <Form.Item
+          label="Watermark Column"
+          name="watermark_column"
+          tooltip="Timestamp or increasing id column. When set, each run only validates rows added since the previous run."
+          style={{ width: '50%', minWidth: '360px' }}
+        >
+          <Input placeholder="Validate the full dataset on each run" />
+        </Form.Item>
+        <Form.Item
+          label="Sampling"
+          tooltip="Validate a random sample of the dataset. The seed keeps samples reproducible between runs. Max rows keeps the rows with the lowest hashes of the hash column, which is required with it."
+        >
+          <Space>
+            <Form.Item name={['sampling', 'fraction']} noStyle>
+              <InputNumber min={0.0001} max={1} step={0.01} placeholder="Fraction" />
+            </Form.Item>
+            <Form.Item name={['sampling', 'max_rows']} noStyle>
+              <InputNumber min={1} placeholder="Max rows" />
+            </Form.Item>
+            <Form.Item name={['sampling', 'seed']} noStyle>
+              <InputNumber min={0} precision={0} placeholder="Seed" />
+            </Form.Item>
+            <Form.Item name={['sampling', 'hash_column']} noStyle>
+              <Input placeholder="Hash column" />
+            </Form.Item>
+          </Space>
+        </Form.Item>
+        <Form.Item
+          label="Partitioning"
+          tooltip="Validate each of the most recent partitions separately. Partitions are only validated again when their row count, the latest value of the change column (e.g. updated_at) or the expectations change. Without a change column, rows corrected in place aren't noticed."
+        >
+          <Space>
+            <Form.Item name={['partitioning', 'column']} noStyle>
+              <Input placeholder="Partition column" />
+            </Form.Item>
+            <Form.Item name={['partitioning', 'lookback']} noStyle>
+              <InputNumber min={1} max={1000} precision={0} placeholder="Partitions (30)" />
+            </Form.Item>
+            <Form.Item name={['partitioning', 'change_column']} noStyle>
+              <Input placeholder="Change column" />
+            </Form.Item>
+          </Space>
+        </Form.Item>
         {
           datasetType !== 'table' || !schemas.length > 0 || !form.getFieldValue('schema')
             ? null
@@ -572,6 +646,9 @@ DatasetModal.defaultProps = {
     key: null,
     dataset_name: null,
     description: null,
+    watermark_column: null,
+    sampling: null,
+    partitioning: null,
     datasource_id: null,
     runtime_parameters: {
       schema: null,
@@ -587,6 +664,18 @@ DatasetModal.propTypes = {
     key: PropTypes.string,
     dataset_name: PropTypes.string,
     description: PropTypes.string,
+    watermark_column: PropTypes.string,
+    sampling: PropTypes.shape({
+      fraction: PropTypes.number,
+      max_rows: PropTypes.number,
+      seed: PropTypes.number,
+      hash_column: PropTypes.string,
+    }),
+    partitioning: PropTypes.shape({
+      column: PropTypes.string,
+      lookback: PropTypes.number,
+      change_column: PropTypes.string,
+    }),
     datasource_id: PropTypes.string,
     runtime_parameters: PropTypes.shape({
       schema: PropTypes.string,